@@ -4,6 +4,12 @@ import pandas as pd  # For data manipulation
 import plotly.express as px  # For interactive visualizations
 import plotly.graph_objects as go  # For custom visualizations
 import os  # For file operations
+import sys  # For importing the shared pipeline modules
+
+# The shared data schema lives with the pipeline scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from data_schema import load_stage_data  # Shared dtype-aware loader
+from binary_flags import FLAG_FIELDS, pack_flags, match  # Bit-packed yes/no attributes
 
 # Set page configuration (must be first Streamlit command)
 st.set_page_config(
@@ -64,8 +70,11 @@ def load_data():
         st.error(f"❌ Data file not found: {data_path}")
         st.stop()
     
-    # Load CSV into DataFrame
-    df = pd.read_csv(data_path)
+    # Load CSV into DataFrame (categories, flags and dates typed by the shared schema)
+    df = load_stage_data(data_path, 'dashboard')
+    # Datasets enriched before Binary_Flags existed are packed on load
+    if 'Binary_Flags' not in df.columns:
+        df['Binary_Flags'] = pack_flags(df)
     
     return df
 
@@ -97,29 +106,42 @@ st.sidebar.title("🔧 Global Filters")
 # Filter 1: Contract Type
 contract_filter = st.sidebar.multiselect(
     "Contract Type",  # Label
-    options=df['Contract'].unique(),  # Available options
-    default=df['Contract'].unique()  # Default: all selected
+    options=df['Contract'].unique().tolist(),  # Available options
+    default=df['Contract'].unique().tolist()  # Default: all selected
 )
 
 # Filter 2: Tenure Segment
 tenure_filter = st.sidebar.multiselect(
     "Tenure Segment",
-    options=df['Tenure_Segment'].unique(),
-    default=df['Tenure_Segment'].unique()
+    options=df['Tenure_Segment'].unique().tolist(),
+    default=df['Tenure_Segment'].unique().tolist()
 )
 
 # Filter 3: Value Segment
 value_filter = st.sidebar.multiselect(
     "Value Segment",
-    options=df['Value_Segment'].unique(),
-    default=df['Value_Segment'].unique()
+    options=df['Value_Segment'].unique().tolist(),
+    default=df['Value_Segment'].unique().tolist()
+)
+
+# Filter 4: Customer attributes (any combination is one bitwise test on Binary_Flags)
+required_attributes = st.sidebar.multiselect(
+    "Required Attributes",
+    options=list(FLAG_FIELDS),
+    default=[]
+)
+excluded_attributes = st.sidebar.multiselect(
+    "Excluded Attributes",
+    options=list(FLAG_FIELDS),
+    default=[]
 )
 
 # Apply filters to dataset
 df_filtered = df[
     (df['Contract'].isin(contract_filter)) &  # Filter by contract
     (df['Tenure_Segment'].isin(tenure_filter)) &  # Filter by tenure
-    (df['Value_Segment'].isin(value_filter))  # Filter by value
+    (df['Value_Segment'].isin(value_filter)) &  # Filter by value
+    match(df['Binary_Flags'].to_numpy(), required_attributes, excluded_attributes)  # Filter by attributes
 ]
 
 # Show filter summary in sidebar
@@ -206,7 +228,7 @@ if page == "🏠 Executive Overview":
         st.subheader("💰 Revenue Impact by Churn Status")
         
         # Create bar chart for revenue by churn status
-        revenue_by_churn = df_filtered.groupby('Churn')['CLV'].sum().reset_index()
+        revenue_by_churn = df_filtered.groupby('Churn', observed=True)['CLV'].sum().reset_index()
         fig = px.bar(
             revenue_by_churn,
             x='Churn',
@@ -233,7 +255,7 @@ if page == "🏠 Executive Overview":
     high_risk_count = (df_filtered['Risk_Score'] >= 2).sum()
     high_risk_pct = (high_risk_count / total_customers * 100) if total_customers > 0 else 0
     
-    mtm_churn = df_filtered[df_filtered['Contract'] == 'Month-to-month']['Churn'].apply(lambda x: x == 'Yes').mean() * 100
+    mtm_churn = (df_filtered[df_filtered['Contract'] == 'Month-to-month']['Churn'] == 'Yes').mean() * 100
     
     # Display insights in boxes
     st.markdown(f"""
@@ -380,7 +402,7 @@ elif page == "📈 Segment Analysis":
         st.subheader("💎 Value Segment Comparison")
         
         # Calculate value segment metrics
-        value_summary = df_filtered.groupby('Value_Segment').agg({
+        value_summary = df_filtered.groupby('Value_Segment', observed=True).agg({
             'customerID': 'count',
             'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
             'CLV': ['sum', 'mean'],
@@ -432,7 +454,7 @@ elif page == "📈 Segment Analysis":
         st.subheader("⏳ Tenure Segment (Lifecycle) Comparison")
         
         # Calculate tenure segment metrics
-        tenure_summary = df_filtered.groupby('Tenure_Segment').agg({
+        tenure_summary = df_filtered.groupby('Tenure_Segment', observed=True).agg({
             'customerID': 'count',
             'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
             'tenure': 'mean',
@@ -501,7 +523,7 @@ elif page == "🎯 Churn Drivers":
         st.subheader("📄 Contract Type Impact on Churn")
         
         # Calculate contract metrics
-        contract_summary = df_filtered.groupby('Contract').agg({
+        contract_summary = df_filtered.groupby('Contract', observed=True).agg({
             'customerID': 'count',
             'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
             'CLV': 'sum'
@@ -566,7 +588,7 @@ elif page == "🎯 Churn Drivers":
         st.subheader("💳 Payment Method Impact on Churn")
         
         # Calculate payment method metrics
-        payment_summary = df_filtered.groupby('PaymentMethod').agg({
+        payment_summary = df_filtered.groupby('PaymentMethod', observed=True).agg({
             'customerID': 'count',
             'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100
         }).reset_index()
@@ -923,8 +945,8 @@ else:  # Customer Explorer
     with col3:
         payment_filter = st.multiselect(
             "Payment Method",
-            options=df['PaymentMethod'].unique(),
-            default=df['PaymentMethod'].unique()
+            options=df['PaymentMethod'].unique().tolist(),
+            default=df['PaymentMethod'].unique().tolist()
         )
     
     # Apply additional filters
@@ -3,6 +3,7 @@ import pandas as pd  # For data manipulation
 import numpy as np  # For numerical operations
 import os  # For file operations
 from datetime import datetime  # For timestamps
+from data_schema import load_stage_data, memory_report  # Shared dtype-aware loader
 
 # Print header
 print("=" * 80)
@@ -28,9 +29,10 @@ os.makedirs("outputs/reports", exist_ok=True)
 
 # Load the enriched dataset
 print("📂 Loading enriched dataset...")
-df = pd.read_csv(input_path)
+df = load_stage_data(input_path, 'reasoning')
 print(f"✅ Dataset loaded: {input_path}")
 print(f"   Shape: {df.shape[0]} rows × {df.shape[1]} columns")
+print(f"   {memory_report(df, 'reasoning')}")
 print()
 
 # Initialize report lines lists
@@ -72,7 +74,7 @@ analysis_report.append("-" * 80)
 print("\n📊 Hypothesis 1: Month-to-month contracts drive higher churn")
 
 # Calculate churn rate by contract type
-churn_by_contract = df.groupby('Contract').agg({
+churn_by_contract = df.groupby('Contract', observed=True).agg({
     'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,  # Churn rate
     'customerID': 'count'  # Customer count
 }).rename(columns={'Churn': 'Churn_Rate', 'customerID': 'Customer_Count'})
@@ -98,7 +100,7 @@ analysis_report.append(f"  Conclusion: VALIDATED - Contract type is a major chur
 print("\n📊 Hypothesis 2: Early tenure customers have highest churn risk")
 
 # Calculate churn rate by tenure segment
-churn_by_tenure = df.groupby('Tenure_Segment').agg({
+churn_by_tenure = df.groupby('Tenure_Segment', observed=True).agg({
     'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
     'customerID': 'count'
 }).rename(columns={'Churn': 'Churn_Rate', 'customerID': 'Customer_Count'})
@@ -123,7 +125,7 @@ analysis_report.append(f"  Conclusion: VALIDATED - First year is critical retent
 # Hypothesis 3: Payment method affects churn rates
 print("\n📊 Hypothesis 3: Payment method indicates churn risk")
 
-churn_by_payment = df.groupby('PaymentMethod').agg({
+churn_by_payment = df.groupby('PaymentMethod', observed=True).agg({
     'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
     'customerID': 'count'
 }).rename(columns={'Churn': 'Churn_Rate', 'customerID': 'Customer_Count'}).sort_values('Churn_Rate', ascending=False)
@@ -147,7 +149,7 @@ analysis_report.append(f"  Conclusion: VALIDATED - Payment method is churn indic
 # Hypothesis 4: Service adoption reduces churn
 print("\n📊 Hypothesis 4: Higher service adoption reduces churn")
 
-churn_by_engagement = df.groupby('Engagement_Level').agg({
+churn_by_engagement = df.groupby('Engagement_Level', observed=True).agg({
     'Churn': lambda x: (x == 'Yes').sum() / len(x) * 100,
     'customerID': 'count'
 }).rename(columns={'Churn': 'Churn_Rate', 'customerID': 'Customer_Count'})
@@ -299,9 +301,9 @@ for value_seg in ['High Value', 'Medium Value', 'Low Value']:
     })
 
 analysis_report.append("\nVALUE SEGMENT CHURN RATES:")
-analysis_report.append(f"  High Value: {df[df['Value_Segment']=='High Value']['Churn'].apply(lambda x: x=='Yes').mean()*100:.2f}%")
-analysis_report.append(f"  Medium Value: {df[df['Value_Segment']=='Medium Value']['Churn'].apply(lambda x: x=='Yes').mean()*100:.2f}%")
-analysis_report.append(f"  Low Value: {df[df['Value_Segment']=='Low Value']['Churn'].apply(lambda x: x=='Yes').mean()*100:.2f}%")
+analysis_report.append(f"  High Value: {(df[df['Value_Segment']=='High Value']['Churn'] == 'Yes').mean()*100:.2f}%")
+analysis_report.append(f"  Medium Value: {(df[df['Value_Segment']=='Medium Value']['Churn'] == 'Yes').mean()*100:.2f}%")
+analysis_report.append(f"  Low Value: {(df[df['Value_Segment']=='Low Value']['Churn'] == 'Yes').mean()*100:.2f}%")
 
 analysis_report.append("")
 print()
@@ -0,0 +1,98 @@
+"""
+BINARY FLAGS
+Bit-packed representation of the customer's yes/no attributes and quality flags.
+Each attribute is one bit of a uint32 per customer (Binary_Flags), so 19 text/bool
+columns take 4 bytes per customer, and multi-flag filters are one AND + one compare.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For bitwise operations
+
+# Bit order of the packed attributes: name -> values that set the bit
+# (name = source column; new attributes must be appended so existing bits keep their meaning).
+# Only true yes/no attributes: no multi-valued columns (InternetService), and never the Churn target,
+# so a filter or model reading Binary_Flags cannot see the label
+FLAG_FIELDS = {
+    'Partner': ['Yes'],
+    'Dependents': ['Yes'],
+    'PhoneService': ['Yes'],
+    'MultipleLines': ['Yes'],
+    'OnlineSecurity': ['Yes'],
+    'OnlineBackup': ['Yes'],
+    'DeviceProtection': ['Yes'],
+    'TechSupport': ['Yes'],
+    'StreamingTV': ['Yes'],
+    'StreamingMovies': ['Yes'],
+    'PaperlessBilling': ['Yes'],
+    'SeniorCitizen': [1],
+    'High_Risk_Flag': [1],
+    'Payment_Risk_Flag': [1],
+    'Service_Risk_Flag': [1],
+    'Has_Family': [1],
+    'Is_Senior': [1],
+    'TotalCharges_Imputed': [True],
+    'No_Recent_Contact': [True],
+}
+
+# Bit position of every attribute
+FLAG_BITS = {name: bit for bit, name in enumerate(FLAG_FIELDS)}
+
+
+# Pack the yes/no columns of a DataFrame into one integer per row
+def pack_flags(df, fields=FLAG_FIELDS):
+    """Return a uint32 array: bit i is set where column i holds one of its 'true' values"""
+    bits = np.zeros(len(df), dtype=np.uint32)
+    for bit, (col, true_values) in enumerate(fields.items()):
+        if col not in df.columns:
+            continue  # Attributes a stage does not have yet stay 0
+        # isin() on a category column only compares the categories, not every row
+        bits |= df[col].isin(true_values).to_numpy().astype(np.uint32) << np.uint32(bit)
+    return bits
+
+
+# Mask with the bits of the given attributes set
+def flag_mask(names):
+    """Return the uint32 mask of the named attributes"""
+    mask = np.uint32(0)
+    for name in names:
+        mask |= np.uint32(1) << np.uint32(FLAG_BITS[name])
+    return mask
+
+
+# One attribute as a boolean array
+def flag(bits, name):
+    return (bits & flag_mask([name])) != 0
+
+
+# Rows matching a conjunction of attributes: a single bitwise test per row
+def match(bits, require=(), exclude=()):
+    """Return the boolean mask of rows with every 'require' attribute set and every 'exclude' attribute clear"""
+    required = flag_mask(require)
+    return (bits & (required | flag_mask(exclude))) == required
+
+
+# Rows with at least one of the attributes set
+def match_any(bits, names):
+    return (bits & flag_mask(names)) != 0
+
+
+# Number of attributes set per row (e.g. services held)
+def count_set(bits, names=FLAG_FIELDS):
+    """Return the per-row popcount over the named attributes"""
+    return np.bitwise_count(bits & flag_mask(names)).astype(np.int64)
+
+
+# Unpack attributes back into boolean columns
+def unpack_flags(bits, names=FLAG_FIELDS):
+    """Return a DataFrame with one boolean column per named attribute"""
+    return pd.DataFrame({name: flag(bits, name) for name in names})
+
+
+# Customers per attribute, from the packed integers
+def flag_counts(bits, names=FLAG_FIELDS):
+    """Return a Series: attribute -> number of rows with the bit set"""
+    # View each uint32 as 4 little-endian bytes and unpack to one bit per column
+    unpacked = np.unpackbits(bits.astype('<u4').view(np.uint8).reshape(-1, 4), axis=1, bitorder='little')
+    totals = unpacked.sum(axis=0, dtype=np.int64)
+    return pd.Series([int(totals[FLAG_BITS[name]]) for name in names], index=list(names), dtype=np.int64)
@@ -0,0 +1,297 @@
+"""
+CHART RENDERING
+Chart specs rendered in a process pool with the Agg backend, behind a content-addressed cache.
+A spec names a registered renderer and carries the aggregated data it draws; its cache key
+is a hash of that data, the spec's options, the drawing code and the output settings,
+so charts whose inputs have not changed are not drawn again.
+"""
+
+# Import required libraries
+import os  # For file operations
+import json  # For the cache manifest
+import hashlib  # For content hashes
+import inspect  # For hashing the drawing code
+import sys  # For this module's source
+import multiprocessing as mp  # For the fork start method
+from concurrent.futures import ProcessPoolExecutor  # For the worker pool
+import numpy as np  # For array hashing
+import pandas as pd  # For frame hashing
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend: file output only, safe in worker processes
+import matplotlib.pyplot as plt  # For creating visualizations
+import seaborn as sns  # For statistical visualizations
+
+# Output settings: full quality and a lightweight preview
+DEFAULT_DPI = 300
+PREVIEW_DPI = 72
+
+# Cache manifest (output file -> key of the spec it was rendered from + digest of the file written),
+# one per output directory
+CACHE_MANIFEST = '.chart_cache.json'
+
+
+# Shared plotting style (applied in the parent and inherited by the workers)
+def setup_style():
+    sns.set_style("whitegrid")  # Use white background with grid lines
+    plt.rcParams['figure.figsize'] = (10, 6)  # Default figure size
+    plt.rcParams['font.size'] = 10  # Default font size
+
+
+# ==================== BINNED SUMMARIES ====================
+# Charts receive fixed-size summaries instead of columns, so drawing (and hashing)
+# a chart costs the same for 7K or 10M customers
+
+# Histogram counts of one column (missing values ignored, same edges as plt.hist)
+def histogram_summary(values, bins=30):
+    """Return {'counts', 'edges'} of np.histogram over the non-missing values"""
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return {'counts': counts, 'edges': edges}
+
+
+# Draw a pre-binned histogram: one weighted point per bin reproduces the original bars
+def _draw_histogram(ax, summary, **style):
+    return ax.hist(summary['edges'][:-1], bins=summary['edges'], weights=summary['counts'], **style)
+
+
+# ==================== RENDERERS ====================
+# Each renderer draws one figure from a spec's aggregated data and returns it
+
+def _churn_distribution(data):
+    fig, ax = plt.subplots(figsize=(8, 6))
+
+    # Create pie chart with custom colors
+    colors = ['#2ecc71', '#e74c3c']  # Green for No, Red for Yes
+    wedges, texts, autotexts = ax.pie(
+        data['counts'].values,  # Values to plot
+        labels=data['counts'].index,  # Labels (Yes, No)
+        autopct='%1.1f%%',  # Show percentages with 1 decimal
+        startangle=90,  # Start from top
+        colors=colors,  # Custom colors
+        explode=(0, 0.1)  # Slightly separate the "Yes" slice for emphasis
+    )
+
+    # Make percentage text bold and white
+    for autotext in autotexts:
+        autotext.set_color('white')  # White text on colored background
+        autotext.set_fontsize(12)  # Larger font for readability
+        autotext.set_weight('bold')  # Bold text
+
+    ax.set_title('Customer Churn Distribution', fontsize=14, fontweight='bold', pad=20)
+    return fig
+
+
+def _tenure_distribution(data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Histogram with vertical lines for mean and median
+    _draw_histogram(ax, data['histogram'], color='steelblue', alpha=0.7, edgecolor='black')
+    ax.axvline(data['mean'], color='red', linestyle='--', linewidth=2, label=f"Mean: {data['mean']:.1f}")
+    ax.axvline(data['median'], color='green', linestyle='--', linewidth=2, label=f"Median: {data['median']:.1f}")
+
+    ax.set_xlabel('Tenure (Months)', fontsize=12)
+    ax.set_ylabel('Number of Customers', fontsize=12)
+    ax.set_title('Distribution of Customer Tenure', fontsize=14, fontweight='bold')
+    ax.legend()  # Show legend with mean/median lines
+    ax.grid(True, alpha=0.3)  # Add light grid
+    return fig
+
+
+def _charges_distribution(data):
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # One histogram per charges column, side by side
+    for ax, panel in zip(axes, data['panels']):
+        _draw_histogram(ax, panel['histogram'], color=panel['color'], alpha=0.7, edgecolor='black')
+        ax.axvline(panel['mean'], color='red', linestyle='--', linewidth=2, label=f"Mean: ${panel['mean']:.2f}")
+        ax.set_xlabel(panel['xlabel'], fontsize=11)
+        ax.set_ylabel('Number of Customers', fontsize=11)
+        ax.set_title(panel['title'], fontsize=12, fontweight='bold')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    return fig
+
+
+def _churn_by_contract(data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Grouped bar chart (retained / churned share per contract)
+    data['percentages'].plot(kind='bar', ax=ax, color=['#2ecc71', '#e74c3c'], alpha=0.8)
+
+    ax.set_xlabel('Contract Type', fontsize=12)
+    ax.set_ylabel('Percentage (%)', fontsize=12)
+    ax.set_title('Churn Rate by Contract Type', fontsize=14, fontweight='bold')
+    ax.legend(title='Churn', labels=['No', 'Yes'])
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)  # Horizontal labels
+    ax.grid(True, alpha=0.3, axis='y')
+    return fig
+
+
+def _churn_by_tenure(data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    data['rates'].plot(kind='bar', ax=ax, color='steelblue', alpha=0.8)
+
+    ax.set_xlabel('Tenure Group', fontsize=12)
+    ax.set_ylabel('Churn Rate (%)', fontsize=12)
+    ax.set_title('Churn Rate by Customer Tenure', fontsize=14, fontweight='bold')
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels on top of bars
+    for i, v in enumerate(data['rates'].values):
+        ax.text(i, v + 1, f'{v:.1f}%', ha='center', fontsize=10, fontweight='bold')
+    return fig
+
+
+def _churn_by_payment_method(data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Rates arrive sorted by churn rate (highest first)
+    data['rates'].plot(kind='barh', ax=ax, color='coral', alpha=0.8)
+
+    ax.set_xlabel('Churn Rate (%)', fontsize=12)
+    ax.set_ylabel('Payment Method', fontsize=12)
+    ax.set_title('Churn Rate by Payment Method', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='x')
+
+    # Add value labels
+    for i, v in enumerate(data['rates'].values):
+        ax.text(v + 0.5, i, f'{v:.1f}%', va='center', fontsize=10, fontweight='bold')
+    return fig
+
+
+def _correlation_heatmap(data):
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    # Heatmap with annotations
+    sns.heatmap(
+        data['matrix'],  # Data to plot
+        annot=True,  # Show correlation values in cells
+        fmt='.2f',  # Format numbers to 2 decimal places
+        cmap='coolwarm',  # Color scheme (blue=negative, red=positive)
+        center=0,  # Center color scale at 0
+        square=True,  # Make cells square
+        linewidths=0.5,  # Lines between cells
+        cbar_kws={"shrink": 0.8},  # Colorbar settings
+        ax=ax
+    )
+
+    ax.set_title('Correlation Heatmap - Numeric Variables', fontsize=14, fontweight='bold', pad=20)
+    return fig
+
+
+# Renderer registry: spec['chart'] -> function(data) returning a figure
+RENDERERS = {
+    'churn_distribution': _churn_distribution,
+    'tenure_distribution': _tenure_distribution,
+    'charges_distribution': _charges_distribution,
+    'churn_by_contract': _churn_by_contract,
+    'churn_by_tenure': _churn_by_tenure,
+    'churn_by_payment_method': _churn_by_payment_method,
+    'correlation_heatmap': _correlation_heatmap,
+}
+
+
+# ==================== CACHE KEYS ====================
+
+# Feed any spec value into a hash (arrays and frames by content, not by identity)
+def _update_hash(h, value):
+    if isinstance(value, dict):
+        h.update(b'dict')
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _update_hash(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f'list{len(value)}'.encode())
+        for item in value:
+            _update_hash(h, item)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(type(value).__name__.encode())
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(repr(list(value.index)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(f'{value.dtype}{value.shape}'.encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        h.update(repr(value).encode())
+
+
+# Source of this module (renderers, helpers, style), hashed into every key
+_DRAWING_SOURCE = inspect.getsource(sys.modules[__name__]).encode()
+
+
+# Key of a spec rendered with the given settings
+def chart_key(spec, dpi, fmt):
+    """Return the hex digest of the spec data, the drawing code and the output settings"""
+    h = hashlib.sha256()
+    _update_hash(h, spec)
+    # The renderer and the shared drawing helpers it calls: any edit here redraws the charts
+    h.update(_DRAWING_SOURCE)
+    h.update(f'{dpi}|{fmt}|{matplotlib.__version__}|{sns.__version__}'.encode())
+    return h.hexdigest()
+
+
+# Digest of a file on disk (None if missing)
+def _file_digest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# ==================== RENDERING ====================
+
+# Draw one spec and save it (runs in a worker process)
+def render_chart(spec, path, dpi, fmt):
+    fig = RENDERERS[spec['chart']](spec['data'])
+    if spec.get('note'):
+        # Footnote on every chart of a run (e.g. drawn from a sample, not the full data)
+        fig.text(0.99, 0.005, spec['note'], ha='right', va='bottom', fontsize=8, style='italic', color='dimgray')
+    fig.tight_layout()  # Adjust spacing to prevent label cutoff
+    fig.savefig(path, dpi=dpi, format=fmt, bbox_inches='tight')
+    plt.close(fig)  # Close figure to free memory
+    return path
+
+
+# Render every spec whose output is missing or out of date
+def render_charts(specs, output_dir, dpi=DEFAULT_DPI, fmt='png', workers=None, use_cache=True):
+    """Return a list of (spec name, output path, 'rendered' | 'cached')"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, CACHE_MANIFEST)
+    manifest = {}
+    if use_cache and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    results, pending = [], []
+    for spec in specs:
+        path = os.path.join(output_dir, f"{spec['name']}.{fmt}")
+        key = chart_key(spec, dpi, fmt)
+        # Unchanged inputs and settings, and the file on disk is still the one rendered for them
+        # (a file replaced or restored from elsewhere is drawn again)
+        entry = manifest.get(os.path.basename(path), {})
+        if use_cache and entry.get('key') == key and entry.get('file') == _file_digest(path):
+            results.append((spec['name'], path, 'cached'))
+        else:
+            results.append((spec['name'], path, 'rendered'))
+            pending.append((spec, path, key))
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers > 1 and 'fork' in mp.get_all_start_methods():
+        # Forked workers inherit the style and the imported plotting libraries
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+            futures = [pool.submit(render_chart, spec, path, dpi, fmt) for spec, path, _ in pending]
+            for future in futures:
+                future.result()
+    else:
+        for spec, path, _ in pending:
+            render_chart(spec, path, dpi, fmt)
+
+    # Record the keys of the files now on disk
+    for spec, path, key in pending:
+        manifest[os.path.basename(path)] = {'key': key, 'file': _file_digest(path)}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return results
@@ -0,0 +1,174 @@
+"""
+CHURN CUBE
+Churn counts for categorical dimensions from integer codes.
+Churn is encoded once as 0/1 and every dimension once as integer codes; a single
+bincount over the combined codes fills the full cube (customers and churned per cell),
+and the churn rate by any subset of dimensions is a sum over the other axes.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For bincount / array reductions
+
+
+# Integer codes and labels of one column (missing = -1)
+def encode(series):
+    """Return (int64 codes, labels): category codes, or sorted factorization of other dtypes"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), pd.Index(series.cat.categories)
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), pd.Index(labels)
+
+
+# 0/1 target encoded once
+def encode_target(series, positive='Yes'):
+    """Return an int8 array: 1 where the target equals the positive value"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if positive not in categories:
+            return np.zeros(len(series), dtype=np.int8)
+        return (series.cat.codes.to_numpy() == categories.get_loc(positive)).astype(np.int8)
+    return (series == positive).to_numpy().astype(np.int8)
+
+
+class ChurnCube:
+    """Customers and churned customers for every combination of the given dimensions"""
+
+    def __init__(self, df, dimensions, target='Churn', positive='Yes', weights=None):
+        # weights: optional design weight per row (sampled data) - counts become population estimates
+        self.dimensions = list(dimensions)
+        self.churn = encode_target(df[target], positive)
+        self.labels = {}
+        combined = np.zeros(len(df), dtype=np.int64)
+        shape = []
+        for dim in self.dimensions:
+            codes, labels = encode(df[dim])
+            self.labels[dim] = labels
+            # Missing values get their own slot (last), so other dimensions still count those rows
+            size = len(labels) + 1
+            combined = combined * size + np.where(codes < 0, len(labels), codes)
+            shape.append(size)
+        self.shape = tuple(shape)
+        # The one pass over the rows: two bincounts over the combined codes
+        cells = int(np.prod(shape)) if shape else 1
+        churned = self.churn == 1
+        self.customers = np.bincount(combined, weights=weights, minlength=cells).reshape(self.shape)
+        self.churned = np.bincount(combined[churned], weights=None if weights is None else weights[churned],
+                                   minlength=cells).reshape(self.shape)
+
+    def counts(self, *dims):
+        """Return a DataFrame (Customers, Churned, Churn_Rate in %) by the given dimensions, empty cells dropped"""
+        axes = [self.dimensions.index(dim) for dim in dims]
+        others = tuple(i for i in range(len(self.dimensions)) if i not in axes)
+        # Marginalize the other dimensions, then put the requested axes in the requested order
+        customers = np.moveaxis(self.customers.sum(axis=others), np.argsort(np.argsort(axes)), range(len(axes)))
+        churned = np.moveaxis(self.churned.sum(axis=others), np.argsort(np.argsort(axes)), range(len(axes)))
+        # Drop the missing-value slots of the requested dimensions
+        valid = tuple(slice(0, len(self.labels[dim])) for dim in dims)
+        customers, churned = customers[valid].ravel(), churned[valid].ravel()
+        if len(dims) == 1:
+            index = self.labels[dims[0]].rename(dims[0])
+        else:
+            index = pd.MultiIndex.from_product([self.labels[dim] for dim in dims], names=list(dims))
+        table = pd.DataFrame({'Customers': customers, 'Churned': churned}, index=index)
+        table = table[table['Customers'] > 0]
+        table['Churn_Rate'] = table['Churned'] / table['Customers'] * 100
+        return table
+
+    def churn_rate(self, *dims):
+        """Return the churn rate (%) by the given dimensions as a Series"""
+        return self.counts(*dims)['Churn_Rate']
+
+
+# Churn rate, lift and size of every value of every given column, from one shared pass
+def bivariate_churn(df, columns, target='Churn', positive='Yes', weights=None):
+    """Return a table (Column, Value, Customers, Share, Churned, Churn_Rate, Lift) ranked by lift"""
+    churn = encode_target(df[target], positive).astype(bool)
+    # Optional design weights (sampled data): customers and churned become population estimates
+    row_weights = np.ones(len(df)) if weights is None else np.asarray(weights, dtype=np.float64)
+    total = row_weights.sum()
+    overall_rate = row_weights[churn].sum() / total * 100 if len(df) else np.nan
+    # Every column's codes shifted into its own range of one shared code space
+    labels, offsets, blocks = [], [], []
+    offset = 0
+    for col in columns:
+        codes, col_labels = encode(df[col])
+        # Missing values go to a per-column slot that is dropped from the table
+        blocks.append(np.where(codes < 0, len(col_labels), codes) + offset)
+        labels.append(col_labels)
+        offsets.append(offset)
+        offset += len(col_labels) + 1
+    if not blocks:
+        return pd.DataFrame(columns=['Column', 'Value', 'Customers', 'Share', 'Churned', 'Churn_Rate', 'Lift'])
+    codes = np.column_stack(blocks)  # rows × columns
+    # One bincount for customers and one for churned customers over all columns at once
+    customers = np.bincount(codes.ravel(), weights=None if weights is None else np.repeat(row_weights, len(columns)),
+                            minlength=offset)
+    churned = np.bincount(codes[churn].ravel(),
+                          weights=None if weights is None else np.repeat(row_weights[churn], len(columns)),
+                          minlength=offset)
+
+    slots = np.concatenate([np.arange(start, start + len(col_labels)) for start, col_labels in zip(offsets, labels)])
+    table = pd.DataFrame({
+        'Column': np.repeat(list(columns), [len(col_labels) for col_labels in labels]),
+        'Value': np.concatenate([np.asarray(col_labels, dtype=object) for col_labels in labels]),
+        'Customers': customers[slots],
+        'Churned': churned[slots],
+    })
+    table = table[table['Customers'] > 0]
+    table.insert(3, 'Share', table['Customers'] / total * 100)
+    table['Churn_Rate'] = table['Churned'] / table['Customers'] * 100
+    table['Lift'] = table['Churn_Rate'] / overall_rate
+    return table.sort_values(['Lift', 'Customers'], ascending=[False, False], kind='stable').reset_index(drop=True)
+
+
+# Integer codes of any column for counting: values of low-cardinality columns, quantile bins of numerics
+def discretize(series, bins=10):
+    """Return (int64 codes with missing = -1, number of codes, 'categorical' | 'binned')"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.astype('int64').where(series.notna())
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) \
+            and series.nunique() > bins:
+        # Quantile edges computed once; each value falls in one right-closed bin
+        values = series.to_numpy(dtype=np.float64)
+        edges = np.unique(np.nanquantile(values, np.linspace(0, 1, bins + 1)))
+        codes = np.clip(np.searchsorted(edges, values, side='left') - 1, 0, len(edges) - 2)
+        return np.where(np.isnan(values), -1, codes).astype(np.int64), len(edges) - 1, 'binned'
+    codes, labels = encode(series)
+    return codes, len(labels), 'categorical'
+
+
+# Mutual information of every column with the target, from one shared joint bincount
+def mutual_information(df, columns, target='Churn', positive='Yes', bins=10):
+    """Return a table (Feature, Kind, Bins, MI_Bits, MI_Normalized) ranked by mutual information"""
+    churn = encode_target(df[target], positive).astype(np.int64)
+    n = len(df)
+    kinds, sizes, blocks = [], [], []
+    offset = 0
+    for col in columns:
+        codes, size, kind = discretize(df[col], bins)
+        # Missing values are a bin of their own (missingness can carry information too)
+        blocks.append((np.where(codes < 0, size, codes) + offset) * 2 + churn)
+        kinds.append(kind)
+        sizes.append(size + 1)
+        offset += size + 1
+    if not blocks:
+        return pd.DataFrame(columns=['Feature', 'Kind', 'Bins', 'MI_Bits', 'MI_Normalized'])
+    # Joint (feature value, churn) counts of every column in one bincount
+    joint = np.bincount(np.concatenate(blocks), minlength=offset * 2).reshape(offset, 2) / n
+    owner = np.repeat(np.arange(len(columns)), sizes)
+    p_value = joint.sum(axis=1, keepdims=True)
+    p_churn = np.bincount(churn, minlength=2) / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(joint > 0, joint * np.log2(joint / (p_value * p_churn)), 0.0)
+    mi = np.bincount(owner, weights=terms.sum(axis=1), minlength=len(columns))
+    # Normalized by the target entropy: share of the churn uncertainty the feature explains
+    entropy = -(p_churn[p_churn > 0] * np.log2(p_churn[p_churn > 0])).sum()
+    table = pd.DataFrame({
+        'Feature': list(columns),
+        'Kind': kinds,
+        'Bins': np.bincount(owner, weights=(joint.sum(axis=1) > 0), minlength=len(columns)).astype(np.int64),
+        'MI_Bits': mi,
+        'MI_Normalized': mi / entropy if entropy > 0 else 0.0,
+    })
+    return table.sort_values('MI_Bits', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,934 @@
+"""
+CLEANING RULES
+Declarative cleaning rules for data_cleaning.py.
+The rules are planned into one ordered list of operations per column and executed
+in a single pass: each column is read once, runs all of its operations, and is
+written back once. Every report figure comes from counters gathered during that pass, and every changed
+cell is recorded in a sparse change log (the audit trail - no copy of the input is kept).
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For numerical operations
+import fnmatch  # For column-name patterns in rule selectors
+import os  # For the CPU count
+import multiprocessing as mp  # For the worker pool start method
+from concurrent.futures import ProcessPoolExecutor  # For the worker pool
+from duplicate_detection import DuplicateTracker  # Mergeable duplicate counts
+from data_schema import parse_dates_cached  # Date parsing once per distinct value
+from outlier_detection import (block_quantiles, iqr_bounds, iqr_mask, mad_mask,
+                               IsolationForest)  # Vectorized outlier methods
+
+# The cleaning rules, in step order. Column selectors:
+#   a list of names, '*' (every input column), 'text' / 'numeric' (by dtype at that point
+#   of the plan), or a name pattern such as '*Date*'
+CLEANING_RULES = [
+    {'step': 1, 'op': 'coerce_numeric', 'columns': ['TotalCharges'],
+     # Blank TotalCharges for tenure=0 customers: not billed yet, so the total is 0
+     'fill_value': 0.0, 'fill_when_zero': 'tenure'},
+    {'step': 2, 'op': 'handle_missing', 'columns': '*',
+     'keep_missing': ['LastContactDate'],  # Missing = no recent contact (valid business state)
+     'fill_zero': ['TotalCharges'],  # Any remaining gaps are filled with 0 (conservative)
+     'review_threshold_pct': 5,  # Above this rate columns are flagged, not filled
+     # Imputation engine: column -> method, takes precedence over the fixed rules above
+     # (none by default - opt in per column, e.g. from IMPUTATION_METHODS with --impute)
+     'impute': {}},
+    {'step': 3, 'op': 'parse_dates', 'columns': '*Date*',
+     'skip_future_check': ['LastContactDate']},
+    {'step': 4, 'op': 'normalize_text', 'columns': 'text', 'exclude': ['customerID'],
+     'strip': True,  # Remove leading/trailing whitespace
+     'casing': 'most_frequent',  # Case variants ('yes', 'YES') take the column's most common spelling
+     'synonyms': {}},  # column (or '*') -> {value: canonical value}, e.g. {'*': SERVICE_SYNONYMS}
+    # Outliers are flagged, never changed. One pass over the whole numeric block:
+    #   iqr       - outside Q1 - k×IQR / Q3 + k×IQR (always counted for the report);
+    #               skip_zero_spread leaves columns with IQR = 0 (e.g. 0/1 flags) unflagged
+    #   mad       - robust z-score |0.6745 × (x - median) / MAD| above mad_threshold
+    #   isolation - isolation-forest-style row score, written to isolation['column']
+    {'step': 5, 'op': 'outliers', 'columns': 'numeric', 'methods': ['iqr'],
+     'multiplier': 1.5, 'skip_zero_spread': False, 'mad_threshold': 3.5,
+     'isolation': {'column': 'Outlier_Score', 'threshold': 0.6, 'trees': 100, 'sample_size': 256,
+                   'sample_every': 16, 'seed': 0}},  # Forest grown on every 16th row (by row hash)
+    # Flags: 'changed' = cells the given operation set to a value (from the change log),
+    #        'missing' = cells still missing after cleaning
+    {'step': 6, 'op': 'flag', 'flag': 'TotalCharges_Imputed', 'source': 'TotalCharges', 'kind': 'changed',
+     'by': 'coerce_numeric'},
+    {'step': 6, 'op': 'flag', 'flag': 'No_Recent_Contact', 'source': 'LastContactDate', 'kind': 'missing'},
+    # 'bitmask' = one bit per column the operation may fill (bit order = column order)
+    {'step': 6, 'op': 'flag', 'flag': 'Imputed_Columns', 'kind': 'bitmask', 'by': 'handle_missing'},
+    {'step': 6, 'op': 'flag', 'flag': 'Outlier_Columns', 'kind': 'bitmask', 'by': 'outliers'},
+    {'step': 7, 'op': 'validate', 'columns': ['tenure'], 'check': ('>=', 0)},  # Should be >= 0
+    {'step': 7, 'op': 'validate', 'columns': ['MonthlyCharges'], 'check': ('>', 0)},  # Should be > 0
+    {'step': 7, 'op': 'validate', 'columns': ['TotalCharges'], 'check': ('>=', 0)},  # Should be >= 0
+    {'step': 7, 'op': 'unique', 'columns': ['customerID']},
+]
+
+# Optional imputation methods (not applied by default - see with_imputation()):
+#   group_median - median of the column's group, e.g. by Contract × InternetService
+#   ffill        - last observed value in order_by order (optionally within 'by' groups),
+#                  e.g. {'method': 'ffill', 'order_by': 'RegistrationDate', 'by': ['City']}
+#   model        - least-squares fit on predictors (a tuple is a product of columns)
+IMPUTATION_METHODS = {
+    'MonthlyCharges': {'method': 'group_median', 'by': ['Contract', 'InternetService']},
+    'TotalCharges': {'method': 'model', 'predictors': [('tenure', 'MonthlyCharges')], 'decimals': 2},
+}
+
+# Optional synonym map: collapse the 'No ... service' placeholders into plain 'No'
+# (not applied by default - the consistency rules and features rely on the placeholders)
+SERVICE_SYNONYMS = {'No internet service': 'No', 'No phone service': 'No'}
+
+# How each operation changes a column's dtype (used while planning selectors)
+DTYPE_AFTER = {'coerce_numeric': 'float64', 'parse_dates': 'datetime64[ns]'}
+
+# Bits per bitmask flag column (a uint64); wider bitmasks spill into numbered columns
+WORD_BITS = 64
+
+# Report wording of the validation checks: operator -> (pass text, failure text)
+CHECK_MESSAGES = {
+    '>=': ("All values >= {limit}", "{count} negative values"),
+    '>': ("All values > {limit}", "{count} values <= {limit}"),
+}
+
+
+# ==================== PLANNING ====================
+
+# Resolve a rule's column selector against the planned dtypes
+def _select(selector, planned_dtypes, exclude=()):
+    if isinstance(selector, list):
+        columns = [col for col in selector if col in planned_dtypes]
+    elif selector == '*':
+        columns = list(planned_dtypes)
+    elif selector == 'text':
+        # Plain strings or schema-loaded categories
+        columns = [col for col, dtype in planned_dtypes.items() if dtype in ('object', 'category')]
+    elif selector == 'numeric':
+        columns = [col for col, dtype in planned_dtypes.items()
+                   if dtype.startswith(('int', 'float', 'uint'))]
+    else:
+        columns = [col for col in planned_dtypes if fnmatch.fnmatchcase(col, selector)]
+    return [col for col in columns if col not in exclude]
+
+
+# Opt columns into their configured imputation method
+def with_imputation(rules, columns, methods=IMPUTATION_METHODS):
+    """Return a copy of the rules whose missing-value step imputes the given columns"""
+    return [dict(rule, impute={**rule.get('impute', {}), **{col: methods[col] for col in columns}})
+            if rule['op'] == 'handle_missing' else rule for rule in rules]
+
+
+# Rule set with options of one operation overridden
+def with_options(rules, op, **options):
+    """Return a copy of the rules whose 'op' steps use the given options"""
+    return [dict(rule, **options) if rule['op'] == op else rule for rule in rules]
+
+
+# Turn the rule list into one ordered operation list per column
+def plan_cleaning(dtypes, rules=CLEANING_RULES):
+    """Return (column -> [rules], list of flag rules) for a frame with the given dtypes"""
+    planned_dtypes = {col: str(dtype) for col, dtype in dtypes.items()}
+    column_ops = {col: [] for col in planned_dtypes}
+    flags = []
+    for rule in sorted(rules, key=lambda r: r['step']):
+        if rule['op'] == 'flag':
+            flags.append(rule)
+            continue
+        for col in _select(rule['columns'], planned_dtypes, rule.get('exclude', ())):
+            column_ops[col].append(rule)
+            # Later selectors see the dtype this operation produces
+            planned_dtypes[col] = DTYPE_AFTER.get(rule['op'], planned_dtypes[col])
+    return column_ops, flags
+
+
+# Columns the operations read besides their own (fill conditions, imputation groups, predictors)
+def _lookup_columns(rules):
+    columns = []
+    for rule in rules:
+        if rule.get('fill_when_zero'):
+            columns.append(rule['fill_when_zero'])
+        for spec in rule.get('impute', {}).values():
+            columns.extend(spec.get('by', []))
+            if spec.get('order_by'):
+                columns.append(spec['order_by'])
+            for term in spec.get('predictors', []):
+                columns.extend(term if isinstance(term, tuple) else (term,))
+    return list(dict.fromkeys(columns))
+
+
+# ==================== GLOBAL STATISTICS ====================
+# Some operations need statistics of the whole column (missing rate, median, quartiles,
+# value counts). They ask the context for them; each partition contributes a partial
+# statistic and the reducers below merge the partials exactly.
+
+def _merge_counts(parts):
+    # Sum of per-value counts, in first-appearance order
+    return pd.concat(parts).groupby(level=0, sort=False, observed=True).sum()
+
+
+def _mode(parts):
+    # Same value as Series.mode()[0]: most frequent, smallest value on ties
+    counts = _merge_counts(parts)
+    return sorted(counts.index[counts == counts.max()])[0]
+
+
+def _group_medians(parts):
+    # Observed rows: group key columns + the value column (last)
+    observed = pd.concat(parts)
+    by, value = list(observed.columns[:-1]), observed.columns[-1]
+    return observed.groupby(by, observed=True)[value].median().rename('_fill').reset_index(), observed[value].median()
+
+
+def _least_squares(parts):
+    # Complete rows: design matrix columns + the target (last)
+    data = np.concatenate(parts)
+    return np.linalg.lstsq(data[:, :-1], data[:, -1], rcond=None)[0]
+
+
+def _isolation_forest(parts):
+    # Parts: (forest options, sampled rows); the forest is grown once on the pooled sample
+    options = parts[0][0]
+    return IsolationForest(options['trees'], options['sample_size'], options['seed']).fit(
+        np.concatenate([part[1] for part in parts]))
+
+
+REDUCERS = {
+    'missing': lambda parts: (sum(part[0] for part in parts), sum(part[1] for part in parts)),
+    'median': lambda parts: pd.Series(np.concatenate(parts)).median(),
+    'mode': _mode,
+    'value_counts': _merge_counts,
+    # Numeric block statistics: min, Q1, median, Q3, max from one sort; MAD of the deviations
+    'block_quantiles': lambda parts: block_quantiles(np.concatenate(parts), [0, 0.25, 0.5, 0.75, 1]),
+    'mad': lambda parts: block_quantiles(np.concatenate(parts), [0.5])[0],
+    'isolation': _isolation_forest,
+    'group_median': _group_medians,
+    'observed': pd.concat,
+    'least_squares': _least_squares,
+}
+
+
+class _Deferred(Exception):
+    """Raised when a column needs a global statistic that is not known yet"""
+
+
+# ==================== OPERATIONS ====================
+# Each operation takes (series, rule, context), records counters and returns the new series
+
+def _coerce_numeric(series, rule, ctx):
+    counters = ctx.counter(1, series.name)
+    counters['original_dtype'] = str(series.dtype)
+    numeric = pd.to_numeric(series, errors='coerce')
+    invalid_mask = numeric.isna() & series.notna()
+    counters['invalid'] = int(invalid_mask.sum())
+    # Business rule: invalid values of tenure=0 customers become the fill value
+    zero_mask = invalid_mask & (ctx.lookup[rule['fill_when_zero']] == 0)
+    counters['zero_tenure'] = int(zero_mask.sum())
+    if counters['invalid'] > 0:
+        numeric = numeric.mask(zero_mask, rule['fill_value'])
+        ctx.changes.record(rule, series, numeric, invalid_mask.to_numpy())
+    counters['new_dtype'] = str(numeric.dtype)
+    return numeric
+
+
+# ---- Imputation methods: (series, method spec, context) -> (filled series, counter fields) ----
+
+def _impute_group_median(series, spec, ctx):
+    missing = series.isna().to_numpy()
+    keys = pd.DataFrame({col: ctx.lookup[col] for col in spec['by']}, index=series.index)
+    medians, overall = ctx.param(series.name, 'group_median',
+                                 lambda: keys[~missing].assign(_value=series.to_numpy()[~missing]))
+    # Precomputed group table joined onto the missing rows; unknown groups take the overall median
+    fill = keys[missing].merge(medians, how='left', on=spec['by'])['_fill'].to_numpy()
+    fill = np.where(np.isnan(fill), overall, fill)
+    filled = series.copy()
+    filled[missing] = fill
+    return filled, {'groups': len(medians), 'fill_value': overall}
+
+
+def _impute_ffill(series, spec, ctx):
+    missing = series.isna().to_numpy()
+    order = ctx.lookup[spec['order_by']]
+    if not pd.api.types.is_datetime64_any_dtype(order):
+        order, _ = parse_dates_cached(order)
+    by = list(spec.get('by', []))
+    frame = pd.DataFrame({**{col: ctx.lookup[col] for col in by}, '_order': order,
+                          '_row': series.index, '_value': series}, index=series.index)
+    observed = ctx.param(series.name, 'observed', lambda: frame[~missing])
+    # Observed + missing rows in time order (row position breaks ties); one vectorized ffill
+    timeline = pd.concat([observed, frame[missing]]).sort_values(['_order', '_row'], kind='stable',
+                                                                 na_position='last')
+    values = timeline.groupby(by, observed=True, sort=False)['_value'].ffill() if by else timeline['_value'].ffill()
+    filled = series.copy()
+    filled[missing] = values.reindex(series.index[missing]).to_numpy()
+    return filled, {}
+
+
+# Design matrix of a model spec: intercept + one column per predictor (tuple = product)
+def _design_matrix(spec, ctx, rows):
+    columns = [np.ones(rows)]
+    for term in spec['predictors']:
+        product = np.ones(rows)
+        for col in (term if isinstance(term, tuple) else (term,)):
+            product = product * pd.to_numeric(ctx.lookup[col], errors='coerce').to_numpy(dtype=np.float64)
+        columns.append(product)
+    return np.column_stack(columns)
+
+
+def _impute_model(series, spec, ctx):
+    target = series.to_numpy(dtype=np.float64)
+    design = _design_matrix(spec, ctx, len(series))
+    usable = np.isfinite(design).all(axis=1)
+    complete = usable & ~np.isnan(target)
+    coefficients = ctx.param(series.name, 'least_squares',
+                             lambda: np.column_stack([design[complete], target[complete]]))
+    # Rows with a missing predictor stay missing
+    rows = np.isnan(target) & usable
+    filled = series.copy()
+    filled[rows] = np.round(design[rows] @ coefficients, spec.get('decimals', 6))
+    return filled, {'coefficients': coefficients}
+
+
+IMPUTERS = {
+    'group_median': _impute_group_median,
+    'ffill': _impute_ffill,
+    'model': _impute_model,
+}
+
+
+def _handle_missing(series, rule, ctx):
+    col = series.name
+    missing_mask = series.isna()
+    missing = int(missing_mask.sum())
+    ctx.missing_before[col] = missing
+    ctx.missing_after[col] = missing
+    total_missing, total_rows = ctx.param(col, 'missing', lambda: (missing, len(series)))
+    if total_missing == 0:
+        return series
+    counters = ctx.counter(2, col)
+    counters['missing'] = missing
+    spec = rule.get('impute', {}).get(col)
+    if spec is not None:
+        # Configured imputation method (vectorized; whole-column statistics via the context)
+        counters['action'], counters['spec'] = spec['method'], spec
+        filled, details = IMPUTERS[spec['method']](series, spec, ctx)
+        counters.update(details)
+        counters['unfilled'] = int(filled.isna().sum())
+        ctx.changes.record(rule, series, filled, (missing_mask & filled.notna()).to_numpy())
+        ctx.missing_after[col] = counters['unfilled']
+        return filled
+    if col in rule['fill_zero']:
+        counters['action'], fill_value = 'fill_zero', 0
+    elif col in rule['keep_missing']:
+        counters['action'] = 'keep'
+        return series
+    elif total_missing / total_rows * 100 < rule['review_threshold_pct']:
+        if series.dtype in ['int64', 'float64']:
+            # Numeric: median (robust to outliers)
+            counters['action'] = 'median'
+            fill_value = ctx.param(col, 'median', lambda: series.dropna().to_numpy())
+        else:
+            # Categorical: mode (most common value)
+            counters['action'] = 'mode'
+            fill_value = ctx.param(col, 'mode', lambda: series.value_counts(sort=False))
+        counters['fill_value'] = fill_value
+    else:
+        counters['action'] = 'review'
+        return series
+    filled = series.fillna(fill_value)
+    ctx.changes.record(rule, series, filled, missing_mask.to_numpy())
+    ctx.missing_after[col] = int(filled.isna().sum())
+    return filled
+
+
+def _parse_dates(series, rule, ctx):
+    counters = ctx.counter(3, series.name)
+    counters['original_dtype'] = str(series.dtype)
+    # ISO format, parsed once per distinct string; rows that failed are kept for the report
+    parsed, failed = parse_dates_cached(series)
+    counters['new_dtype'] = str(parsed.dtype)
+    counters['invalid'] = int(parsed.isna().sum())
+    counters['failed_rows'] = np.flatnonzero(failed)
+    if series.name not in rule['skip_future_check']:
+        # Only count future dates when the maximum shows there are any
+        if parsed.max() > ctx.now:
+            counters['future'] = int((parsed > ctx.now).sum())
+    return parsed
+
+
+# Normalized spelling of every distinct value, from the column's (global) value counts
+def _normalized_values(counts, rule, column):
+    values = pd.Series(np.asarray(counts.index, dtype=object))
+    if rule.get('strip'):
+        values = values.map(lambda value: value.strip() if isinstance(value, str) else value)
+    synonyms = {**rule['synonyms'].get('*', {}), **rule['synonyms'].get(column, {})}
+    if synonyms:
+        values = values.replace(synonyms)
+    if rule.get('casing') == 'most_frequent':
+        # Every case variant takes the spelling carried by the most rows
+        keys = values.map(lambda value: value.lower() if isinstance(value, str) else value)
+        weights = pd.DataFrame({'key': keys, 'value': values, 'count': counts.to_numpy()})
+        spelling = weights.groupby(['key', 'value'], sort=False)['count'].sum().reset_index()
+        spelling = spelling.sort_values('count', ascending=False, kind='stable').drop_duplicates('key')
+        values = weights['key'].map(spelling.set_index('key')['value'])
+    return values.to_numpy()
+
+
+def _normalize_text(series, rule, ctx):
+    counters = ctx.counter(4, series.name)
+    # Work on the distinct values only: category codes, or a factorization of plain text
+    is_category = isinstance(series.dtype, pd.CategoricalDtype)
+    if is_category:
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    local_counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)),
+                             index=pd.Index(uniques, dtype=object))
+    counts = ctx.param(series.name, 'value_counts', lambda: local_counts)
+    values = _normalized_values(counts, rule, series.name)
+    changed_values = (values != np.asarray(counts.index, dtype=object)) & (counts.to_numpy() > 0)
+    if not changed_values.any():
+        return series
+    # Map the codes onto the normalized distinct values (no per-row string work)
+    new_codes, new_uniques = pd.factorize(values)
+    if is_category:
+        # Every partition shares the categories, so the codes index the global table directly
+        row_codes = np.where(codes >= 0, new_codes[np.maximum(codes, 0)], -1)
+        normalized = pd.Series(pd.Categorical.from_codes(row_codes, categories=new_uniques),
+                               index=series.index, name=series.name)
+        row_changed = changed_values[np.maximum(codes, 0)] & (codes >= 0)
+    else:
+        mapping = dict(zip(counts.index, values))
+        local_values = np.array([mapping[value] for value in uniques], dtype=object)
+        normalized = pd.Series(np.where(codes >= 0, local_values[np.maximum(codes, 0)], np.nan),
+                               index=series.index, name=series.name, dtype=object)
+        row_changed = (local_values != np.asarray(uniques, dtype=object))[np.maximum(codes, 0)] & (codes >= 0)
+    counters['unique_before'] = int((counts.to_numpy() > 0).sum())
+    counters['unique_after'] = len(np.unique(new_codes[counts.to_numpy() > 0]))
+    ctx.changes.record(rule, series, normalized, row_changed)
+    return normalized
+
+
+def _validate(series, rule, ctx):
+    operator, limit = rule['check']
+    failing = series < limit if operator == '>=' else series <= limit
+    ctx.counter(7, series.name).update({'operator': operator, 'limit': limit, 'failing': int(failing.sum())})
+    return series
+
+
+def _unique(series, rule, ctx):
+    # Fingerprint tracker, so duplicates across partitions are found when counters merge
+    ctx.counter(7, series.name)['tracker'] = DuplicateTracker().update(pd.util.hash_array(series.to_numpy()))
+    return series
+
+
+OPERATIONS = {
+    'coerce_numeric': _coerce_numeric,
+    'handle_missing': _handle_missing,
+    'parse_dates': _parse_dates,
+    'normalize_text': _normalize_text,
+    'validate': _validate,
+    'unique': _unique,
+}
+
+
+# ---- Block operations: (frame, columns, rule, context), run once over all their columns ----
+
+def _outliers(df, columns, rule, ctx):
+    # One float64 copy of the numeric block (no filtered DataFrame copies)
+    block = df[columns].to_numpy(dtype=np.float64)
+    key = tuple(columns)
+    low, q1, median, q3, high = ctx.param(key, 'block_quantiles', lambda: block)
+    lower, upper = iqr_bounds(q1, q3, rule['multiplier'])
+    iqr_flags = iqr_mask(block, lower, upper, rule.get('skip_zero_spread', False))
+    flagged = iqr_flags if 'iqr' in rule['methods'] else np.zeros(block.shape, dtype=bool)
+    if 'mad' in rule['methods']:
+        mads = ctx.param(key, 'mad', lambda: np.abs(block - median))
+        mad_flags = mad_mask(block, median, mads, rule['mad_threshold'])
+        flagged = flagged | mad_flags
+    if 'isolation' in rule['methods']:
+        options = rule['isolation']
+        # Sample rows chosen by a hash of the row label, so every partition picks the same rows
+        sampled = pd.util.hash_array(df.index.to_numpy()) % options['sample_every'] == 0
+        forest = ctx.param(key, 'isolation', lambda: (options, block[sampled]))
+
+    for i, col in enumerate(columns):
+        counters = ctx.counter(5, col)
+        counters.update({'outliers': int(iqr_flags[:, i].sum()), 'lower': lower[i], 'upper': upper[i],
+                         'min': low[i], 'max': high[i]})
+        if 'mad' in rule['methods']:
+            counters.update({'mad_outliers': int(mad_flags[:, i].sum()), 'mad': mads[i],
+                             'mad_threshold': rule['mad_threshold']})
+        # Rows the enabled per-column methods flagged (read by bitmask flags)
+        ctx.marks[('outliers', col)] = np.flatnonzero(flagged[:, i])
+    if 'isolation' in rule['methods']:
+        scores = forest.score(block)
+        df[options['column']] = scores
+        ctx.counter(5, options['column']).update({'method': 'isolation', 'trees': options['trees'],
+                                                  'threshold': options['threshold'],
+                                                  'outliers': int((scores > options['threshold']).sum())})
+
+
+BLOCK_OPERATIONS = {
+    'outliers': _outliers,
+}
+
+
+# ==================== EXECUTION ====================
+
+# Column holding a bitmask flag's bits 64×word ... 64×word + 63
+def bitmask_column(flag, word):
+    return flag if word == 0 else f"{flag}_{word + 1}"
+
+
+class ChangeLog:
+    """Sparse cell-level log: only the (row, column, old, new) entries a rule changed"""
+
+    def __init__(self):
+        self.entries = []  # One entry per (rule, column): row positions + old/new values
+
+    def record(self, rule, before, after, mask):
+        """Log the cells of one column where mask is True"""
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return
+        self.entries.append({'step': rule['step'], 'op': rule['op'], 'column': before.name, 'rows': rows,
+                             'old': before.to_numpy(dtype=object)[rows],
+                             'new': after.to_numpy(dtype=object)[rows]})
+
+    def rows(self, column, op=None, assigned_only=False):
+        """Row positions changed in a column (optionally by one operation, to a non-missing value)"""
+        found = [entry['rows'][pd.notna(entry['new'])] if assigned_only else entry['rows']
+                 for entry in self.entries if entry['column'] == column and op in (None, entry['op'])]
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def merge(self, other, offset=0):
+        """Append another partition's log (its rows shifted by offset)"""
+        for entry in other.entries:
+            entry = dict(entry, rows=entry['rows'] + offset)
+            same = [mine for mine in self.entries
+                    if (mine['step'], mine['op'], mine['column']) == (entry['step'], entry['op'], entry['column'])]
+            if same:
+                for key in ('rows', 'old', 'new'):
+                    same[0][key] = np.concatenate([same[0][key], entry[key]])
+            else:
+                self.entries.append(entry)
+        return self
+
+    def __len__(self):
+        return sum(len(entry['rows']) for entry in self.entries)
+
+    def to_frame(self, ids=None):
+        """Return the log as an audit table (one row per changed cell)"""
+        columns = ['Row', 'customerID', 'Column', 'Step', 'Operation', 'Old_Value', 'New_Value']
+        if not self.entries:
+            return pd.DataFrame(columns=columns)
+        rows = np.concatenate([entry['rows'] for entry in self.entries])
+        audit = pd.DataFrame({
+            'Row': rows,
+            'customerID': ids[rows] if ids is not None else rows,
+            'Column': np.repeat([entry['column'] for entry in self.entries],
+                                [len(entry['rows']) for entry in self.entries]),
+            'Step': np.repeat([entry['step'] for entry in self.entries],
+                              [len(entry['rows']) for entry in self.entries]),
+            'Operation': np.repeat([entry['op'] for entry in self.entries],
+                                   [len(entry['rows']) for entry in self.entries]),
+            'Old_Value': np.concatenate([entry['old'] for entry in self.entries]),
+            'New_Value': np.concatenate([entry['new'] for entry in self.entries]),
+        })
+        return audit.sort_values(['Row', 'Step'], kind='stable').reset_index(drop=True)
+
+
+class CleaningContext:
+    """State shared by the operations of one cleaning pass (over the whole frame or one partition)"""
+
+    def __init__(self, df, params=None, now=None, immediate=True, lookup_columns=()):
+        # Input columns other rules look up (references taken before any column is replaced);
+        # only these stay alive for the whole pass
+        self.lookup = {col: df[col] for col in lookup_columns if col in df.columns}
+        self.now = now if now is not None else pd.Timestamp.now()
+        self.params = {} if params is None else params  # (column, statistic) -> global value
+        self.immediate = immediate  # True: this pass sees the whole column, reduce on the spot
+        self.collected = {}  # (column, statistic) -> partial statistic of this partition
+        self.rows = len(df)
+        self.counters = {}  # step -> column -> counter dict
+        self.changes = ChangeLog()  # Every cell a rule changed
+        self.marks = {}  # (operation, column) -> row positions the operation flagged without changing
+        self.missing_before = {}
+        self.missing_after = {}
+
+    def counter(self, step, column):
+        return self.counters.setdefault(step, {}).setdefault(column, {})
+
+    def param(self, column, name, partial):
+        """Global statistic of a column; partitions contribute partial() and defer until it is known"""
+        key = (column, name)
+        if key not in self.params:
+            if not self.immediate:
+                self.collected[key] = partial()
+                raise _Deferred(key)
+            self.params[key] = REDUCERS[name]([partial()])
+        return self.params[key]
+
+
+# Run the planned operations on one frame (the whole dataset or one partition)
+def _clean_frame(df, rules, params=None, now=None, immediate=True):
+    ctx = CleaningContext(df, params, now, immediate, _lookup_columns(rules))
+    column_ops, flags = plan_cleaning(df.dtypes, rules)
+    deferred = False
+    for col in list(df.columns):
+        series = df[col]
+        try:
+            for rule in column_ops[col]:
+                if rule['op'] in BLOCK_OPERATIONS:
+                    continue  # Runs once over all its columns below
+                series = OPERATIONS[rule['op']](series, rule, ctx)
+        except _Deferred:
+            # Keep going: the other columns may contribute their statistics in the same round
+            deferred = True
+            continue
+        # Replacing the column drops the frame's reference to the old one; it is freed unless a rule
+        # looks it up (ctx.lookup) or it shares a consolidated block with columns not yet replaced
+        df[col] = series
+    if deferred:
+        return None, ctx
+
+    # Block operations see every column after its own steps
+    block_rules = list({id(rule): rule for ops in column_ops.values() for rule in ops
+                        if rule['op'] in BLOCK_OPERATIONS}.values())
+    for rule in sorted(block_rules, key=lambda r: r['step']):
+        columns = [col for col, ops in column_ops.items() if any(op is rule for op in ops)]
+        try:
+            BLOCK_OPERATIONS[rule['op']](df, columns, rule, ctx)
+        except _Deferred:
+            deferred = True
+    if deferred:
+        return None, ctx
+
+    # Quality flags are derived from what the pass recorded
+    for rule in flags:
+        if rule['kind'] == 'bitmask':
+            # One bit per column the operation may fill. A flag column holds 64 bits; wider inputs
+            # spill into <flag>_2, <flag>_3, ... (each in the smallest unsigned dtype that fits)
+            bits = [col for col, ops in column_ops.items() if any(op['op'] == rule['by'] for op in ops)]
+            flagged = np.zeros(len(df), dtype=bool)
+            for word, start in enumerate(range(0, max(len(bits), 1), WORD_BITS)):
+                word_bits = bits[start:start + WORD_BITS]
+                dtype = next(dt for dt in (np.uint8, np.uint16, np.uint32, np.uint64)
+                             if np.iinfo(dt).bits >= len(word_bits))
+                mask = np.zeros(len(df), dtype=dtype)
+                for bit, col in enumerate(word_bits):
+                    # Rows the operation flagged, or else the cells it filled (from the change log)
+                    rows = ctx.marks.get((rule['by'], col))
+                    if rows is None:
+                        rows = ctx.changes.rows(col, rule['by'], assigned_only=True)
+                    mask[rows] |= dtype(1 << bit)
+                df[bitmask_column(rule['flag'], word)] = mask
+                flagged |= mask != 0
+            counters = ctx.counter(6, rule['flag'])
+            counters['flagged'] = int(flagged.sum())
+            counters['bits'] = {col: bit for bit, col in enumerate(bits)}
+            continue
+        if rule['kind'] == 'changed':
+            mask = np.zeros(len(df), dtype=bool)
+            mask[ctx.changes.rows(rule['source'], rule['by'], assigned_only=True)] = True
+        else:
+            mask = df[rule['source']].isna().to_numpy()
+        df[rule['flag']] = mask
+        ctx.counter(6, rule['flag'])['flagged'] = int(mask.sum())
+    return df, ctx
+
+
+# Counter fields that add up across partitions (everything else is the same in every partition)
+SUMMED_COUNTERS = {'invalid', 'zero_tenure', 'missing', 'unfilled', 'future', 'outliers', 'mad_outliers',
+                   'failing', 'flagged'}
+
+
+# Merge the contexts of all partitions into one (a single context is just finalized)
+def merge_contexts(contexts, columns):
+    """Return one CleaningContext with the summed counters and change log of all partitions"""
+    merged = CleaningContext(pd.DataFrame(), params=contexts[0].params, now=contexts[0].now)
+    offset = 0
+    for ctx in contexts:
+        for step, step_counters in ctx.counters.items():
+            for col, counters in step_counters.items():
+                target = merged.counter(step, col)
+                for key, value in counters.items():
+                    if key in SUMMED_COUNTERS:
+                        target[key] = target.get(key, 0) + value
+                    elif key == 'failed_rows':
+                        target[key] = np.concatenate([target.get(key, np.empty(0, dtype=np.int64)), value + offset])
+                    elif key == 'tracker':
+                        target[key] = value if key not in target else target[key].merge(value)
+                    else:
+                        target.setdefault(key, value)
+        for name in ('missing_before', 'missing_after'):
+            for col, value in getattr(ctx, name).items():
+                getattr(merged, name)[col] = getattr(merged, name).get(col, 0) + value
+        merged.changes.merge(ctx.changes, offset)
+        offset += ctx.rows
+    merged.rows = offset
+
+    # Figures that need the totals: percentages, duplicates; drop zero-count entries
+    for col, counters in merged.counters.get(2, {}).items():
+        counters['missing_pct'] = counters['missing'] / merged.rows * 100
+    for col, counters in list(merged.counters.get(5, {}).items()):
+        if counters['outliers'] == 0 and counters.get('mad_outliers', 0) == 0 and 'method' not in counters:
+            del merged.counters[5][col]
+        else:
+            counters['outlier_pct'] = counters['outliers'] / merged.rows * 100
+    for counters in merged.counters.get(7, {}).values():
+        if 'tracker' in counters:
+            counters['duplicates'] = counters.pop('tracker').duplicates
+    # Entries and change-log groups in column order (as a serial pass produces them)
+    position = {col: i for i, col in enumerate(columns)}
+    for step in merged.counters:
+        merged.counters[step] = dict(sorted(merged.counters[step].items(), key=lambda item: position[item[0]]))
+    merged.changes.entries.sort(key=lambda entry: (position[entry['column']], entry['step']))
+    return merged
+
+
+# Run every planned operation, column by column
+def run_cleaning(df, rules=CLEANING_RULES):
+    """Clean df in place and return (df, CleaningContext with report counters and change log)"""
+    df, ctx = _clean_frame(df, rules)
+    return df, merge_contexts([ctx], df.columns)
+
+
+# ==================== PARTITIONED EXECUTION ====================
+
+# Input frame of the partition workers (inherited by the forked processes, never pickled)
+_PARTITION_SOURCE = None
+
+
+# Worker job: clean rows [start, stop) with the global statistics known so far
+def _partition_job(start, stop, rules, params, now):
+    part = _PARTITION_SOURCE.iloc[start:stop].copy()
+    return _clean_frame(part, rules, params, now, immediate=False)
+
+
+# Clean row partitions in a process pool; identical result to run_cleaning()
+def run_cleaning_partitioned(df, rules=CLEANING_RULES, workers=None, partitions=None):
+    """Return (cleaned DataFrame, merged CleaningContext), computed on row partitions in parallel"""
+    global _PARTITION_SOURCE
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers
+    # Workers are forked so the calling script is not re-executed; fall back to serial elsewhere
+    if workers <= 1 or partitions <= 1 or 'fork' not in mp.get_all_start_methods():
+        return run_cleaning(df, rules)
+
+    bounds = np.linspace(0, len(df), partitions + 1).astype(int)
+    now = pd.Timestamp.now()
+    params = {}
+    _PARTITION_SOURCE = df
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+            while True:
+                futures = [pool.submit(_partition_job, start, stop, rules, params, now)
+                           for start, stop in zip(bounds[:-1], bounds[1:])]
+                results = [future.result() for future in futures]
+                if all(part is not None for part, _ in results):
+                    break
+                # Round barrier: merge the partial statistics every partition contributed
+                keys = set.intersection(*(set(ctx.collected) for _, ctx in results))
+                if not keys:
+                    raise RuntimeError("Partitions requested different global statistics")
+                for key in keys:
+                    params[key] = REDUCERS[key[1]]([ctx.collected[key] for _, ctx in results])
+    finally:
+        _PARTITION_SOURCE = None
+
+    # Concatenate the partitions in order and merge their counters
+    cleaned = pd.concat([part for part, _ in results])
+    return cleaned, merge_contexts([ctx for _, ctx in results], cleaned.columns)
+
+
+# ==================== REPORT ====================
+
+# One-line description of an imputation for the report
+def _imputation_text(c, spec):
+    if spec['method'] == 'group_median':
+        return (f"Filled with group median by {' × '.join(spec['by'])} ({c['groups']} groups, "
+                f"overall median {c['fill_value']:.2f} for unknown groups)")
+    if spec['method'] == 'ffill':
+        within = f" within {' × '.join(spec['by'])}" if spec.get('by') else ""
+        return f"Forward-filled in {spec['order_by']} order{within}"
+    terms = ' + '.join(f"{coef:.4f} × {'×'.join(term) if isinstance(term, tuple) else term}"
+                       for coef, term in zip(c['coefficients'][1:], spec['predictors']))
+    return f"Filled from linear model ({c['coefficients'][0]:.4f} + {terms})"
+
+
+# Build cleaning_report.txt lines from the counters of one pass
+def cleaning_report_lines(ctx, input_path, output_path, original_shape, result):
+    """Return the report lines (same layout as the step-by-step cleaning report)"""
+    counters = ctx.counters
+    lines = []
+    lines.append("=" * 80)
+    lines.append("DATA CLEANING REPORT")
+    lines.append("=" * 80)
+    lines.append("")
+    lines.append(f"Generated: {ctx.now.strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append(f"Input Dataset: {input_path}")
+    lines.append(f"Original Shape: {original_shape[0]} rows × {original_shape[1]} columns")
+    lines.append("")
+
+    # Step 1: TotalCharges type fix
+    lines.append("-" * 80)
+    lines.append("STEP 1: FIX TOTALCHARGES DATA TYPE")
+    lines.append("-" * 80)
+    for col, c in counters.get(1, {}).items():
+        lines.append(f"Original data type: {c['original_dtype']}")
+        lines.append(f"Non-numeric values found: {c['invalid']}")
+        if c['invalid'] > 0:
+            lines.append(f"  Invalid values: {c['invalid']} records")
+            lines.append(f"  Tenure=0 customers: {c['zero_tenure']}")
+            lines.append("  Action: Set TotalCharges=0 for tenure=0 customers")
+        lines.append(f"New data type: {c['new_dtype']}")
+    lines.append("")
+
+    # Step 2: missing values
+    missing_before = sum(ctx.missing_before.values())
+    missing_after = sum(ctx.missing_after.values())
+    lines.append("-" * 80)
+    lines.append("STEP 2: HANDLE MISSING VALUES")
+    lines.append("-" * 80)
+    lines.append(f"Missing values before: {missing_before}")
+    lines.append("")
+    step2 = counters.get(2, {})
+    if step2:
+        lines.append(f"Columns with missing values: {len(step2)}")
+        for col, c in step2.items():
+            lines.append(f"\n  {col}: {c['missing']} missing ({c['missing_pct']:.2f}%)")
+            if c['action'] == 'fill_zero':
+                lines.append("    Action: Filled remaining with 0")
+            elif c['action'] == 'keep':
+                lines.append("    Action: Kept as missing (valid business state)")
+            elif c['action'] == 'median':
+                lines.append(f"    Action: Filled with median ({c['fill_value']:.2f})")
+            elif c['action'] == 'mode':
+                lines.append(f"    Action: Filled with mode ({c['fill_value']})")
+            elif c['action'] in IMPUTERS:
+                lines.append(f"    Action: {_imputation_text(c, c['spec'])}")
+                if c['unfilled'] > 0:
+                    lines.append(f"    Left missing (no usable group/predictors): {c['unfilled']}")
+            else:
+                lines.append("    Action: Flagged for business review")
+    else:
+        lines.append("No missing values found")
+    lines.append(f"\nMissing values after: {missing_after}")
+    lines.append(f"Reduction: {missing_before - missing_after}")
+    lines.append("")
+
+    # Step 3: dates
+    lines.append("-" * 80)
+    lines.append("STEP 3: CONVERT DATE COLUMNS")
+    lines.append("-" * 80)
+    step3 = counters.get(3, {})
+    if step3:
+        lines.append(f"Date columns found: {list(step3)}")
+        for col, c in step3.items():
+            lines.append(f"\n  {col}:")
+            lines.append(f"    Original type: {c['original_dtype']}")
+            lines.append(f"    New type: {c['new_dtype']}")
+            lines.append(f"    Invalid dates: {c['invalid']}")
+            if len(c['failed_rows']) > 0:
+                lines.append(f"    Unparseable values: {len(c['failed_rows'])}")
+            if c.get('future', 0) > 0:
+                lines.append(f"    Future dates: {c['future']}")
+    else:
+        lines.append("No date columns found")
+    lines.append("")
+
+    # Step 4: categorical standardization
+    lines.append("-" * 80)
+    lines.append("STEP 4: STANDARDIZE CATEGORICAL VALUES")
+    lines.append("-" * 80)
+    step4 = counters.get(4, {})
+    lines.append(f"Categorical columns: {len(step4)}")
+    for col, c in step4.items():
+        if 'unique_before' in c and c['unique_before'] != c['unique_after']:
+            lines.append(f"  {col}: Standardized ({c['unique_before']} → {c['unique_after']} unique)")
+    lines.append("\nAction: Normalized all categorical columns per distinct value (whitespace, casing, synonyms)")
+    lines.append("")
+
+    # Step 5: outliers
+    lines.append("-" * 80)
+    lines.append("STEP 5: HANDLE OUTLIERS")
+    lines.append("-" * 80)
+    lines.append("Method: IQR (Inter-Quartile Range)")
+    for col, c in counters.get(5, {}).items():
+        lines.append(f"\n  {col}:")
+        if c.get('method') == 'isolation':
+            # Row-level score over the whole numeric block
+            lines.append(f"    Isolation score ({c['trees']} trees) > {c['threshold']}: "
+                         f"{c['outliers']} rows ({c['outlier_pct']:.2f}%)")
+            continue
+        lines.append(f"    Outliers: {c['outliers']} ({c['outlier_pct']:.2f}%)")
+        lines.append(f"    Expected range: [{c['lower']:.2f}, {c['upper']:.2f}]")
+        if 'mad_outliers' in c:
+            lines.append(f"    MAD outliers (|robust z| > {c['mad_threshold']}): {c['mad_outliers']} "
+                         f"(MAD {c['mad']:.2f})")
+        lines.append("    Action: Kept (legitimate variation expected)")
+    lines.append("\nOutliers retained (valid business variation)")
+    lines.append("")
+
+    # Step 6: flags
+    lines.append("-" * 80)
+    lines.append("STEP 6: CREATE DATA QUALITY FLAGS")
+    lines.append("-" * 80)
+    for flag, c in counters.get(6, {}).items():
+        lines.append(f"{flag} flag: {c['flagged']} records")
+        if 'bits' in c:
+            # Bit legend of the bitmask flag (only the bits set on some row)
+            used = []
+            for col, bit in c['bits'].items():
+                word, offset = divmod(bit, WORD_BITS)
+                is_set = (result[bitmask_column(flag, word)].to_numpy() >> offset) & 1
+                if is_set.any():
+                    where = f"bit {offset}" if word == 0 else f"{bitmask_column(flag, word)} bit {offset}"
+                    used.append(f"{col}={where} ({int(is_set.sum())})")
+            lines.append(f"  Bits: {', '.join(used) if used else 'none set'}")
+    lines.append("\nPurpose: Track which records were modified during cleaning")
+    lines.append("")
+
+    # Step 7: validation
+    step7 = counters.get(7, {})
+    lines.append("-" * 80)
+    lines.append("STEP 7: VALIDATION CHECKS")
+    lines.append("-" * 80)
+    if len(result) == original_shape[0]:
+        lines.append(f"✅ Row count: {len(result)} (unchanged)")
+    else:
+        lines.append(f"⚠️  Row count changed: {original_shape[0]} → {len(result)}")
+    duplicates = sum(c.get('duplicates', 0) for c in step7.values())
+    lines.append("✅ No duplicates" if duplicates == 0 else f"⚠️  Duplicates: {duplicates}")
+    # Type counts come from the dtypes only (no data scan)
+    lines.append(f"Numeric: {len(result.select_dtypes(include=[np.number]).columns)} columns")
+    # Text columns: plain strings or categories
+    lines.append(f"Object: {len(result.select_dtypes(include=['object', 'category']).columns)} columns")
+    lines.append(f"Datetime: {len(result.select_dtypes(include=['datetime64']).columns)} columns")
+    lines.append("\nBusiness Logic Validation:")
+    for col, c in step7.items():
+        if 'operator' not in c:
+            continue
+        passed, failed = CHECK_MESSAGES[c['operator']]
+        if c['failing'] == 0:
+            lines.append(f"  ✅ {col}: {passed.format(limit=c['limit'])}")
+        else:
+            lines.append(f"  ⚠️  {col}: {failed.format(limit=c['limit'], count=c['failing'])}")
+    lines.append("")
+    lines.append(f"Output: {output_path}")
+    lines.append(f"Final shape: {result.shape[0]} rows × {result.shape[1]} columns")
+
+    # Before/after comparison
+    lines.append("")
+    lines.append("-" * 80)
+    lines.append("BEFORE/AFTER COMPARISON")
+    lines.append("-" * 80)
+    lines.append(f"Missing values: {missing_before} → {missing_after}")
+    new_cols = result.shape[1] - original_shape[1]
+    lines.append(f"Columns: {original_shape[1]} → {result.shape[1]} (added {new_cols} flags)")
+    lines.append(f"Cells changed: {len(ctx.changes)} (see audit log)")
+    for entry in ctx.changes.entries:
+        lines.append(f"  Step {entry['step']} {entry['op']}: {entry['column']} ({len(entry['rows'])} cells)")
+    lines.append("")
+    lines.append("=" * 80)
+    lines.append("CLEANING COMPLETE")
+    lines.append("=" * 80)
+    return lines
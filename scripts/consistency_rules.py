@@ -0,0 +1,181 @@
+"""
+CONSISTENCY RULES
+Declarative cross-column consistency checks compiled into vectorized expressions.
+Every column a rule needs is loaded and converted once; each rule is then a
+NumPy expression over those arrays (no extra table scans per rule).
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For vectorized expressions
+from data_schema import parse_dates_cached  # Date parsing once per distinct value
+
+# Columns parsed as dates before the rules run
+DATE_COLUMNS = ['RegistrationDate', 'LastContactDate', 'PaymentDate']
+
+# Columns whose latest date marks when the extract was taken (first one present wins)
+SNAPSHOT_COLUMNS = ['LastContactDate', 'PaymentDate', 'RegistrationDate']
+
+# Violations are recorded in one uint64 bitmask per row (one bit per rule)
+MAX_RULES = 64
+
+# Default rule set. Each rule declares:
+#   name     - short identifier used in reports
+#   columns  - columns the rule reads (rows with a missing value here are "not evaluable")
+#   when     - optional precondition: the rule only applies where it is True
+#   check    - expression that must be True on every applicable row
+CONSISTENCY_RULES = [
+    {
+        'name': 'TotalCharges ≈ tenure × MonthlyCharges',
+        'columns': ['TotalCharges', 'tenure', 'MonthlyCharges'],
+        'when': 'tenure > 0',
+        # Prices change over a customer's life, so allow 25% (or one month's bill) of drift
+        'check': 'abs(TotalCharges - tenure * MonthlyCharges) <= maximum(0.25 * tenure * MonthlyCharges, MonthlyCharges)'
+    },
+    {
+        'name': 'TotalPaid <= TotalCharges',
+        'columns': ['TotalPaid', 'TotalCharges'],
+        'check': 'TotalPaid <= TotalCharges + 0.01'
+    },
+    {
+        'name': 'AvgPayment = TotalPaid / TotalPayments',
+        'columns': ['AvgPayment', 'TotalPaid', 'TotalPayments'],
+        'when': 'TotalPayments > 0',
+        'check': 'abs(AvgPayment - TotalPaid / TotalPayments) <= 0.01'
+    },
+    {
+        'name': 'FailedPayments <= TotalPayments',
+        'columns': ['FailedPayments', 'TotalPayments'],
+        'check': 'FailedPayments <= TotalPayments'
+    },
+    {
+        'name': 'RegistrationDate consistent with tenure',
+        'columns': ['RegistrationDate', 'tenure'],
+        # Months since registration should match tenure within 2 months
+        # (AS_OF is the extract's snapshot date, not the day the report runs)
+        'check': 'abs(months_between(RegistrationDate, AS_OF) - tenure) <= 2'
+    },
+    {
+        'name': 'LastContactDate >= RegistrationDate',
+        'columns': ['LastContactDate', 'RegistrationDate'],
+        'check': 'LastContactDate >= RegistrationDate'
+    },
+    {
+        'name': 'No internet service ⇒ add-ons say so',
+        'columns': ['InternetService', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+                    'TechSupport', 'StreamingTV', 'StreamingMovies'],
+        'when': "InternetService == 'No'",
+        'check': "(OnlineSecurity == 'No internet service') & (OnlineBackup == 'No internet service') & "
+                 "(DeviceProtection == 'No internet service') & (TechSupport == 'No internet service') & "
+                 "(StreamingTV == 'No internet service') & (StreamingMovies == 'No internet service')"
+    },
+    {
+        'name': "No phone service ⇔ MultipleLines = 'No phone service'",
+        'columns': ['PhoneService', 'MultipleLines'],
+        'check': "(PhoneService == 'No') == (MultipleLines == 'No phone service')"
+    }
+]
+
+
+# Months between two datetime64 arrays (average month length)
+def months_between(start, end):
+    return (end - start) / np.timedelta64(1, 'D') / 30.4375
+
+
+# Date the extract was taken: the latest date in the data itself
+def snapshot_date(df):
+    """Return the latest date of the first snapshot column with any valid date (today if none)"""
+    for col in SNAPSHOT_COLUMNS:
+        if col in df.columns:
+            latest = parse_dates_cached(df[col])[0].max()
+            if pd.notna(latest):
+                return latest.normalize()
+    return pd.Timestamp.now().normalize()
+
+
+class CompiledRuleSet:
+    """Rules compiled once; evaluate() loads each needed column once and runs every rule"""
+
+    def __init__(self, rules):
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"{len(rules)} rules given - at most {MAX_RULES} fit the per-row violation bitmask")
+        self.rules = []
+        for rule in rules:
+            # Compile expressions up front so evaluation is pure array work
+            self.rules.append({
+                'name': rule['name'],
+                'columns': list(rule['columns']),
+                'when': compile(rule['when'], rule['name'], 'eval') if rule.get('when') else None,
+                'check': compile(rule['check'], rule['name'], 'eval')
+            })
+        # Union of every column any rule reads (loaded once, shared by all rules)
+        self.columns = list(dict.fromkeys(col for rule in self.rules for col in rule['columns']))
+
+    def _load_columns(self, df):
+        arrays = {}
+        missing = {}
+        for col in self.columns:
+            if col not in df.columns:
+                continue
+            series = df[col]
+            if col in DATE_COLUMNS:
+                series, _ = parse_dates_cached(series)
+            elif not pd.api.types.is_numeric_dtype(series):
+                # Numeric text columns (e.g. TotalCharges with blank strings) are coerced once
+                numeric = pd.to_numeric(series, errors='coerce')
+                if numeric.notna().sum() >= series.notna().sum() * 0.99:
+                    series = numeric
+            arrays[col] = series.to_numpy()
+            missing[col] = series.isna().to_numpy()
+        return arrays, missing
+
+    def evaluate(self, df, as_of=None, sample_size=5, id_column='customerID'):
+        """Return (summary DataFrame, {rule name: sample violating rows}, violation bitmask per row)"""
+        arrays, missing = self._load_columns(df)
+        # Date-relative rules are anchored to the extract, so results do not change with the run date
+        as_of = snapshot_date(df) if as_of is None else pd.Timestamp(as_of)
+        namespace = {'abs': np.abs, 'maximum': np.maximum, 'minimum': np.minimum,
+                     'months_between': months_between,
+                     'AS_OF': np.datetime64(as_of, 'ns')}
+        namespace.update(arrays)
+
+        # One bit per rule (up to MAX_RULES) records which rules each row violates
+        bitmask = np.zeros(len(df), dtype=np.uint64)
+        summary = []
+        samples = {}
+        for bit, rule in enumerate(self.rules):
+            if any(col not in arrays for col in rule['columns']):
+                summary.append({'Rule': rule['name'], 'Applicable': 0, 'Violations': 0,
+                                'Not_Evaluable': len(df), 'Violation_Rate': np.nan,
+                                'Status': 'SKIPPED (missing columns)'})
+                continue
+            # Rows with any missing input cannot be judged
+            evaluable = ~np.logical_or.reduce([missing[col] for col in rule['columns']])
+            applicable = evaluable.copy()
+            with np.errstate(invalid='ignore'):
+                if rule['when'] is not None:
+                    applicable &= np.asarray(eval(rule['when'], namespace), dtype=bool)
+                passed = np.asarray(eval(rule['check'], namespace), dtype=bool)
+            violations = applicable & ~passed
+            bitmask[violations] |= np.uint64(1 << bit)
+
+            violation_count = int(violations.sum())
+            applicable_count = int(applicable.sum())
+            summary.append({
+                'Rule': rule['name'],
+                'Applicable': applicable_count,
+                'Violations': violation_count,
+                'Not_Evaluable': int((~evaluable).sum()),
+                'Violation_Rate': violation_count / applicable_count * 100 if applicable_count else 0.0,
+                'Status': 'PASS' if violation_count == 0 else 'FAIL'
+            })
+            # A few example rows per rule (identifier + the columns the rule reads)
+            sample_cols = ([id_column] if id_column in df.columns else []) + rule['columns']
+            samples[rule['name']] = df[sample_cols].iloc[np.flatnonzero(violations)[:sample_size]]
+        return pd.DataFrame(summary), samples, bitmask
+
+
+# Compile and evaluate the default rules in one call
+def check_consistency(df, rules=None, **options):
+    """Return (summary, samples, bitmask) for the given (or default) rule set"""
+    return CompiledRuleSet(rules or CONSISTENCY_RULES).evaluate(df, **options)
@@ -2,7 +2,44 @@
 import pandas as pd  # For data manipulation
 import numpy as np  # For numerical operations
 import os  # For file path operations
+import argparse  # For command-line options
 from datetime import datetime  # For working with dates
+from profiling_engine import (profile_columns, profile_columns_parallel, summary_table,
+                              progressive_sample_profile)  # Column statistics
+from profiling_sketches import profile_csv_streaming, streaming_summary_table, streaming_report_lines  # Streaming mode
+from duplicate_detection import (row_fingerprints, duplicate_mask,
+                                 near_duplicate_pairs)  # Hash-based duplicate detection
+from consistency_rules import check_consistency, snapshot_date  # Cross-column consistency rules
+from data_schema import parse_dates_cached  # Date parsing once per distinct value
+from sampling import StratifiedReservoir  # Sample mode (one streaming pass)
+from profile_snapshots import (incremental_profile, load_latest_snapshot, save_snapshot,
+                               merged_profile, drift_table)  # Incremental mode
+
+# Command-line options (defaults reproduce the standard in-memory profile)
+parser = argparse.ArgumentParser(description="Stage 3: raw data validation & profiling")
+parser.add_argument('--stream', action='store_true',
+                    help="Profile in chunks with mergeable sketches (constant memory, estimated results)")
+parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk in --stream and --sample modes")
+parser.add_argument('--exact-duplicates', action='store_true',
+                    help="In --stream mode, also count exact duplicate rows from row fingerprints")
+parser.add_argument('--near-duplicates', action='store_true',
+                    help="Also find near-duplicate customers (MinHash/LSH) and save the pairs to CSV")
+parser.add_argument('--as-of', default=None,
+                    help="Extract date (YYYY-MM-DD) for date-relative consistency rules "
+                         "(default: latest LastContactDate in the data)")
+parser.add_argument('--workers', type=int, default=1,
+                    help="Profile columns across this many worker processes (1 = serial)")
+parser.add_argument('--incremental', action='store_true',
+                    help="Re-profile only changed partitions, save a versioned snapshot and report drift")
+parser.add_argument('--partitions', type=int, default=16, help="Hash partitions in --incremental mode")
+parser.add_argument('--sample', action='store_true',
+                    help="Fast preview from a stratified sample (Churn × Contract) with 95%% confidence intervals")
+parser.add_argument('--sample-size', type=int, default=1000, help="Initial sample size in --sample mode")
+parser.add_argument('--target-width', type=float, default=0.02,
+                    help="Target CI half-width: absolute for rates, target × 2 std for means (--sample mode)")
+parser.add_argument('--max-sample-size', type=int, default=64000,
+                    help="Largest sample kept in memory in --sample mode (the sample stops growing there)")
+args = parser.parse_args()
 
 # Print header
 print("=" * 80)
@@ -14,6 +51,14 @@ print()
 input_path = "data/processed/centralized_churn_data.csv"
 report_path = "data/processed/data_quality_report.txt"
 summary_path = "data/processed/data_quality_summary.csv"
+snapshot_dir = "data/processed/profile_snapshots"
+drift_report_path = "data/processed/profile_drift_report.txt"
+drift_csv_path = "data/processed/profile_drift.csv"
+sample_report_path = "data/processed/data_quality_sample_report.txt"
+sample_summary_path = "data/processed/data_quality_sample_summary.csv"
+stream_report_path = "data/processed/data_quality_stream_report.txt"
+stream_summary_path = "data/processed/data_quality_stream_summary.csv"
+near_duplicates_path = "data/processed/near_duplicate_customers.csv"
 
 # Check if centralized dataset exists
 if not os.path.exists(input_path):
@@ -21,6 +66,140 @@ if not os.path.exists(input_path):
     print("Please complete Stage 2 first")
     exit()
 
+# ==================== STREAMING MODE (DATASETS LARGER THAN MEMORY) ====================
+if args.stream:
+    # Each chunk updates mergeable sketches: HyperLogLog (distinct counts),
+    # KLL (quantiles / IQR bounds) and Misra-Gries (top values)
+    print(f"📂 Streaming centralized dataset in chunks of {args.chunksize:,} rows...")
+    stream_profile = profile_csv_streaming(input_path, chunksize=args.chunksize,
+                                           track_duplicates=args.exact_duplicates)
+    print(f"✅ Profiled {stream_profile.rows:,} rows in {stream_profile.chunks} chunks")
+    print()
+
+    # Every estimate in the report is followed by its error bound
+    report_lines = streaming_report_lines(stream_profile, input_path)
+    for line in report_lines:
+        print(line)
+
+    # Save text report and summary CSV (with error columns) next to (never over) the exact profile
+    with open(stream_report_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(report_lines))
+    streaming_summary_table(stream_profile).to_csv(stream_summary_path, index=False)
+    print(f"✅ Text report saved: {stream_report_path}")
+    print(f"✅ Summary CSV saved: {stream_summary_path}")
+    print()
+    print("Next Step: Proceed to Stage 4 (Data Cleaning & Preparation)")
+    exit()
+
+# ==================== INCREMENTAL MODE (SNAPSHOTS + DRIFT) ====================
+if args.incremental:
+    # Read as text so partition fingerprints and sketches match across runs
+    print("📂 Loading centralized dataset for incremental profiling...")
+    df_text = pd.read_csv(input_path, dtype=str)
+    print(f"✅ Dataset loaded: {len(df_text):,} rows")
+
+    # Only partitions whose fingerprint changed are profiled again
+    previous = load_latest_snapshot(snapshot_dir)
+    snapshot, activity = incremental_profile(df_text, previous, num_partitions=args.partitions,
+                                             input_path=input_path)
+    snapshot_path = save_snapshot(snapshot, snapshot_dir)
+    print(f"✅ Snapshot v{snapshot['version']} saved: {snapshot_path}")
+    print(f"   Partitions re-profiled: {len(activity['reprofiled'])}, "
+          f"reused: {len(activity['reused'])}, removed: {len(activity['removed'])}")
+    print()
+
+    drift_lines = []
+    drift_lines.append("=" * 80)
+    drift_lines.append("PROFILE DRIFT REPORT")
+    drift_lines.append("=" * 80)
+    drift_lines.append("")
+    drift_lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    drift_lines.append(f"Dataset: {input_path}")
+    drift_lines.append(f"Snapshot: v{snapshot['version']} ({snapshot['created']})")
+    drift_lines.append(f"Partitions re-profiled: {len(activity['reprofiled'])} of {len(snapshot['partitions'])}")
+    drift_lines.append("")
+
+    if previous is None:
+        # First run - this snapshot becomes the baseline
+        print("ℹ️  No previous snapshot - baseline created, no drift to report")
+        drift_lines.append("No previous snapshot - baseline created")
+    else:
+        # Per-column PSI, KS distance (numeric) and null-rate delta against the previous version;
+        # the status is the worst of the three
+        drift = drift_table(merged_profile(previous), merged_profile(snapshot))
+        drift.to_csv(drift_csv_path, index=False)
+        drift_lines.append(f"Compared with: v{previous['version']} ({previous['created']})")
+        drift_lines.append("")
+        for _, row in drift.iterrows():
+            if pd.isna(row.get('PSI')):
+                line = f"  {row['Column']}: {row['Status']}"
+            else:
+                ks_text = f", KS={row['KS_Distance']:.3f}" if pd.notna(row['KS_Distance']) else ""
+                line = (f"  {row['Column']}: PSI={row['PSI']:.3f}{ks_text}, "
+                        f"null rate {row['Null_Rate_Before']:.2f}% → {row['Null_Rate_After']:.2f}% "
+                        f"({row['Null_Rate_Delta']:+.2f}) [{row['Status']}"
+                        f"{': ' + row['Drift_Metrics'] if row['Drift_Metrics'] else ''}]")
+            print(line)
+            drift_lines.append(line)
+        print(f"\n✅ Drift metrics saved: {drift_csv_path}")
+
+    with open(drift_report_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(drift_lines))
+    print(f"✅ Drift report saved: {drift_report_path}")
+    exit()
+
+# ==================== SAMPLE MODE (FAST PREVIEW WITH CONFIDENCE INTERVALS) ====================
+if args.sample:
+    # One streaming pass fills a reservoir per stratum (Churn × Contract) - the dataset is never loaded
+    print(f"📂 Sampling centralized dataset in chunks of {args.chunksize:,} rows...")
+    reservoir = StratifiedReservoir(['Churn', 'Contract'], capacity=args.max_sample_size)
+    for chunk in pd.read_csv(input_path, chunksize=args.chunksize):
+        reservoir.update(chunk)
+    population = sum(reservoir.population.values())
+    print(f"✅ Reservoir filled: {population:,} rows seen, {len(reservoir.population)} strata")
+
+    # Nested stratified sample, doubled until every interval meets the target width
+    print(f"🎯 Sampling preview: start {args.sample_size:,} rows, target width ±{args.target_width}")
+    sample_table, rounds = progressive_sample_profile(reservoir, start_size=args.sample_size,
+                                                      target_width=args.target_width)
+    for size, seconds, met in rounds:
+        print(f"   Sample {size:,} rows: {seconds:.2f}s - {'target met' if met else 'intervals too wide'}")
+    print()
+
+    sample_lines = []
+    sample_lines.append("=" * 80)
+    sample_lines.append("DATA QUALITY PREVIEW (STRATIFIED SAMPLE, 95% CONFIDENCE INTERVALS)")
+    sample_lines.append("=" * 80)
+    sample_lines.append("")
+    sample_lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    sample_lines.append(f"Dataset: {input_path}")
+    sample_lines.append(f"Strata: Churn × Contract")
+    if rounds[-1][2]:
+        outcome = 'target width met'
+    elif rounds[-1][0] >= population:
+        outcome = 'target width not met - full dataset used'
+    else:
+        outcome = 'target width not met at --max-sample-size'
+    sample_lines.append(f"Sample: {rounds[-1][0]:,} of {population:,} rows ({outcome})")
+    for col, col_rows in sample_table.groupby('Column', sort=False):
+        sample_lines.append(f"\nColumn: {col}")
+        for _, row in col_rows.iterrows():
+            if pd.isna(row['CI_Lower']):
+                sample_lines.append(f"  {row['Statistic']}: {row['Estimate']:.4g}")
+            else:
+                sample_lines.append(f"  {row['Statistic']}: {row['Estimate']:.4g} "
+                                    f"[{row['CI_Lower']:.4g}, {row['CI_Upper']:.4g}]")
+    for line in sample_lines:
+        print(line)
+
+    with open(sample_report_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sample_lines))
+    sample_table.to_csv(sample_summary_path, index=False)
+    print()
+    print(f"✅ Sample report saved: {sample_report_path}")
+    print(f"✅ Sample summary CSV saved: {sample_summary_path}")
+    exit()
+
 # Load the centralized dataset
 print("📂 Loading centralized dataset...")
 df = pd.read_csv(input_path)
@@ -28,6 +207,18 @@ print(f"✅ Dataset loaded: {input_path}")
 print(f"   Rows: {len(df)}, Columns: {len(df.columns)}")
 print()
 
+# Profile every column once up front - all sections below read from this profile
+# (numeric columns in one vectorized pass, other columns with one value_counts() each)
+# With --workers > 1, column jobs run in a process pool reading shared-memory columns
+if args.workers > 1:
+    print(f"🔎 Profiling all columns across {args.workers} worker processes...")
+    profile, value_counts_by_col = profile_columns_parallel(df, workers=args.workers)
+else:
+    print("🔎 Profiling all columns (single pass)...")
+    profile, value_counts_by_col = profile_columns(df)
+print(f"✅ Profiled {len(profile)} columns")
+print()
+
 # Initialize list to store report lines
 report_lines = []
 
@@ -50,15 +241,16 @@ report_lines.append("-" * 80)
 
 # Get basic dataset information
 num_rows, num_cols = df.shape
+memory_mb = df.memory_usage(deep=True).sum() / 1024**2  # Deep scan done once
 print(f"Total Rows: {num_rows:,}")
 print(f"Total Columns: {num_cols}")
-print(f"Memory Usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+print(f"Memory Usage: {memory_mb:.2f} MB")
 print()
 
 # Add to report
 report_lines.append(f"Total Rows: {num_rows:,}")
 report_lines.append(f"Total Columns: {num_cols}")
-report_lines.append(f"Memory Usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+report_lines.append(f"Memory Usage: {memory_mb:.2f} MB")
 report_lines.append("")
 
 # ==================== SECTION 2: DUPLICATE RECORDS CHECK ====================
@@ -71,8 +263,12 @@ report_lines.append("-" * 80)
 report_lines.append("SECTION 2: DUPLICATE RECORDS CHECK")
 report_lines.append("-" * 80)
 
+# Row fingerprints (64-bit hashes) are computed once and reused for every exact-duplicate check
+row_hashes = row_fingerprints(df)
+id_hashes = row_fingerprints(df, ['customerID'])
+
 # Check for duplicate customerIDs (primary key)
-duplicate_ids = df['customerID'].duplicated().sum()
+duplicate_ids = int(duplicate_mask(id_hashes).sum())
 print(f"Duplicate customerIDs: {duplicate_ids}")
 
 if duplicate_ids > 0:
@@ -82,8 +278,8 @@ else:
     print("✅ No duplicate customerIDs - primary key integrity maintained")
     report_lines.append("✅ No duplicate customerIDs")
 
-# Check for completely duplicate rows (all columns identical)
-duplicate_rows = df.duplicated().sum()
+# Check for completely duplicate rows (all columns identical = identical fingerprints)
+duplicate_rows = int(duplicate_mask(row_hashes).sum())
 print(f"Completely Duplicate Rows: {duplicate_rows}")
 
 if duplicate_rows > 0:
@@ -93,6 +289,21 @@ else:
     print("✅ No completely duplicate rows")
     report_lines.append("✅ No completely duplicate rows")
 
+# Near-duplicate customers (--near-duplicates): same person re-registered under a new customerID
+# (MinHash signatures + LSH banding on customer attributes, candidates verified exactly)
+if args.near_duplicates:
+    near_duplicates, lsh_stats = near_duplicate_pairs(df)
+    near_duplicates.to_csv(near_duplicates_path, index=False)
+    customers_involved = pd.unique(near_duplicates.iloc[:, :2].to_numpy().ravel()).size
+    print(f"Near-Duplicate Customer Pairs (Jaccard ≥ 0.8 on {len(lsh_stats['attributes'])} attributes): "
+          f"{len(near_duplicates)} ({customers_involved} customers)")
+    print(f"   LSH candidates checked: {lsh_stats['candidates']:,}, "
+          f"oversized buckets skipped: {lsh_stats['skipped_buckets']}")
+    report_lines.append(f"Near-duplicate customer pairs (MinHash/LSH, Jaccard ≥ 0.8): {len(near_duplicates)} "
+                        f"({customers_involved} customers)")
+    report_lines.append(f"  Attributes compared: {', '.join(lsh_stats['attributes'])}")
+    report_lines.append(f"  Pairs saved to: {near_duplicates_path}")
+
 print()
 report_lines.append("")
 
@@ -106,9 +317,9 @@ report_lines.append("-" * 80)
 report_lines.append("SECTION 3: MISSING VALUES ANALYSIS")
 report_lines.append("-" * 80)
 
-# Calculate missing values for each column
-missing_counts = df.isnull().sum()
-missing_percentages = (missing_counts / len(df)) * 100
+# Missing values for each column come straight from the profile
+missing_counts = profile['Null_Count']
+missing_percentages = profile['Null_Percentage']
 
 # Create a summary DataFrame
 missing_summary = pd.DataFrame({
@@ -189,20 +400,21 @@ for col in numeric_cols:
     print(f"\n📊 Column: {col}")
     report_lines.append(f"\nColumn: {col}")
     
-    # Basic statistics
-    col_data = df[col].dropna()  # Remove NaN for calculations
+    # Basic statistics (precomputed in the single profiling pass, NaN excluded)
+    col_stats = profile.loc[col]
+    valid_count = col_stats['Non_Null_Count']
     
-    if len(col_data) == 0:
+    if valid_count == 0:
         print("  ⚠️  All values are missing")
         report_lines.append("  All values missing")
         continue
     
-    # Calculate statistics
-    min_val = col_data.min()
-    max_val = col_data.max()
-    mean_val = col_data.mean()
-    median_val = col_data.median()
-    std_val = col_data.std()
+    # Read statistics from the profile
+    min_val = col_stats['Min']
+    max_val = col_stats['Max']
+    mean_val = col_stats['Mean']
+    median_val = col_stats['Median']
+    std_val = col_stats['Std']
     
     print(f"  Min: {min_val:.2f}")
     print(f"  Max: {max_val:.2f}")
@@ -213,20 +425,10 @@ for col in numeric_cols:
     report_lines.append(f"  Min: {min_val:.2f}, Max: {max_val:.2f}")
     report_lines.append(f"  Mean: {mean_val:.2f}, Median: {median_val:.2f}, Std: {std_val:.2f}")
     
-    # Check for outliers using IQR method
-    # IQR = Inter-Quartile Range (Q3 - Q1)
-    Q1 = col_data.quantile(0.25)  # 25th percentile
-    Q3 = col_data.quantile(0.75)  # 75th percentile
-    IQR = Q3 - Q1  # Inter-quartile range
-    
-    # Define outlier boundaries
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    
-    # Count outliers
-    outliers_iqr = col_data[(col_data < lower_bound) | (col_data > upper_bound)]
-    num_outliers = len(outliers_iqr)
-    outlier_percentage = (num_outliers / len(col_data)) * 100
+    # Outliers using IQR method - values beyond Q1 - 1.5×IQR or Q3 + 1.5×IQR
+    # (bounds and counts were computed for all numeric columns at once)
+    num_outliers = int(col_stats['Outliers_IQR'])
+    outlier_percentage = (num_outliers / valid_count) * 100
     
     if num_outliers > 0:
         print(f"  ⚠️  Outliers (IQR method): {num_outliers} ({outlier_percentage:.2f}%)")
@@ -235,6 +437,12 @@ for col in numeric_cols:
         print(f"  ✅ No outliers detected (IQR method)")
         report_lines.append(f"  No outliers (IQR)")
 
+    # Robust z-score outliers (|0.6745 × (x - median) / MAD| > 3.5; none when MAD = 0)
+    num_mad_outliers = int(col_stats['Outliers_MAD'])
+    if num_mad_outliers > 0:
+        print(f"  ⚠️  Outliers (MAD method): {num_mad_outliers} ({num_mad_outliers / valid_count * 100:.2f}%)")
+        report_lines.append(f"  Outliers (MAD): {num_mad_outliers} ({num_mad_outliers / valid_count * 100:.2f}%)")
+
 print()
 report_lines.append("")
 
@@ -253,9 +461,10 @@ for col in object_cols:
     print(f"\n📊 Column: {col}")
     report_lines.append(f"\nColumn: {col}")
     
-    # Count unique values
-    unique_count = df[col].nunique()
-    total_count = df[col].count()  # Non-null count
+    # Unique and non-null counts from the profile
+    unique_count = profile.loc[col, 'Unique_Values']
+    total_count = profile.loc[col, 'Non_Null_Count']
+    value_counts = value_counts_by_col[col]  # Computed once during profiling
     
     print(f"  Unique Values: {unique_count}")
     print(f"  Non-Null Count: {total_count}")
@@ -264,7 +473,6 @@ for col in object_cols:
     # If few unique values, show value distribution
     if unique_count <= 10:
         print("  Value Distribution:")
-        value_counts = df[col].value_counts()
         for value, count in value_counts.items():
             percentage = (count / total_count) * 100
             print(f"    {value}: {count} ({percentage:.2f}%)")
@@ -272,8 +480,7 @@ for col in object_cols:
     else:
         # Show top 5 most common values
         print("  Top 5 Most Common Values:")
-        value_counts = df[col].value_counts().head(5)
-        for value, count in value_counts.items():
+        for value, count in value_counts.head(5).items():
             percentage = (count / total_count) * 100
             # Truncate long values for display
             display_value = str(value)[:30] + "..." if len(str(value)) > 30 else value
@@ -303,11 +510,11 @@ if len(date_columns) > 0:
         
         # Try to parse as dates
         try:
-            # Convert to datetime
-            df[col + '_parsed'] = pd.to_datetime(df[col], errors='coerce')
+            # Convert to datetime (ISO format, each distinct string parsed once)
+            df[col + '_parsed'], failed_dates = parse_dates_cached(df[col])
             
-            # Count invalid dates (became NaT after conversion)
-            invalid_dates = df[col + '_parsed'].isnull().sum() - df[col].isnull().sum()
+            # Count invalid dates (present but not parseable)
+            invalid_dates = int(failed_dates.sum())
             
             if invalid_dates > 0:
                 print(f"  ⚠️  Invalid Date Formats: {invalid_dates}")
@@ -357,7 +564,7 @@ report_lines.append("-" * 80)
 # Check if customerID is truly unique (primary key constraint)
 if 'customerID' in df.columns:
     total_customers = len(df)
-    unique_customers = df['customerID'].nunique()
+    unique_customers = profile.loc['customerID', 'Unique_Values']
     
     print(f"Total Rows: {total_customers:,}")
     print(f"Unique customerIDs: {unique_customers:,}")
@@ -375,6 +582,25 @@ else:
     print("⚠️  No customerID column found")
     report_lines.append("⚠️  No customerID column")
 
+# Cross-column consistency rules (declarative, evaluated as vectorized expressions in one pass)
+# Date-relative rules are checked as of the extract date, so the counts do not depend on the run date
+as_of = pd.Timestamp(args.as_of) if args.as_of else snapshot_date(df)
+print(f"\nCross-Column Consistency Rules (as of {as_of.strftime('%Y-%m-%d')}):")
+report_lines.append(f"\nCross-Column Consistency Rules (as of {as_of.strftime('%Y-%m-%d')}):")
+rule_summary, rule_samples, _ = check_consistency(df, as_of=as_of)
+for _, rule in rule_summary.iterrows():
+    icon = "✅" if rule['Status'] == 'PASS' else "⚠️ "
+    line = (f"{icon} {rule['Rule']}: {rule['Violations']:,} violations of {rule['Applicable']:,} "
+            f"applicable rows ({rule['Violation_Rate']:.2f}%), {rule['Not_Evaluable']:,} not evaluable")
+    print(f"  {line}")
+    report_lines.append(f"  {line}")
+    # Show a few violating rows so the issue can be traced
+    if rule['Violations'] > 0:
+        sample_rows = rule_samples[rule['Rule']]
+        for _, sample_row in sample_rows.iterrows():
+            values = ', '.join(f"{col}={sample_row[col]}" for col in sample_rows.columns)
+            report_lines.append(f"      e.g. {values}")
+
 print()
 report_lines.append("")
 
@@ -390,7 +616,7 @@ report_lines.append("-" * 80)
 
 # Calculate overall data quality score
 total_cells = num_rows * num_cols
-missing_cells = df.isnull().sum().sum()
+missing_cells = int(profile['Null_Count'].sum())
 complete_cells = total_cells - missing_cells
 completeness_percentage = (complete_cells / total_cells) * 100
 
@@ -430,36 +656,9 @@ with open(report_path, 'w', encoding='utf-8') as f:
     f.write('\n'.join(report_lines))
 print(f"✅ Text report saved: {report_path}")
 
-# Create and save summary CSV
-summary_data = []
-for col in df.columns:
-    col_summary = {
-        'Column': col,
-        'DataType': str(df[col].dtype),
-        'Non_Null_Count': df[col].count(),
-        'Null_Count': df[col].isnull().sum(),
-        'Null_Percentage': (df[col].isnull().sum() / len(df)) * 100,
-        'Unique_Values': df[col].nunique()
-    }
-    
-    # Add numeric-specific fields
-    if col in numeric_cols:
-        col_summary['Min'] = df[col].min()
-        col_summary['Max'] = df[col].max()
-        col_summary['Mean'] = df[col].mean()
-        col_summary['Median'] = df[col].median()
-        col_summary['Std'] = df[col].std()
-    else:
-        col_summary['Min'] = None
-        col_summary['Max'] = None
-        col_summary['Mean'] = None
-        col_summary['Median'] = None
-        col_summary['Std'] = None
-    
-    summary_data.append(col_summary)
-
+# Create and save summary CSV (one row per column, taken from the profile)
 # Create DataFrame and save
-summary_df = pd.DataFrame(summary_data)
+summary_df = summary_table(profile)
 summary_df.to_csv(summary_path, index=False)
 print(f"✅ Summary CSV saved: {summary_path}")
 
@@ -0,0 +1,198 @@
+"""
+DATA SCHEMA
+Shared column schema and dtype-aware loader for every pipeline stage.
+Low-cardinality text loads as category, 0/1 flags as uint8, True/False flags as bool
+and dates as datetime64, so no stage pays for one Python string per cell.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For numerical operations
+import sys  # For Python object sizes (memory estimate of an untyped load)
+import re  # For bitmask spill column names
+
+# Logical type of every column the pipeline produces
+COLUMN_TYPES = {
+    'customerID': 'text',
+    'gender': 'category',
+    'SeniorCitizen': 'uint8',
+    'Partner': 'category',
+    'Dependents': 'category',
+    'tenure': 'int64',
+    'PhoneService': 'category',
+    'MultipleLines': 'category',
+    'InternetService': 'category',
+    'OnlineSecurity': 'category',
+    'OnlineBackup': 'category',
+    'DeviceProtection': 'category',
+    'TechSupport': 'category',
+    'StreamingTV': 'category',
+    'StreamingMovies': 'category',
+    'Contract': 'category',
+    'PaperlessBilling': 'category',
+    'PaymentMethod': 'category',
+    'MonthlyCharges': 'float64',
+    'TotalCharges': 'float64',
+    'Churn': 'category',
+    'RegistrationDate': 'date',
+    'City': 'category',
+    'State': 'category',
+    'ZipCode': 'int64',
+    'CustomerSegment': 'category',
+    'LastContactDate': 'date',
+    'TotalPayments': 'int64',
+    'TotalPaid': 'float64',
+    'AvgPayment': 'float64',
+    'FailedPayments': 'int64',
+    # Data quality flags (Stage 4)
+    'TotalCharges_Imputed': 'bool',
+    'No_Recent_Contact': 'bool',
+    # Bitmasks are written in the smallest dtype that fits the frame's columns (up to 64 bits,
+    # wider frames spill into Imputed_Columns_2, ...), so they load as uint64 to keep every bit
+    'Imputed_Columns': 'uint64',  # One bit per imputed column (legend in cleaning_report.txt)
+    'Outlier_Columns': 'uint64',  # One bit per numeric column with a flagged outlier
+    'Outlier_Score': 'float64',  # Isolation score (only when the isolation method is enabled)
+    # Engineered features (Stage 6)
+    'CLV': 'float64',
+    'ARPU': 'float64',
+    'Value_Segment': 'category',
+    'High_Risk_Flag': 'uint8',
+    'Payment_Risk_Flag': 'uint8',
+    'Service_Risk_Flag': 'uint8',
+    'Risk_Score': 'int64',
+    'Total_Services': 'int64',
+    'Service_Adoption_Rate': 'float64',
+    'Tenure_Segment': 'category',
+    'Contract_Stability_Score': 'int64',
+    'Payment_Reliability_Score': 'int64',
+    'Has_Family': 'uint8',
+    'Is_Senior': 'uint8',
+    'Engagement_Level': 'category',
+    'Revenue_per_Month': 'float64',
+    'Binary_Flags': 'uint32',  # Yes/no attributes, one bit each (see binary_flags.py)
+}
+
+# Packed bit fields (codes, not measurements: excluded from numeric summaries)
+BITMASK_COLUMNS = ['Imputed_Columns', 'Outlier_Columns', 'Binary_Flags']
+
+
+# Bitmask column a name belongs to: itself, or the flag it spills from (Imputed_Columns_2 -> Imputed_Columns)
+def bitmask_base(col):
+    """Return the BITMASK_COLUMNS entry for a bitmask or spill column name, else None"""
+    match = re.fullmatch(r'(.+)_\d+', col)
+    base = match.group(1) if match else col
+    return base if base in BITMASK_COLUMNS else None
+
+
+# Bitmask columns (and their spill words) are excluded from numeric analysis
+def is_bitmask_column(col):
+    return bitmask_base(col) is not None
+
+
+# Logical type of a column (spill words share their flag's type)
+def column_type(col):
+    base = bitmask_base(col)
+    return COLUMN_TYPES.get(base if base is not None else col)
+
+# ISO format every stage writes dates in
+DATE_FORMAT = '%Y-%m-%d'
+
+# Per-stage loading options:
+#   columns - only these columns are read (None = all)
+#   raw     - columns the stage cleans itself, so they are read as plain text
+STAGES = {
+    'cleaning': {'columns': None, 'raw': ['TotalCharges', 'RegistrationDate', 'LastContactDate']},
+    'eda': {'columns': None, 'raw': []},
+    'features': {'columns': None, 'raw': []},
+    'reasoning': {'columns': ['customerID', 'Contract', 'PaymentMethod', 'Churn', 'CLV', 'ARPU',
+                              'Value_Segment', 'Risk_Score', 'Tenure_Segment', 'Engagement_Level'],
+                  'raw': []},
+    'dashboard': {'columns': None, 'raw': []},
+}
+
+
+# read_csv arguments for a stage
+def read_options(stage, header_columns):
+    """Return (usecols, dtype map, date columns) for the columns present in the file"""
+    options = STAGES[stage]
+    columns = [col for col in header_columns if options['columns'] is None or col in options['columns']]
+    dtypes = {}
+    dates = []
+    for col in columns:
+        kind = column_type(col)
+        if kind is None:
+            continue  # Unknown columns keep pandas' inference
+        if col in options['raw'] or kind == 'text':
+            dtypes[col] = 'object'
+        elif kind == 'date':
+            dates.append(col)
+        else:
+            dtypes[col] = kind
+    return columns, dtypes, dates
+
+
+# Load a stage input with the shared schema
+def load_stage_data(path, stage):
+    """Return the typed DataFrame for a stage (only its columns, schema dtypes)"""
+    header_columns = pd.read_csv(path, nrows=0).columns.tolist()
+    columns, dtypes, dates = read_options(stage, header_columns)
+    return pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=dates, date_format=DATE_FORMAT)
+
+
+# Read a stage input chunk by chunk with the shared schema
+def iter_stage_chunks(path, stage, chunksize=100000):
+    """Yield typed DataFrames of at most chunksize rows (same columns and dtypes as load_stage_data)"""
+    header_columns = pd.read_csv(path, nrows=0).columns.tolist()
+    columns, dtypes, dates = read_options(stage, header_columns)
+    yield from pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=dates, date_format=DATE_FORMAT,
+                           chunksize=chunksize)
+
+
+# Parse a date column once per distinct string
+def parse_dates_cached(series, date_format=DATE_FORMAT):
+    """Return (datetime64 Series, boolean mask of rows whose non-missing value failed to parse)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    # Only the distinct strings are parsed (explicit format, no per-row inference)
+    parsed_uniques = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce')
+    # Map back by code; the extra last slot (NaT) serves the missing values (code -1)
+    values = np.append(parsed_uniques.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    parsed = values[np.where(codes < 0, len(values) - 1, codes)]
+    failed = np.isnat(parsed) & (codes >= 0)
+    return pd.Series(parsed, index=series.index, name=series.name), failed
+
+
+# Memory an untyped pd.read_csv(path) would have used for the same data
+def untyped_memory(df):
+    """Estimate the deep memory of the default load (object text, int64, unread columns excluded)"""
+    total = df.index.memory_usage()
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # One pointer per row plus one Python string per row
+            codes = series.cat.codes.to_numpy()
+            sizes = np.array([sys.getsizeof(value) for value in series.cat.categories], dtype=np.int64)
+            counts = np.bincount(codes[codes >= 0], minlength=len(sizes))
+            total += 8 * len(series) + int(np.dot(sizes, counts))
+            # Missing values load as float NaN objects
+            total += sys.getsizeof(float('nan')) * int((codes < 0).sum())
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            # Dates load as 10-character strings
+            total += 8 * len(series) + sys.getsizeof('2024-01-01') * int(series.notna().sum()) \
+                + sys.getsizeof(float('nan')) * int(series.isna().sum())
+        elif pd.api.types.is_integer_dtype(series) or pd.api.types.is_float_dtype(series):
+            total += 8 * len(series)
+        else:
+            total += series.memory_usage(index=False, deep=True)
+    return int(total)
+
+
+# Memory line printed by every stage after loading
+def memory_report(df, stage):
+    """Return a one-line memory summary: untyped load vs. schema load"""
+    before = untyped_memory(df)
+    after = int(df.memory_usage(deep=True).sum())
+    return (f"Memory ({stage}): {before / 1024 ** 2:.2f} MB untyped → {after / 1024 ** 2:.2f} MB with schema "
+            f"({(1 - after / before) * 100:.1f}% less)")
@@ -0,0 +1,178 @@
+"""
+DUPLICATE DETECTION
+Hash-based exact duplicate detection and MinHash/LSH near-duplicate detection:
+  - 64-bit row fingerprints are computed once and reused (within a frame, across chunks/partitions)
+  - near-duplicate customers are found by MinHash signatures + LSH banding, then verified exactly
+Both stay near-linear in the number of rows.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation and hashing
+import numpy as np  # For numerical operations
+
+# Customer attributes compared for re-registration (the customerID itself is excluded)
+NEAR_DUPLICATE_ATTRIBUTES = ['gender', 'SeniorCitizen', 'Partner', 'Dependents', 'City', 'ZipCode',
+                             'PhoneService', 'InternetService', 'PaymentMethod', 'MonthlyCharges']
+
+
+# ==================== FINGERPRINTS & EXACT DUPLICATES ====================
+
+# One 64-bit fingerprint per row (over all columns, or a subset)
+def row_fingerprints(df, columns=None):
+    """Return a uint64 hash per row; equal rows always get equal fingerprints"""
+    frame = df if columns is None else df[columns]
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+# Flag rows whose fingerprint was already seen earlier in the array
+def duplicate_mask(fingerprints):
+    """Return True for every repeat of an earlier fingerprint (first occurrences are False)"""
+    return pd.Series(fingerprints).duplicated().to_numpy()
+
+
+# Membership test against a sorted array
+def _in_sorted(values, sorted_values):
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[positions] == values
+
+
+class DuplicateTracker:
+    """Counts exact duplicates across chunks/partitions from their fingerprints"""
+
+    def __init__(self):
+        self.rows = 0
+        self.duplicates = 0
+        # Seen fingerprints as a few sorted, disjoint runs (merged like a binary counter)
+        self.runs = []
+
+    def _add_run(self, new_values):
+        if len(new_values) == 0:
+            return
+        self.runs.append(new_values)
+        # Keep run sizes geometric so lookups and merges stay O(n log n) overall
+        while len(self.runs) > 1 and len(self.runs[-1]) * 2 >= len(self.runs[-2]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+
+    def _seen(self, values):
+        found = np.zeros(len(values), dtype=bool)
+        for run in self.runs:
+            found |= _in_sorted(values, run)
+        return found
+
+    def update(self, fingerprints):
+        """Add one chunk of fingerprints"""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        unique = np.unique(fingerprints)
+        seen = self._seen(unique)
+        # Repeats inside the chunk + first occurrences already seen in earlier chunks
+        self.duplicates += (len(fingerprints) - len(unique)) + int(seen.sum())
+        self.rows += len(fingerprints)
+        self._add_run(unique[~seen])
+        return self
+
+    def merge(self, other):
+        """Merge the tracker of another chunk/partition"""
+        other_values = np.sort(np.concatenate(other.runs)) if other.runs else np.empty(0, dtype=np.uint64)
+        seen = self._seen(other_values)
+        self.duplicates += other.duplicates + int(seen.sum())
+        self.rows += other.rows
+        self._add_run(other_values[~seen])
+        return self
+
+    @property
+    def distinct(self):
+        """Number of distinct fingerprints seen"""
+        return self.rows - self.duplicates
+
+
+# ==================== MINHASH / LSH NEAR DUPLICATES ====================
+
+# SplitMix64 finalizer: a fast, well-mixed uint64 -> uint64 hash
+def _mix(x):
+    with np.errstate(over='ignore'):
+        z = x + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+# Token matrix: one hashed "column=value" token per row and attribute
+def _token_hashes(df, attributes):
+    tokens = np.empty((len(df), len(attributes)), dtype=np.uint64)
+    for i, col in enumerate(attributes):
+        # Salting with the column position keeps equal values in different columns distinct
+        tokens[:, i] = _mix(pd.util.hash_array(df[col].to_numpy()) ^ np.uint64(i + 1))
+    return tokens
+
+
+# MinHash signatures for every row at once
+def minhash_signatures(tokens, num_perm=60, seed=7):
+    """Return a (rows × num_perm) uint64 signature matrix"""
+    rng = np.random.default_rng(seed)
+    salts = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.int64).astype(np.uint64)
+    signatures = np.empty((len(tokens), num_perm), dtype=np.uint64)
+    for j, salt in enumerate(salts):
+        # Each salted hash acts as one random permutation; keep the minimum token per row
+        signatures[:, j] = _mix(tokens ^ salt).min(axis=1)
+    return signatures
+
+
+# Candidate pairs from LSH banding
+def lsh_candidate_pairs(signatures, bands=10, max_bucket=50):
+    """Return (array of (i, j) candidate pairs, number of oversized buckets skipped)"""
+    rows_per_band = signatures.shape[1] // bands
+    pairs = []
+    skipped = 0
+    for band in range(bands):
+        # Fold the band's signature values into one bucket key per row
+        key = np.full(len(signatures), np.uint64(band))
+        for col in range(band * rows_per_band, (band + 1) * rows_per_band):
+            key = _mix(key ^ signatures[:, col])
+        order = np.argsort(key, kind='stable')
+        sorted_keys = key[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+        # Very common buckets would make the pair count quadratic - skip and report them
+        skipped += int(np.sum(sizes > max_bucket))
+        for start, size in zip(starts[(sizes > 1) & (sizes <= max_bucket)],
+                               sizes[(sizes > 1) & (sizes <= max_bucket)]):
+            members = order[start:start + size]
+            i, j = np.triu_indices(size, k=1)
+            pairs.append(np.column_stack([members[i], members[j]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64), skipped
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0), skipped
+
+
+# Near-duplicate customers (likely re-registrations under a new customerID)
+def near_duplicate_pairs(df, attributes=None, id_column='customerID', threshold=0.8,
+                         num_perm=60, bands=10, max_bucket=50):
+    """Return (DataFrame of verified pairs with similarity, LSH statistics dict)"""
+    attributes = [col for col in (attributes or NEAR_DUPLICATE_ATTRIBUTES) if col in df.columns]
+    tokens = _token_hashes(df, attributes)
+    signatures = minhash_signatures(tokens, num_perm=num_perm)
+    candidates, skipped = lsh_candidate_pairs(signatures, bands=bands, max_bucket=max_bucket)
+
+    # Verify candidates exactly: one token per attribute, so Jaccard = m / (2k - m)
+    matches = (tokens[candidates[:, 0]] == tokens[candidates[:, 1]]).sum(axis=1)
+    similarity = matches / (2 * len(attributes) - matches) if len(attributes) else matches * 0.0
+    keep = similarity >= threshold
+    if id_column in df.columns:
+        ids = df[id_column].to_numpy()
+        keep &= ids[candidates[:, 0]] != ids[candidates[:, 1]]
+    else:
+        ids = np.arange(len(df))
+    pairs = candidates[keep]
+
+    result = pd.DataFrame({
+        f'{id_column}_A': ids[pairs[:, 0]],
+        f'{id_column}_B': ids[pairs[:, 1]],
+        'Matching_Attributes': matches[keep],
+        'Jaccard_Similarity': similarity[keep]
+    }).sort_values('Jaccard_Similarity', ascending=False, kind='stable')
+    stats = {'attributes': attributes, 'candidates': len(candidates), 'skipped_buckets': skipped}
+    return result.reset_index(drop=True), stats
@@ -1,15 +1,37 @@
 # Import required libraries
 import pandas as pd  # For data manipulation
 import numpy as np  # For numerical operations
-import matplotlib.pyplot as plt  # For creating visualizations
-import seaborn as sns  # For statistical visualizations
 import os  # For file operations
+import argparse  # For command-line options
 from datetime import datetime  # For timestamps
+from data_schema import load_stage_data, iter_stage_chunks, memory_report, is_bitmask_column  # Shared loader
+from sampling import StratifiedReservoir, ratio_estimate, Z_95  # Sample mode
+from churn_cube import ChurnCube, bivariate_churn, mutual_information  # Churn counts by any combination of dimensions (bincount)
+from profiling_sketches import CovarianceSketch, strong_pairs  # Mergeable correlation matrix
+from significance_tests import significance_table  # Chi-square / Mann-Whitney / KS from contingency tables
+from segment_discovery import discover_segments  # 2-/3-way segments from condition bitmaps
+from chart_rendering import (setup_style, render_charts, histogram_summary,
+                             DEFAULT_DPI, PREVIEW_DPI)  # Parallel, cached charts from binned summaries
+
+# Command-line options (defaults reproduce the full-quality PNGs)
+parser = argparse.ArgumentParser(description="Stage 5: exploratory data analysis")
+parser.add_argument('--dpi', type=int, default=None,
+                    help=f"Chart resolution (default {DEFAULT_DPI}, preview {PREVIEW_DPI})")
+parser.add_argument('--format', default='png', help="Chart file format (png, svg, pdf, ...)")
+parser.add_argument('--preview', action='store_true',
+                    help="Low-resolution charts in a preview/ subfolder (final charts untouched)")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Chart rendering processes (default: one per CPU)")
+parser.add_argument('--no-cache', action='store_true', help="Redraw every chart even if its inputs are unchanged")
+parser.add_argument('--sample', action='store_true',
+                    help="Fast EDA on a stratified sample (Churn × Contract) drawn in one streaming pass, "
+                         "churn rates with 95%% confidence intervals")
+parser.add_argument('--sample-size', type=int, default=10000, help="Sample size in --sample mode")
+parser.add_argument('--chunksize', type=int, default=100000, help="Rows read per chunk in --sample mode")
+args = parser.parse_args()
 
 # Set visualization style for consistent, professional appearance
-sns.set_style("whitegrid")  # Use white background with grid lines
-plt.rcParams['figure.figsize'] = (10, 6)  # Default figure size
-plt.rcParams['font.size'] = 10  # Default font size
+setup_style()
 
 # Print header
 print("=" * 80)
@@ -20,7 +42,18 @@ print()
 # Define file paths
 input_path = "data/processed/clean_churn_data.csv"
 viz_dir = "outputs/visualizations"
-findings_path = "outputs/reports/eda_findings.txt"
+if args.sample:
+    viz_dir = f"{viz_dir}/sample"
+if args.preview:
+    viz_dir = f"{viz_dir}/preview"
+chart_dpi = args.dpi or (PREVIEW_DPI if args.preview else DEFAULT_DPI)
+# Sample mode writes next to (never over) the full-data reports
+suffix = "_sample" if args.sample else ""
+findings_path = f"outputs/reports/eda_findings{suffix}.txt"
+lift_path = f"outputs/reports/churn_lift_by_value{suffix}.csv"
+significance_path = f"outputs/reports/churn_significance_tests{suffix}.csv"
+segments_path = f"outputs/reports/churn_segments{suffix}.csv"
+mi_path = f"outputs/reports/churn_mutual_information{suffix}.csv"
 
 # Check if input file exists
 if not os.path.exists(input_path):
@@ -30,16 +63,57 @@ if not os.path.exists(input_path):
 
 # Create visualizations directory if it doesn't exist
 os.makedirs(viz_dir, exist_ok=True)
+os.makedirs(os.path.dirname(lift_path), exist_ok=True)
 print(f"📁 Visualizations will be saved to: {viz_dir}")
 print()
 
-# Load the clean dataset
-print("📂 Loading clean dataset...")
-df = pd.read_csv(input_path)
-print(f"✅ Dataset loaded: {input_path}")
+if args.sample:
+    # One streaming pass: every chunk feeds a bottom-k reservoir per stratum (Churn × Contract);
+    # proportional allocation once the stratum sizes are known
+    print(f"📂 Sampling clean dataset ({args.sample_size:,} rows, stratified by Churn × Contract)...")
+    reservoir = StratifiedReservoir(['Churn', 'Contract'], capacity=args.sample_size)
+    for chunk in iter_stage_chunks(input_path, 'eda', chunksize=args.chunksize):
+        reservoir.update(chunk)
+    df, sample_codes, population_sizes, sample_sizes, strata = reservoir.sample(args.sample_size)
+    design = (sample_codes, population_sizes, sample_sizes)
+    # Design weight of a sampled customer = stratum size / stratum sample size
+    design_weights = (population_sizes / np.maximum(sample_sizes, 1))[sample_codes]
+    population = int(population_sizes.sum())
+    sample_note = f"Stratified sample: {len(df):,} of {population:,} customers (Churn × Contract)"
+    print(f"✅ Sample drawn: {len(df):,} of {population:,} rows in {len(strata)} strata from {input_path}")
+else:
+    # Load the clean dataset
+    print("📂 Loading clean dataset...")
+    df = load_stage_data(input_path, 'eda')
+    design, design_weights, population, sample_note = None, None, len(df), None
+    print(f"✅ Dataset loaded: {input_path}")
 print(f"   Shape: {df.shape[0]} rows × {df.shape[1]} columns")
+print(f"   {memory_report(df, 'eda')}")
 print()
 
+# Count labels in sample mode: design-weighted counts estimate the population, the rest count sampled rows
+population_label = " (estimated population)" if sample_note else ""
+sample_label = " (sample)" if sample_note else ""
+
+churn_flag = (df['Churn'] == 'Yes').to_numpy()
+
+
+# Churn rate (%) of a group of customers, and its 95% CI note in sample mode (design-based estimate)
+def churn_rate_estimate(mask):
+    mask = np.asarray(mask, dtype=bool)
+    if design is None:
+        return (churn_flag[mask].mean() * 100 if mask.any() else np.nan), ""
+    estimate, se = ratio_estimate(churn_flag, mask, *design)
+    if round(Z_95 * se * 100, 2) == 0:  # Exact up to rounding
+        return estimate * 100, " (exact: fixed by the Churn × Contract strata)"
+    return estimate * 100, f" (±{Z_95 * se * 100:.2f}, 95% CI)"
+
+
+# CI note only (empty on the full data)
+def ci_note(mask):
+    return churn_rate_estimate(mask)[1] if design is not None else ""
+
+
 # Initialize findings list to document key observations
 findings = []
 findings.append("=" * 80)
@@ -48,9 +122,18 @@ findings.append("=" * 80)
 findings.append("")
 findings.append(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 findings.append(f"Dataset: {input_path}")
-findings.append(f"Total Customers: {len(df):,}")
+findings.append(f"Total Customers: {population:,}")
+if sample_note:
+    findings.append(f"Mode: {sample_note}")
+    findings.append("  Churn rates are design-weighted estimates with 95% CIs; every count and statistic is")
+    findings.append("  labelled (estimated population) when design-weighted or (sample) when taken from the sample")
+    findings.append("  Significance tests use the unweighted sample counts")
 findings.append("")
 
+# Chart specs (name, renderer, aggregated data) collected along the way and rendered together at the end;
+# distributions are passed as histogram counts, never as full columns
+charts = []
+
 # ==================== PART 1: DATASET OVERVIEW ====================
 print("-" * 80)
 print("PART 1: DATASET OVERVIEW")
@@ -61,14 +144,14 @@ findings.append("PART 1: DATASET OVERVIEW")
 findings.append("-" * 80)
 
 # Display basic information about the dataset
-print(f"Total Customers: {len(df):,}")
+print(f"Total Customers: {population:,}" + (f" (sample: {len(df):,})" if sample_note else ""))
 print(f"Total Features: {len(df.columns)}")
 print()
 
 # Display summary statistics for numeric columns
-numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if not is_bitmask_column(col)]
 print(f"Numeric columns: {len(numeric_cols)}")
-print("\nSummary Statistics (Numeric Columns):")
+print(f"\nSummary Statistics (Numeric Columns){sample_label}:")
 print(df[numeric_cols].describe())
 findings.append(f"Numeric Features: {len(numeric_cols)}")
 findings.append("")
@@ -85,52 +168,31 @@ findings.append("PART 2: CHURN ANALYSIS")
 findings.append("-" * 80)
 
 # Calculate churn rate
-churn_counts = df['Churn'].value_counts()
-churn_percentages = df['Churn'].value_counts(normalize=True) * 100
+if design_weights is None:
+    churn_counts = df['Churn'].value_counts()
+    churn_percentages = df['Churn'].value_counts(normalize=True) * 100
+else:
+    # Estimated population counts: design weights summed per class
+    churn_counts = (pd.Series(design_weights).groupby(df['Churn'].to_numpy()).sum()
+                    .round().astype(np.int64).sort_values(ascending=False))
+    churn_percentages = churn_counts / churn_counts.sum() * 100
 
 print("Churn Distribution:")
 for value, count in churn_counts.items():
     pct = churn_percentages[value]
-    print(f"  {value}: {count:,} customers ({pct:.2f}%)")
+    print(f"  {value}: {count:,} customers{population_label} ({pct:.2f}%)")
 
 # Store overall churn rate for findings
 overall_churn_rate = churn_percentages.get('Yes', 0)
-findings.append(f"Overall Churn Rate: {overall_churn_rate:.2f}%")
-findings.append(f"  Churned: {churn_counts.get('Yes', 0):,} customers")
-findings.append(f"  Retained: {churn_counts.get('No', 0):,} customers")
+findings.append(f"Overall Churn Rate: {overall_churn_rate:.2f}%{ci_note(np.ones(len(df), dtype=bool))}")
+findings.append(f"  Churned: {churn_counts.get('Yes', 0):,} customers{population_label}")
+findings.append(f"  Retained: {churn_counts.get('No', 0):,} customers{population_label}")
 findings.append("")
 
 print()
 
 # Visualization 1: Churn Distribution (Pie Chart)
-print("📊 Creating visualization: Churn Distribution...")
-fig, ax = plt.subplots(figsize=(8, 6))
-
-# Create pie chart with custom colors
-colors = ['#2ecc71', '#e74c3c']  # Green for No, Red for Yes
-wedges, texts, autotexts = ax.pie(
-    churn_counts.values,  # Values to plot
-    labels=churn_counts.index,  # Labels (Yes, No)
-    autopct='%1.1f%%',  # Show percentages with 1 decimal
-    startangle=90,  # Start from top
-    colors=colors,  # Custom colors
-    explode=(0, 0.1)  # Slightly separate the "Yes" slice for emphasis
-)
-
-# Make percentage text bold and white
-for autotext in autotexts:
-    autotext.set_color('white')  # White text on colored background
-    autotext.set_fontsize(12)  # Larger font for readability
-    autotext.set_weight('bold')  # Bold text
-
-# Add title
-ax.set_title('Customer Churn Distribution', fontsize=14, fontweight='bold', pad=20)
-
-# Save figure
-plt.tight_layout()  # Adjust spacing to prevent label cutoff
-plt.savefig(f'{viz_dir}/churn_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()  # Close figure to free memory
-print(f"   ✅ Saved: {viz_dir}/churn_distribution.png")
+charts.append({'name': 'churn_distribution', 'chart': 'churn_distribution', 'data': {'counts': churn_counts}})
 print()
 
 # ==================== PART 3: UNIVARIATE ANALYSIS - NUMERIC VARIABLES ====================
@@ -141,6 +203,10 @@ print("-" * 80)
 findings.append("-" * 80)
 findings.append("PART 3: KEY NUMERIC VARIABLE DISTRIBUTIONS")
 findings.append("-" * 80)
+if sample_note:
+    # Means, medians and ranges below are unweighted statistics of the sampled customers
+    print("Statistics of the sampled customers (unweighted)")
+    findings.append("Statistics of the sampled customers (unweighted)")
 
 # Analyze key numeric variables: tenure, MonthlyCharges, TotalCharges
 
@@ -155,29 +221,10 @@ findings.append(f"  Average: {df['tenure'].mean():.1f} months")
 findings.append(f"  Median: {df['tenure'].median():.1f} months")
 findings.append(f"  Range: {df['tenure'].min()}-{df['tenure'].max()} months")
 
-# Visualization 2: Tenure Distribution
-print("📊 Creating visualization: Tenure Distribution...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Create histogram with KDE (kernel density estimate) curve
-ax.hist(df['tenure'], bins=30, color='steelblue', alpha=0.7, edgecolor='black')
-
-# Add vertical lines for mean and median
-ax.axvline(df['tenure'].mean(), color='red', linestyle='--', linewidth=2, label=f"Mean: {df['tenure'].mean():.1f}")
-ax.axvline(df['tenure'].median(), color='green', linestyle='--', linewidth=2, label=f"Median: {df['tenure'].median():.1f}")
-
-# Labels and title
-ax.set_xlabel('Tenure (Months)', fontsize=12)
-ax.set_ylabel('Number of Customers', fontsize=12)
-ax.set_title('Distribution of Customer Tenure', fontsize=14, fontweight='bold')
-ax.legend()  # Show legend with mean/median lines
-ax.grid(True, alpha=0.3)  # Add light grid
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/tenure_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/tenure_distribution.png")
+# Visualization 2: Tenure Distribution (histogram with mean and median lines)
+charts.append({'name': 'tenure_distribution', 'chart': 'tenure_distribution',
+               'data': {'histogram': histogram_summary(df['tenure'], bins=30),
+                        'mean': df['tenure'].mean(), 'median': df['tenure'].median()}})
 
 # --- MonthlyCharges Analysis ---
 print("\n📊 Analyzing: MonthlyCharges")
@@ -199,32 +246,12 @@ findings.append(f"  Average: ${df['TotalCharges'].mean():.2f}")
 findings.append(f"  Median: ${df['TotalCharges'].median():.2f}")
 
 # Visualization 3: Charges Distribution (side-by-side)
-print("📊 Creating visualization: Charges Distribution...")
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-
-# Subplot 1: MonthlyCharges
-axes[0].hist(df['MonthlyCharges'], bins=30, color='coral', alpha=0.7, edgecolor='black')
-axes[0].axvline(df['MonthlyCharges'].mean(), color='red', linestyle='--', linewidth=2, label=f"Mean: ${df['MonthlyCharges'].mean():.2f}")
-axes[0].set_xlabel('Monthly Charges ($)', fontsize=11)
-axes[0].set_ylabel('Number of Customers', fontsize=11)
-axes[0].set_title('Monthly Charges Distribution', fontsize=12, fontweight='bold')
-axes[0].legend()
-axes[0].grid(True, alpha=0.3)
-
-# Subplot 2: TotalCharges
-axes[1].hist(df['TotalCharges'], bins=30, color='mediumpurple', alpha=0.7, edgecolor='black')
-axes[1].axvline(df['TotalCharges'].mean(), color='red', linestyle='--', linewidth=2, label=f"Mean: ${df['TotalCharges'].mean():.2f}")
-axes[1].set_xlabel('Total Charges ($)', fontsize=11)
-axes[1].set_ylabel('Number of Customers', fontsize=11)
-axes[1].set_title('Total Charges Distribution', fontsize=12, fontweight='bold')
-axes[1].legend()
-axes[1].grid(True, alpha=0.3)
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/charges_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/charges_distribution.png")
+charts.append({'name': 'charges_distribution', 'chart': 'charges_distribution', 'data': {'panels': [
+    {'histogram': histogram_summary(df['MonthlyCharges'], bins=30), 'mean': df['MonthlyCharges'].mean(),
+     'color': 'coral', 'xlabel': 'Monthly Charges ($)', 'title': 'Monthly Charges Distribution'},
+    {'histogram': histogram_summary(df['TotalCharges'], bins=30), 'mean': df['TotalCharges'].mean(),
+     'color': 'mediumpurple', 'xlabel': 'Total Charges ($)', 'title': 'Total Charges Distribution'},
+]}})
 
 findings.append("")
 print()
@@ -238,135 +265,143 @@ findings.append("-" * 80)
 findings.append("PART 4: CHURN DRIVERS ANALYSIS")
 findings.append("-" * 80)
 
+# Create tenure bins (0-12, 13-24, 25-48, 49-72 months)
+df['TenureGroup'] = pd.cut(
+    df['tenure'],  # Column to bin
+    bins=[0, 12, 24, 48, 72],  # Bin edges
+    labels=['0-12 months', '13-24 months', '25-48 months', '49-72 months']  # Bin labels
+)
+
+# Churn cube: Churn encoded once as 0/1, one bincount over the combined dimension codes;
+# every churn rate below is a sum over the cube's other axes (no per-group Python calls)
+cube = ChurnCube(df, ['Contract', 'TenureGroup', 'PaymentMethod', 'InternetService'], weights=design_weights)
+print(f"🧊 Churn cube: {' × '.join(cube.dimensions)} ({np.prod(cube.shape):,} cells, one pass)")
+
 # --- Churn by Contract Type ---
 print("\n📊 Analyzing: Churn by Contract Type")
 
 # Calculate churn rate for each contract type
-churn_by_contract = df.groupby('Contract')['Churn'].apply(lambda x: (x == 'Yes').sum() / len(x) * 100)
+contract_counts = cube.counts('Contract')
+churn_by_contract = contract_counts['Churn_Rate']
 print("Churn Rate by Contract Type:")
 for contract, rate in churn_by_contract.items():
-    print(f"  {contract}: {rate:.2f}%")
+    print(f"  {contract}: {rate:.2f}%{ci_note(df['Contract'] == contract)}")
 
 findings.append("\nChurn by Contract Type:")
 for contract, rate in churn_by_contract.items():
-    findings.append(f"  {contract}: {rate:.2f}%")
+    findings.append(f"  {contract}: {rate:.2f}%{ci_note(df['Contract'] == contract)}")
 
 # Visualization 4: Churn Rate by Contract Type
-print("📊 Creating visualization: Churn by Contract Type...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Create grouped bar chart
-contract_churn = df.groupby(['Contract', 'Churn']).size().unstack()
+# Grouped bar chart (retained / churned customers per contract, from the cube)
+contract_churn = pd.DataFrame({'No': contract_counts['Customers'] - contract_counts['Churned'],
+                               'Yes': contract_counts['Churned']})
 contract_churn_pct = contract_churn.div(contract_churn.sum(axis=1), axis=0) * 100
-
-# Plot bars
-contract_churn_pct.plot(kind='bar', ax=ax, color=['#2ecc71', '#e74c3c'], alpha=0.8)
-
-# Labels and formatting
-ax.set_xlabel('Contract Type', fontsize=12)
-ax.set_ylabel('Percentage (%)', fontsize=12)
-ax.set_title('Churn Rate by Contract Type', fontsize=14, fontweight='bold')
-ax.legend(title='Churn', labels=['No', 'Yes'])
-ax.set_xticklabels(ax.get_xticklabels(), rotation=0)  # Horizontal labels
-ax.grid(True, alpha=0.3, axis='y')
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/churn_by_contract.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/churn_by_contract.png")
+charts.append({'name': 'churn_by_contract', 'chart': 'churn_by_contract', 'data': {'percentages': contract_churn_pct}})
 
 # --- Churn by Tenure (Binned) ---
 print("\n📊 Analyzing: Churn by Tenure Groups")
 
-# Create tenure bins (0-12, 13-24, 25-48, 49-72 months)
-df['TenureGroup'] = pd.cut(
-    df['tenure'],  # Column to bin
-    bins=[0, 12, 24, 48, 72],  # Bin edges
-    labels=['0-12 months', '13-24 months', '25-48 months', '49-72 months']  # Bin labels
-)
-
 # Calculate churn rate for each tenure group
-churn_by_tenure = df.groupby('TenureGroup')['Churn'].apply(lambda x: (x == 'Yes').sum() / len(x) * 100)
+churn_by_tenure = cube.churn_rate('TenureGroup')
 print("Churn Rate by Tenure Group:")
 for group, rate in churn_by_tenure.items():
-    print(f"  {group}: {rate:.2f}%")
+    print(f"  {group}: {rate:.2f}%{ci_note(df['TenureGroup'] == group)}")
 
 findings.append("\nChurn by Tenure:")
 for group, rate in churn_by_tenure.items():
-    findings.append(f"  {group}: {rate:.2f}%")
+    findings.append(f"  {group}: {rate:.2f}%{ci_note(df['TenureGroup'] == group)}")
 
 # Visualization 5: Churn Rate by Tenure Group
-print("📊 Creating visualization: Churn by Tenure...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Create bar chart
-churn_by_tenure.plot(kind='bar', ax=ax, color='steelblue', alpha=0.8)
-
-# Labels and formatting
-ax.set_xlabel('Tenure Group', fontsize=12)
-ax.set_ylabel('Churn Rate (%)', fontsize=12)
-ax.set_title('Churn Rate by Customer Tenure', fontsize=14, fontweight='bold')
-ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-ax.grid(True, alpha=0.3, axis='y')
-
-# Add value labels on top of bars
-for i, v in enumerate(churn_by_tenure.values):
-    ax.text(i, v + 1, f'{v:.1f}%', ha='center', fontsize=10, fontweight='bold')
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/churn_by_tenure.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/churn_by_tenure.png")
+charts.append({'name': 'churn_by_tenure', 'chart': 'churn_by_tenure', 'data': {'rates': churn_by_tenure}})
 
 # --- Churn by Payment Method ---
 print("\n📊 Analyzing: Churn by Payment Method")
 
-churn_by_payment = df.groupby('PaymentMethod')['Churn'].apply(lambda x: (x == 'Yes').sum() / len(x) * 100)
+churn_by_payment = cube.churn_rate('PaymentMethod')
 print("Churn Rate by Payment Method:")
 for method, rate in churn_by_payment.items():
-    print(f"  {method}: {rate:.2f}%")
+    print(f"  {method}: {rate:.2f}%{ci_note(df['PaymentMethod'] == method)}")
 
 findings.append("\nChurn by Payment Method:")
 for method, rate in churn_by_payment.items():
-    findings.append(f"  {method}: {rate:.2f}%")
-
-# Visualization 6: Churn by Payment Method
-print("📊 Creating visualization: Churn by Payment Method...")
-fig, ax = plt.subplots(figsize=(10, 6))
+    findings.append(f"  {method}: {rate:.2f}%{ci_note(df['PaymentMethod'] == method)}")
 
-# Sort by churn rate for better visualization
+# Visualization 6: Churn by Payment Method (sorted by churn rate for better visualization)
 churn_by_payment_sorted = churn_by_payment.sort_values(ascending=False)
-churn_by_payment_sorted.plot(kind='barh', ax=ax, color='coral', alpha=0.8)
-
-# Labels and formatting
-ax.set_xlabel('Churn Rate (%)', fontsize=12)
-ax.set_ylabel('Payment Method', fontsize=12)
-ax.set_title('Churn Rate by Payment Method', fontsize=14, fontweight='bold')
-ax.grid(True, alpha=0.3, axis='x')
-
-# Add value labels
-for i, v in enumerate(churn_by_payment_sorted.values):
-    ax.text(v + 0.5, i, f'{v:.1f}%', va='center', fontsize=10, fontweight='bold')
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/churn_by_payment_method.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/churn_by_payment_method.png")
+charts.append({'name': 'churn_by_payment_method', 'chart': 'churn_by_payment_method',
+               'data': {'rates': churn_by_payment_sorted}})
 
 # --- Churn by Internet Service ---
 print("\n📊 Analyzing: Churn by Internet Service Type")
 
-churn_by_internet = df.groupby('InternetService')['Churn'].apply(lambda x: (x == 'Yes').sum() / len(x) * 100)
+churn_by_internet = cube.churn_rate('InternetService')
 print("Churn Rate by Internet Service:")
 for service, rate in churn_by_internet.items():
-    print(f"  {service}: {rate:.2f}%")
+    print(f"  {service}: {rate:.2f}%{ci_note(df['InternetService'] == service)}")
 
 findings.append("\nChurn by Internet Service:")
 for service, rate in churn_by_internet.items():
-    findings.append(f"  {service}: {rate:.2f}%")
+    findings.append(f"  {service}: {rate:.2f}%{ci_note(df['InternetService'] == service)}")
+
+# --- Churn by every categorical column ---
+print("\n📊 Analyzing: Churn by every categorical column")
+
+# All text/category/bool columns plus low-cardinality integer codes (e.g. SeniorCitizen, FailedPayments);
+# one shared pass: every column's codes are bincounted together (cost ~ rows × columns)
+categorical_cols = [col for col in df.select_dtypes(include=['category', 'object', 'bool']).columns
+                    if col not in ['customerID', 'Churn']]
+categorical_cols += [col for col in df.select_dtypes(include=['integer']).columns
+                     if not is_bitmask_column(col) and df[col].nunique() <= 10]
+lift_table = bivariate_churn(df, categorical_cols, weights=design_weights)
+lift_table.to_csv(lift_path, index=False, float_format='%.4f')
+print(f"Columns analyzed: {len(categorical_cols)} ({len(lift_table):,} values)")
+
+# Values covering at least 1% of customers, ranked by lift (churn rate / overall churn rate)
+supported = lift_table[lift_table['Share'] >= 1]
+print("Highest churn lift (values with ≥ 1% of customers):")
+for _, row in supported.head(10).iterrows():
+    print(f"  {row['Column']} = {row['Value']}: {row['Churn_Rate']:.2f}% churn, "
+          f"lift {row['Lift']:.2f}, {row['Customers']:,.0f} customers{population_label} ({row['Share']:.1f}%)")
+print("Lowest churn lift:")
+for _, row in supported.tail(5).iloc[::-1].iterrows():
+    print(f"  {row['Column']} = {row['Value']}: {row['Churn_Rate']:.2f}% churn, "
+          f"lift {row['Lift']:.2f}, {row['Customers']:,.0f} customers{population_label} ({row['Share']:.1f}%)")
+print(f"   ✅ Saved: {lift_path}")
+
+findings.append(f"\nChurn Lift by Value ({len(categorical_cols)} categorical columns, values with ≥ 1% of customers):")
+for _, row in supported.head(10).iterrows():
+    findings.append(f"  {row['Column']} = {row['Value']}: {row['Churn_Rate']:.2f}% (lift {row['Lift']:.2f}, "
+                    f"{row['Customers']:,.0f} customers{population_label})")
+findings.append(f"  Full table: {lift_path}")
+
+# --- Significance of every feature ---
+print("\n📊 Analyzing: Significance of churn differences")
+
+# Chi-square / Cramér's V from the lift table's per-value counts (categorical columns), and
+# Mann-Whitney U / KS from distinct value × churn counts (numeric columns; ZipCode is a location code)
+test_numeric_cols = [col for col in numeric_cols if col not in categorical_cols and col != 'ZipCode']
+# The tests need observed counts: in sample mode the lift table holds design-weighted (population)
+# counts, which would inflate chi-square by the weight factor, so the categorical tests use the
+# unweighted sample counts - the same basis as the numeric tests
+test_table = lift_table if design_weights is None else bivariate_churn(df, categorical_cols)
+significance = significance_table(df, test_table, test_numeric_cols)
+significance.to_csv(significance_path, index=False)
+significant = significance[significance['Significant']]
+print(f"Tests: {len(significance)} ({len(significant)} significant at α = 0.05, Bonferroni-corrected)")
+for _, row in significance.head(10).iterrows():
+    print(f"  {row['Feature']} ({row['Test']}): p = {row['P_Value']:.2e}, "
+          f"{row['Effect_Measure']} = {row['Effect']:.3f}")
+not_significant = significance.loc[~significance['Significant'], 'Feature'].unique().tolist()
+print(f"Not significant: {', '.join(not_significant) if not_significant else 'none'}")
+print(f"   ✅ Saved: {significance_path}")
+
+findings.append(f"\nStatistical Significance ({len(significant)} of {len(significance)} tests significant, "
+                f"α = 0.05 Bonferroni-corrected):")
+for _, row in significance.head(10).iterrows():
+    findings.append(f"  {row['Feature']} ({row['Test']}): p = {row['P_Value']:.2e}, "
+                    f"{row['Effect_Measure']} = {row['Effect']:.3f}")
+findings.append(f"  Not significant: {', '.join(not_significant) if not_significant else 'none'}")
+findings.append(f"  Full table: {significance_path}")
 
 findings.append("")
 print()
@@ -390,53 +425,29 @@ available_numeric = [col for col in key_numeric if col in df.columns]
 additional_cols = [col for col in ['TotalPayments', 'TotalPaid'] if col in df.columns]
 available_numeric.extend(additional_cols)
 
-# Calculate correlation matrix
-correlation_matrix = df[available_numeric].corr()
+# Calculate correlation matrix with the mergeable covariance sketch (pairwise Welford/Chan moments);
+# the same sketch can be filled chunk by chunk or per partition and merged
+covariance = CovarianceSketch(available_numeric).update(df)
+correlation_matrix = covariance.correlation()
 
-print("Correlation Matrix (Key Numeric Variables):")
+print(f"Correlation Matrix (Key Numeric Variables){sample_label}:")
 print(correlation_matrix)
 print()
 
 # Identify strong correlations (absolute value > 0.7)
 print("Strong Correlations (|r| > 0.7):")
-strong_corr_found = False
-for i in range(len(correlation_matrix.columns)):
-    for j in range(i+1, len(correlation_matrix.columns)):
-        corr_value = correlation_matrix.iloc[i, j]
-        if abs(corr_value) > 0.7:
-            print(f"  {correlation_matrix.columns[i]} <-> {correlation_matrix.columns[j]}: {corr_value:.3f}")
-            findings.append(f"Strong correlation: {correlation_matrix.columns[i]} <-> {correlation_matrix.columns[j]} (r={corr_value:.3f})")
-            strong_corr_found = True
-
-if not strong_corr_found:
+# Upper-triangle mask: each pair once, no Python loop over the matrix
+strong_corr = strong_pairs(correlation_matrix, threshold=0.7)
+for _, pair in strong_corr.iterrows():
+    print(f"  {pair['Column_1']} <-> {pair['Column_2']}: {pair['r']:.3f}")
+    findings.append(f"Strong correlation: {pair['Column_1']} <-> {pair['Column_2']} (r={pair['r']:.3f})")
+
+if len(strong_corr) == 0:
     print("  No strong correlations found")
     findings.append("No strong correlations (|r| > 0.7) found among key variables")
 
 # Visualization 7: Correlation Heatmap
-print("\n📊 Creating visualization: Correlation Heatmap...")
-fig, ax = plt.subplots(figsize=(10, 8))
-
-# Create heatmap with annotations
-sns.heatmap(
-    correlation_matrix,  # Data to plot
-    annot=True,  # Show correlation values in cells
-    fmt='.2f',  # Format numbers to 2 decimal places
-    cmap='coolwarm',  # Color scheme (blue=negative, red=positive)
-    center=0,  # Center color scale at 0
-    square=True,  # Make cells square
-    linewidths=0.5,  # Lines between cells
-    cbar_kws={"shrink": 0.8},  # Colorbar settings
-    ax=ax
-)
-
-# Title
-ax.set_title('Correlation Heatmap - Numeric Variables', fontsize=14, fontweight='bold', pad=20)
-
-# Save figure
-plt.tight_layout()
-plt.savefig(f'{viz_dir}/correlation_heatmap.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   ✅ Saved: {viz_dir}/correlation_heatmap.png")
+charts.append({'name': 'correlation_heatmap', 'chart': 'correlation_heatmap', 'data': {'matrix': correlation_matrix}})
 
 findings.append("")
 print()
@@ -453,43 +464,64 @@ findings.append("-" * 80)
 # Define high-risk segment: Month-to-month contract + High monthly charges
 high_risk_mask = (df['Contract'] == 'Month-to-month') & (df['MonthlyCharges'] > df['MonthlyCharges'].median())
 high_risk_customers = df[high_risk_mask]
-high_risk_churn_rate = (high_risk_customers['Churn'] == 'Yes').sum() / len(high_risk_customers) * 100
+high_risk_churn_rate, high_risk_ci = churn_rate_estimate(high_risk_mask)
 
 print(f"\nHigh-Risk Segment 1: Month-to-month + High Charges")
-print(f"  Customers: {len(high_risk_customers):,} ({len(high_risk_customers)/len(df)*100:.1f}% of total)")
-print(f"  Churn Rate: {high_risk_churn_rate:.2f}%")
+print(f"  Customers: {len(high_risk_customers):,}{sample_label} ({len(high_risk_customers)/len(df)*100:.1f}% of total)")
+print(f"  Churn Rate: {high_risk_churn_rate:.2f}%{high_risk_ci}")
 
 findings.append("\nSegment 1: Month-to-month contracts + High monthly charges")
-findings.append(f"  Size: {len(high_risk_customers):,} customers ({len(high_risk_customers)/len(df)*100:.1f}%)")
-findings.append(f"  Churn Rate: {high_risk_churn_rate:.2f}%")
+findings.append(f"  Size: {len(high_risk_customers):,} customers{sample_label} ({len(high_risk_customers)/len(df)*100:.1f}%)")
+findings.append(f"  Churn Rate: {high_risk_churn_rate:.2f}%{high_risk_ci}")
 
 # Define high-risk segment 2: Low tenure + No tech support (if TechSupport column exists)
 if 'TechSupport' in df.columns:
     low_tenure_no_support_mask = (df['tenure'] < 12) & (df['TechSupport'] == 'No')
     low_tenure_no_support = df[low_tenure_no_support_mask]
-    low_tenure_churn_rate = (low_tenure_no_support['Churn'] == 'Yes').sum() / len(low_tenure_no_support) * 100
+    low_tenure_churn_rate, low_tenure_ci = churn_rate_estimate(low_tenure_no_support_mask)
 
     print(f"\nHigh-Risk Segment 2: New Customers (tenure < 12 months) + No Tech Support")
-    print(f"  Customers: {len(low_tenure_no_support):,} ({len(low_tenure_no_support)/len(df)*100:.1f}% of total)")
-    print(f"  Churn Rate: {low_tenure_churn_rate:.2f}%")
+    print(f"  Customers: {len(low_tenure_no_support):,}{sample_label} ({len(low_tenure_no_support)/len(df)*100:.1f}% of total)")
+    print(f"  Churn Rate: {low_tenure_churn_rate:.2f}%{low_tenure_ci}")
 
     findings.append("\nSegment 2: New customers (tenure < 12 months) + No tech support")
-    findings.append(f"  Size: {len(low_tenure_no_support):,} customers ({len(low_tenure_no_support)/len(df)*100:.1f}%)")
-    findings.append(f"  Churn Rate: {low_tenure_churn_rate:.2f}%")
+    findings.append(f"  Size: {len(low_tenure_no_support):,} customers{sample_label} ({len(low_tenure_no_support)/len(df)*100:.1f}%)")
+    findings.append(f"  Churn Rate: {low_tenure_churn_rate:.2f}%{low_tenure_ci}")
 
 # Low-risk segment: Long tenure + Two-year contract
 low_risk_mask = (df['Contract'] == 'Two year') & (df['tenure'] > 48)
 low_risk_customers = df[low_risk_mask]
 if len(low_risk_customers) > 0:
-    low_risk_churn_rate = (low_risk_customers['Churn'] == 'Yes').sum() / len(low_risk_customers) * 100
+    low_risk_churn_rate, low_risk_ci = churn_rate_estimate(low_risk_mask)
 
     print(f"\nLow-Risk Segment: Two-year Contract + Long Tenure (>48 months)")
-    print(f"  Customers: {len(low_risk_customers):,} ({len(low_risk_customers)/len(df)*100:.1f}% of total)")
-    print(f"  Churn Rate: {low_risk_churn_rate:.2f}%")
+    print(f"  Customers: {len(low_risk_customers):,}{sample_label} ({len(low_risk_customers)/len(df)*100:.1f}% of total)")
+    print(f"  Churn Rate: {low_risk_churn_rate:.2f}%{low_risk_ci}")
 
     findings.append("\nLow-Risk Segment: Two-year contracts + Long tenure (>48 months)")
-    findings.append(f"  Size: {len(low_risk_customers):,} customers ({len(low_risk_customers)/len(df)*100:.1f}%)")
-    findings.append(f"  Churn Rate: {low_risk_churn_rate:.2f}%")
+    findings.append(f"  Size: {len(low_risk_customers):,} customers{sample_label} ({len(low_risk_customers)/len(df)*100:.1f}%)")
+    findings.append(f"  Churn Rate: {low_risk_churn_rate:.2f}%{low_risk_ci}")
+
+# Discovered segments: every 2- and 3-way combination of categorical values and numeric quartile bins,
+# scored with per-condition bitmaps and popcounts (combinations under 2% of customers are pruned)
+segments = discover_segments(df, categorical_cols, test_numeric_cols, min_support=0.02, top_k=25)
+segments.to_csv(segments_path, index=False, float_format='%.4f')
+
+# Segment discovery counts sampled rows: sample sizes and unweighted churn rates in sample mode
+segment_label = " - sample counts, unweighted churn rates" if sample_note else ""
+print(f"\nDiscovered High-Churn Segments (2-3 conditions, ≥ 2% of customers{segment_label}):")
+for _, segment in segments.head(10).iterrows():
+    print(f"  {segment['Segment']}")
+    print(f"    Customers: {segment['Customers']:,} ({segment['Support']:.1f}%), "
+          f"Churn Rate: {segment['Churn_Rate']:.2f}% (lift {segment['Lift']:.2f})")
+print(f"   ✅ Saved: {segments_path}")
+
+findings.append(f"\nDiscovered Segments (top 5 by churn lift, ≥ 2% of customers{segment_label}):")
+for _, segment in segments.head(5).iterrows():
+    findings.append(f"  {segment['Segment']}")
+    findings.append(f"    Size: {segment['Customers']:,} customers ({segment['Support']:.1f}%), "
+                    f"Churn Rate: {segment['Churn_Rate']:.2f}% (lift {segment['Lift']:.2f})")
+findings.append(f"  Full table: {segments_path}")
 
 findings.append("")
 print()
@@ -526,7 +558,7 @@ obs4 = f"4. {highest_churn_payment} has highest churn rate ({churn_by_payment.ma
 print(f"  {obs4}")
 findings.append(obs4)
 
-obs5 = f"5. Average tenure is {df['tenure'].mean():.1f} months - indicates moderate customer lifetime"
+obs5 = f"5. Average tenure is {df['tenure'].mean():.1f} months{sample_label} - indicates moderate customer lifetime"
 print(f"  {obs5}")
 findings.append(obs5)
 
@@ -549,9 +581,44 @@ hyp4 = "- Service add-ons (tech support, security) may reduce churn - test upsel
 print(f"  {hyp4}")
 findings.append(hyp4)
 
+# Driver screen: every clean-data feature ranked by mutual information with Churn
+# (numerics in 10 quantile bins; one joint bincount over all features).
+# Stage 6 (feature_engineering.py) ranks the engineered features the same way
+print("\nDriver Ranking (mutual information with Churn):")
+mi_cols = [col for col in df.columns if col not in ['customerID', 'Churn'] and not is_bitmask_column(col)]
+mi_ranking = mutual_information(df, mi_cols, bins=10)
+mi_ranking.to_csv(mi_path, index=False, float_format='%.6f')
+for _, row in mi_ranking.head(10).iterrows():
+    print(f"  {row['Feature']}: {row['MI_Bits']:.4f} bits ({row['MI_Normalized'] * 100:.1f}% of churn entropy)")
+print(f"   ✅ Saved: {mi_path} ({len(mi_ranking)} features)")
+
+findings.append(f"\nDriver Ranking (mutual information with Churn, {len(mi_ranking)} features):")
+for _, row in mi_ranking.head(10).iterrows():
+    findings.append(f"  {row['Feature']}: {row['MI_Bits']:.4f} bits ({row['MI_Normalized'] * 100:.1f}% of churn entropy)")
+findings.append(f"  Full table: {mi_path}")
+
 findings.append("")
 print()
 
+# ==================== RENDER VISUALIZATIONS ====================
+print("-" * 80)
+print("RENDERING VISUALIZATIONS")
+print("-" * 80)
+
+# All chart specs at once in a process pool; charts whose data, options and renderer
+# are unchanged since the last run (same content hash) are kept as they are
+if sample_note:
+    # Every chart drawn from the sample says so
+    for spec in charts:
+        spec['note'] = sample_note
+print(f"Charts: {len(charts)} ({args.format}, {chart_dpi} dpi{', preview' if args.preview else ''}"
+      f"{', sampled' if sample_note else ''})")
+chart_results = render_charts(charts, viz_dir, dpi=chart_dpi, fmt=args.format,
+                              workers=args.workers, use_cache=not args.no_cache)
+for name, path, status in chart_results:
+    print(f"   {'✅ Saved' if status == 'rendered' else '♻️  Unchanged'}: {path}")
+print()
+
 # ==================== SAVE FINDINGS REPORT ====================
 print("-" * 80)
 print("SAVING EDA FINDINGS")
@@ -563,7 +630,7 @@ findings.append("END OF REPORT")
 findings.append("=" * 80)
 findings.append("")
 findings.append(f"Visualizations saved to: {viz_dir}/")
-findings.append("Total visualizations: 7")
+findings.append(f"Total visualizations: {len(charts)}")
 findings.append("")
 findings.append("Next Steps:")
 findings.append("- Stage 6: Feature Engineering & Metrics Layer")
@@ -587,16 +654,18 @@ print("=" * 80)
 print()
 print("Outputs Generated:")
 print(f"  📊 Visualizations: {viz_dir}/")
-print(f"     - churn_distribution.png")
-print(f"     - tenure_distribution.png")
-print(f"     - charges_distribution.png")
-print(f"     - churn_by_contract.png")
-print(f"     - churn_by_tenure.png")
-print(f"     - churn_by_payment_method.png")
-print(f"     - correlation_heatmap.png")
+for name, path, status in chart_results:
+    print(f"     - {os.path.basename(path)}")
 print()
 print(f"  📄 Findings Report: {findings_path}")
+print(f"  📄 Churn Lift Table: {lift_path}")
+print(f"  📄 Significance Tests: {significance_path}")
+print(f"  📄 Discovered Segments: {segments_path}")
+print(f"  📄 Driver Ranking: {mi_path}")
 print()
+if sample_note:
+    print(f"  🎯 {sample_note} - churn rates carry 95% confidence intervals")
+    print()
 print("Key Insights Discovered:")
 print(f"  • Overall churn rate: {overall_churn_rate:.1f}%")
 print(f"  • Highest risk: {highest_churn_contract} contracts")
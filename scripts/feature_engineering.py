@@ -3,6 +3,9 @@ import pandas as pd  # For data manipulation
 import numpy as np  # For numerical operations
 import os  # For file operations
 from datetime import datetime  # For timestamps
+from data_schema import load_stage_data, memory_report, untyped_memory, is_bitmask_column  # Shared dtype-aware loader
+from binary_flags import FLAG_FIELDS, FLAG_BITS, pack_flags, unpack_flags, flag_counts  # Bit-packed yes/no attributes
+from churn_cube import mutual_information  # Driver ranking (joint bincount)
 
 # Print header
 print("=" * 80)
@@ -15,6 +18,7 @@ input_path = "data/processed/clean_churn_data.csv"
 output_path = "data/processed/enriched_churn_data.csv"
 dictionary_path = "data/processed/feature_dictionary.txt"
 validation_path = "data/processed/feature_validation_report.txt"
+mi_path = "outputs/reports/feature_mutual_information.csv"
 
 # Check if input file exists
 if not os.path.exists(input_path):
@@ -24,9 +28,11 @@ if not os.path.exists(input_path):
 
 # Load the clean dataset
 print("📂 Loading clean dataset...")
-df = pd.read_csv(input_path)
+df = load_stage_data(input_path, 'features')
+original_columns = df.shape[1]
 print(f"✅ Dataset loaded: {input_path}")
 print(f"   Original shape: {df.shape[0]} rows × {df.shape[1]} columns")
+print(f"   {memory_report(df, 'features')}")
 print()
 
 # Initialize lists for documentation
@@ -364,7 +370,7 @@ contract_scores = {
     'One year': 2,
     'Two year': 3
 }
-df['Contract_Stability_Score'] = df['Contract'].map(contract_scores)
+df['Contract_Stability_Score'] = df['Contract'].map(contract_scores).astype(int)
 
 print(f"   Mean stability score: {df['Contract_Stability_Score'].mean():.2f}")
 stability_dist = df['Contract_Stability_Score'].value_counts().sort_index()
@@ -555,6 +561,79 @@ validation_results.append(f"   Non-null count: {df['Revenue_per_Month'].count()}
 
 print()
 
+# ==================== BINARY FLAG PACKING ====================
+print("-" * 80)
+print("BINARY FLAG PACKING")
+print("-" * 80)
+
+# Every yes/no attribute and 0/1 flag as one bit of a uint32 per customer
+# (see binary_flags.py for the bit order, accessors and predicate helpers)
+flag_columns = [col for col in FLAG_FIELDS if col in df.columns]
+df['Binary_Flags'] = pack_flags(df)
+
+# Memory per customer: untyped load (strings), schema load (categories/uint8/bool), packed bits
+untyped_bytes = (untyped_memory(df[flag_columns]) - df.index.memory_usage()) / len(df)
+typed_bytes = df[flag_columns].memory_usage(deep=True, index=False).sum() / len(df)
+packed_bytes = df['Binary_Flags'].to_numpy().itemsize
+print(f"📦 Packed {len(flag_columns)} binary attributes into Binary_Flags (uint32)")
+print(f"   Bytes per customer: {untyped_bytes:.1f} untyped → {typed_bytes:.1f} with schema → {packed_bytes} packed")
+
+# Round trip: unpacking must reproduce every source column exactly
+unpacked = unpack_flags(df['Binary_Flags'].to_numpy(), flag_columns)
+mismatches = sum(int((unpacked[col].to_numpy() != df[col].isin(FLAG_FIELDS[col]).to_numpy()).sum())
+                 for col in flag_columns)
+print(f"   Round-trip mismatches: {mismatches}")
+counts = flag_counts(df['Binary_Flags'].to_numpy(), flag_columns)
+
+feature_dict.append("\n" + "-" * 80)
+feature_dict.append("STORAGE: BINARY_FLAGS")
+feature_dict.append("-" * 80)
+feature_dict.append("\nBinary_Flags")
+feature_dict.append(f"   Definition: {len(flag_columns)} yes/no attributes packed into one uint32 (bit = attribute)")
+feature_dict.append(f"   Memory: {untyped_bytes:.1f} bytes/customer untyped, {typed_bytes:.1f} with schema, "
+                    f"{packed_bytes} packed")
+feature_dict.append("   Business Use: Multi-attribute filters as one bitwise test (binary_flags.match)")
+feature_dict.append("   Bits:")
+for col in flag_columns:
+    feature_dict.append(f"     bit {FLAG_BITS[col]:>2}: {col} "
+                        f"(set for {FLAG_FIELDS[col]}): {counts[col]:,} customers")
+
+validation_results.append("\nBinary_Flags:")
+validation_results.append(f"   Attributes packed: {len(flag_columns)}")
+validation_results.append(f"   Round-trip mismatches: {mismatches} (expected: 0)")
+
+print()
+
+# ==================== DRIVER RANKING ====================
+print("-" * 80)
+print("DRIVER RANKING")
+print("-" * 80)
+
+# Every raw and engineered feature ranked by mutual information with Churn
+# (numerics in 10 quantile bins; one joint bincount over all features)
+mi_cols = [col for col in df.columns if col not in ['customerID', 'Churn'] and not is_bitmask_column(col)]
+mi_ranking = mutual_information(df, mi_cols, bins=10)
+engineered = set(df.columns[original_columns:])
+os.makedirs(os.path.dirname(mi_path), exist_ok=True)
+mi_ranking.to_csv(mi_path, index=False, float_format='%.6f')
+print(f"\n🎯 Top drivers (mutual information with Churn, {len(mi_ranking)} features):")
+for _, row in mi_ranking.head(10).iterrows():
+    source = "engineered" if row['Feature'] in engineered else "raw"
+    print(f"   {row['Feature']} ({source}): {row['MI_Bits']:.4f} bits "
+          f"({row['MI_Normalized'] * 100:.1f}% of churn entropy)")
+print(f"✅ Saved: {mi_path}")
+
+feature_dict.append("\n" + "-" * 80)
+feature_dict.append("DRIVER RANKING: MUTUAL INFORMATION WITH CHURN")
+feature_dict.append("-" * 80)
+feature_dict.append(f"\nTop 10 of {len(mi_ranking)} raw and engineered features (full table: {mi_path}):")
+for _, row in mi_ranking.head(10).iterrows():
+    source = "engineered" if row['Feature'] in engineered else "raw"
+    feature_dict.append(f"   {row['Feature']} ({source}): {row['MI_Bits']:.4f} bits "
+                        f"({row['MI_Normalized'] * 100:.1f}% of churn entropy)")
+
+print()
+
 # ==================== SAVE ENRICHED DATASET ====================
 print("-" * 80)
 print("SAVING ENRICHED DATASET")
@@ -564,7 +643,7 @@ print(f"\n💾 Saving enriched dataset to: {output_path}")
 df.to_csv(output_path, index=False)
 print(f"✅ Enriched dataset saved")
 print(f"   Final shape: {df.shape[0]} rows × {df.shape[1]} columns")
-print(f"   New features added: {df.shape[1] - 33}")  # Original had 33 columns
+print(f"   New columns added: {df.shape[1] - original_columns}")
 
 # ==================== SAVE FEATURE DICTIONARY ====================
 print(f"\n📖 Saving feature dictionary to: {dictionary_path}")
@@ -573,7 +652,7 @@ feature_dict.append("\n" + "=" * 80)
 feature_dict.append("SUMMARY")
 feature_dict.append("=" * 80)
 feature_dict.append(f"\nTotal Features Created: 16")
-feature_dict.append(f"Original Columns: 33")
+feature_dict.append(f"Original Columns: {original_columns}")
 feature_dict.append(f"Final Columns: {df.shape[1]}")
 feature_dict.append("")
 feature_dict.append("Categories:")
@@ -613,7 +692,7 @@ print()
 print("Outputs Generated:")
 print(f"  📊 Enriched Dataset: {output_path}")
 print(f"     - {df.shape[0]:,} rows × {df.shape[1]} columns")
-print(f"     - {df.shape[1] - 33} new features added")
+print(f"     - {df.shape[1] - original_columns} new columns added (16 features + Binary_Flags)")
 print()
 print(f"  📖 Feature Dictionary: {dictionary_path}")
 print(f"     - Definitions and business use cases for all features")
@@ -621,6 +700,9 @@ print()
 print(f"  ✅ Validation Report: {validation_path}")
 print(f"     - Quality checks for all engineered features")
 print()
+print(f"  🎯 Driver Ranking: {mi_path}")
+print(f"     - Raw and engineered features ranked by mutual information with Churn")
+print()
 print("New Features Created (16 total):")
 print("  • Customer Value: CLV, ARPU, Value_Segment")
 print("  • Risk Indicators: High_Risk_Flag, Payment_Risk_Flag, Service_Risk_Flag, Risk_Score")
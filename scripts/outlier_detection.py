@@ -0,0 +1,159 @@
+"""
+OUTLIER DETECTION
+Vectorized outlier methods over a whole numeric block (rows × columns):
+IQR fences and MAD robust z-scores from one sort-based multi-quantile pass,
+and an isolation-forest-style multivariate score.
+Shared by the cleaning rules (step 5, per-row Outlier_Columns bitmask) and the data profile.
+"""
+
+# Import required libraries
+import numpy as np  # For vectorized statistics
+
+# Scales the MAD to the standard deviation for normally distributed data
+MAD_SCALE = 0.6745
+
+# Euler-Mascheroni constant (average path length of a binary search tree)
+EULER_GAMMA = 0.5772156649
+
+
+# Linear interpolation between two sorted neighbours
+# (same formula NumPy/pandas use for quantile(), so results match exactly)
+def _lerp(a, b, t):
+    diff = b - a
+    result = a + diff * t
+    # NumPy interpolates from the upper neighbour when t >= 0.5 for stability
+    return np.where(t >= 0.5, b - diff * (1 - t), result)
+
+
+# Compute quantiles for every column of a NaN-last sorted block at once
+def sorted_quantiles(sorted_block, counts, q):
+    """Return the q-th quantile of each column, ignoring trailing NaNs"""
+    # Position of the quantile inside each column's valid (non-NaN) prefix
+    position = q * np.maximum(counts - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    cols = np.arange(sorted_block.shape[1])
+    values = _lerp(sorted_block[lower, cols], sorted_block[upper, cols], position - lower)
+    # Columns without any valid values have no quantile
+    return np.where(counts > 0, values, np.nan)
+
+
+# Several quantiles of every column from a single sort
+def block_quantiles(block, qs):
+    """Return an array (len(qs) × columns) of quantiles, NaNs ignored"""
+    if block.shape[0] == 0:
+        return np.full((len(qs), block.shape[1]), np.nan)
+    sorted_block = np.sort(block, axis=0)  # NaNs sort last
+    counts = block.shape[0] - np.isnan(block).sum(axis=0)
+    return np.array([sorted_quantiles(sorted_block, counts, q) for q in qs])
+
+
+# ==================== PER-COLUMN METHODS ====================
+
+# IQR fences for every column at once
+def iqr_bounds(q1, q3, multiplier=1.5):
+    """Return (lower bounds, upper bounds) = Q1 - k×IQR, Q3 + k×IQR"""
+    iqr = q3 - q1
+    return q1 - multiplier * iqr, q3 + multiplier * iqr
+
+
+# Cells outside the fences (NaN never compares True)
+def iqr_mask(block, lower, upper, skip_zero_spread=False):
+    """Return the rows × columns mask of values outside the Tukey fences"""
+    outside = (block < lower) | (block > upper)
+    if skip_zero_spread:
+        # Columns with IQR = 0 (mostly one value, e.g. 0/1 flags) flag every other value: skip them
+        outside &= upper > lower
+    return outside
+
+
+# Median absolute deviation of every column
+def mad(block, medians):
+    """Return the MAD of each column (NaNs ignored)"""
+    return block_quantiles(np.abs(block - medians), [0.5])[0]
+
+
+# Cells whose robust z-score exceeds the threshold
+def mad_mask(block, medians, mads, threshold=3.5):
+    """Return the rows × columns mask of |0.6745 × (x - median) / MAD| > threshold"""
+    # Columns with MAD = 0 (mostly one value, e.g. 0/1 flags) have no robust scale: never flagged
+    scale = np.where(mads > 0, mads, np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.abs(MAD_SCALE * (block - medians) / scale) > threshold
+
+
+# ==================== ISOLATION SCORES ====================
+
+# Average path length of an unsuccessful search in a binary search tree of n points
+def _average_path(n):
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        path = 2 * (np.log(np.maximum(n - 1, 1)) + EULER_GAMMA) - 2 * (n - 1) / n
+    return np.where(n > 2, path, np.where(n == 2, 1.0, 0.0))
+
+
+class IsolationForest:
+    """Isolation-forest-style multivariate scores (random axis-parallel splits, NumPy only)"""
+
+    def __init__(self, trees=100, sample_size=256, seed=0):
+        self.trees = trees
+        self.sample_size = sample_size
+        self.seed = seed
+
+    def fit(self, sample):
+        """Grow the trees on a sample of rows (missing values take the column median)"""
+        self.medians = block_quantiles(sample, [0.5])[0]
+        sample = np.where(np.isnan(sample), self.medians, sample)
+        rng = np.random.default_rng(self.seed)
+        size = min(self.sample_size, len(sample))
+        self.max_depth = int(np.ceil(np.log2(max(size, 2))))
+        self.normalizer = float(_average_path(size))
+        # All trees in one node table: feature, threshold, (left, right) children, path length at leaves
+        feature, threshold, children, path, roots = [], [], [], [], []
+        for _ in range(self.trees):
+            roots.append(len(feature))
+            self._grow(sample[rng.choice(len(sample), size, replace=False)], 0, rng,
+                       feature, threshold, children, path)
+        self.feature = np.array(feature, dtype=np.intp)
+        self.threshold = np.array(threshold)
+        self.children = np.array(children, dtype=np.intp)
+        self.path = np.array(path)
+        self.roots = np.array(roots, dtype=np.intp)
+        return self
+
+    def _grow(self, values, depth, rng, feature, threshold, children, path):
+        # Leaves split nowhere: threshold +inf sends every row back to the leaf itself
+        node = len(feature)
+        feature.append(0)
+        threshold.append(np.inf)
+        children.append([node, node])
+        # Leaves holding several points add the expected depth of the unbuilt subtree
+        path.append(depth + float(_average_path(len(values))))
+        if depth >= self.max_depth or len(values) <= 1:
+            return node
+        low, high = values.min(axis=0), values.max(axis=0)
+        splittable = np.flatnonzero(high > low)
+        if len(splittable) == 0:
+            return node
+        # Random feature, random split point between its min and max
+        f = int(rng.choice(splittable))
+        feature[node], threshold[node] = f, rng.uniform(low[f], high[f])
+        goes_right = values[:, f] >= threshold[node]
+        children[node] = [self._grow(values[~goes_right], depth + 1, rng, feature, threshold, children, path),
+                          self._grow(values[goes_right], depth + 1, rng, feature, threshold, children, path)]
+        return node
+
+    def score(self, block, chunk_size=16384):
+        """Return one anomaly score per row in (0, 1]; above ~0.6 is unusually easy to isolate"""
+        block = np.where(np.isnan(block), self.medians, block)
+        scores = np.empty(len(block))
+        for start in range(0, len(block), chunk_size):
+            part = block[start:start + chunk_size]
+            rows = np.arange(len(part))
+            # Every tree × row pair descends together, one level per step
+            node = np.repeat(self.roots[:, None], len(part), axis=1)
+            for _ in range(self.max_depth):
+                goes_right = part[rows, self.feature[node]] >= self.threshold[node]
+                node = self.children[node, goes_right.astype(np.intp)]
+            scores[start:start + chunk_size] = 2.0 ** (-self.path[node].mean(axis=0) / self.normalizer)
+        return scores
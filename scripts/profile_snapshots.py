@@ -0,0 +1,226 @@
+"""
+PROFILE SNAPSHOTS
+Versioned, incremental data profiles with drift scores:
+  - rows are split into stable hash partitions (by customerID)
+  - each partition keeps a mergeable StreamingProfile, stored in a versioned snapshot
+  - a new run re-profiles only partitions whose content fingerprint changed
+  - the merged profile is compared with the previous snapshot (PSI, KS distance, null-rate delta)
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation and hashing
+import numpy as np  # For numerical operations
+import os  # For file operations
+import re  # For parsing snapshot file names
+import copy  # For merging stored partial profiles without mutating them
+import pickle  # For persisting snapshots
+from datetime import datetime  # For snapshot timestamps
+from profiling_sketches import StreamingProfile  # Mergeable per-partition profiles
+
+# Small probability used instead of 0 so PSI stays finite
+PSI_EPSILON = 1e-6
+
+# PSI thresholds commonly used in model monitoring
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# KS distance thresholds (numeric columns)
+KS_MODERATE = 0.1
+KS_SIGNIFICANT = 0.2
+# Null-rate change thresholds, in percentage points either way
+NULL_DELTA_MODERATE = 1.0
+NULL_DELTA_SIGNIFICANT = 5.0
+
+# Drift statuses from least to most severe
+DRIFT_STATUSES = ['STABLE', 'MODERATE DRIFT', 'SIGNIFICANT DRIFT']
+
+
+# ==================== PARTITIONING ====================
+
+# Assign each row to a partition and fingerprint every partition's content
+def partition_fingerprints(df, num_partitions, key_column='customerID'):
+    """Return (partition id per row, {partition id: (row count, content fingerprint)})"""
+    # Row hashes are computed once and reused for both the assignment and the fingerprints
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    if key_column in df.columns:
+        key_hashes = pd.util.hash_array(df[key_column].to_numpy(dtype=object))
+    else:
+        key_hashes = row_hashes
+    partition_ids = (key_hashes % np.uint64(num_partitions)).astype(np.int64)
+
+    # Order-independent fingerprint: row count + wrapping sum of row hashes per partition
+    order = np.argsort(partition_ids, kind='stable')
+    sorted_ids = partition_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(order) else np.array([], dtype=np.int64)
+    sums = np.add.reduceat(row_hashes[order], starts) if len(order) else np.array([], dtype=np.uint64)
+    counts = np.diff(np.r_[starts, len(order)])
+    fingerprints = {int(sorted_ids[start]): (int(count), int(total))
+                    for start, count, total in zip(starts, counts, sums)}
+    return partition_ids, fingerprints
+
+
+# ==================== SNAPSHOT STORAGE ====================
+
+# List stored snapshot versions (oldest first)
+def list_snapshots(snapshot_dir):
+    """Return [(version, path)] for every stored snapshot"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    found = []
+    for name in os.listdir(snapshot_dir):
+        match = re.fullmatch(r'profile_snapshot_v(\d+)\.pkl', name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(snapshot_dir, name)))
+    return sorted(found)
+
+
+# Load the most recent snapshot (None if there is none)
+def load_latest_snapshot(snapshot_dir):
+    """Return the latest snapshot dict, or None"""
+    snapshots = list_snapshots(snapshot_dir)
+    if not snapshots:
+        return None
+    with open(snapshots[-1][1], 'rb') as f:
+        return pickle.load(f)
+
+
+# Save a snapshot as the next version
+def save_snapshot(snapshot, snapshot_dir):
+    """Write the snapshot with the next version number and return its path"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, f"profile_snapshot_v{snapshot['version']:04d}.pkl")
+    with open(path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+# Merge all partition profiles of a snapshot into one dataset profile
+def merged_profile(snapshot):
+    """Return a StreamingProfile covering every partition (stored partials are not modified)"""
+    result = StreamingProfile()
+    for partition_id in sorted(snapshot['partitions']):
+        result.merge(copy.deepcopy(snapshot['partitions'][partition_id]))
+    return result
+
+
+# ==================== INCREMENTAL PROFILING ====================
+
+# Profile a dataset incrementally against the previous snapshot
+def incremental_profile(df, previous, num_partitions=16, input_path=None):
+    """Return (new snapshot, {'reprofiled': [...], 'reused': [...], 'removed': [...]})"""
+    # A changed partition count invalidates every stored partition
+    if previous is not None and previous['num_partitions'] != num_partitions:
+        previous = None
+
+    partition_ids, fingerprints = partition_fingerprints(df, num_partitions)
+    stored = previous['partitions'] if previous else {}
+    stored_fingerprints = previous['fingerprints'] if previous else {}
+
+    partitions = {}
+    activity = {'reprofiled': [], 'reused': [], 'removed': []}
+    for partition_id, fingerprint in sorted(fingerprints.items()):
+        if stored_fingerprints.get(partition_id) == fingerprint:
+            # Unchanged content: reuse the stored partial state
+            partitions[partition_id] = stored[partition_id]
+            activity['reused'].append(partition_id)
+        else:
+            # New or changed partition: profile only these rows
+            partitions[partition_id] = StreamingProfile().update(df[partition_ids == partition_id])
+            activity['reprofiled'].append(partition_id)
+    activity['removed'] = sorted(set(stored_fingerprints) - set(fingerprints))
+
+    snapshot = {
+        'version': (previous['version'] + 1) if previous else 1,
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'input_path': input_path,
+        'num_partitions': num_partitions,
+        'fingerprints': fingerprints,
+        'partitions': partitions
+    }
+    return snapshot, activity
+
+
+# ==================== DRIFT METRICS ====================
+
+# Population Stability Index between two distributions over the same bins
+def psi(expected, actual):
+    """Return the PSI of two fraction arrays"""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+# Drift of a numeric column from its KLL sketches
+def _numeric_drift(old, new, bins=10):
+    # PSI over the previous snapshot's decile bins
+    edges = np.unique([old.quantiles.quantile(q) for q in np.arange(1, bins) / bins])
+    old_fracs = np.diff(np.r_[0.0, old.quantiles.cdf(edges), 1.0])
+    new_fracs = np.diff(np.r_[0.0, new.quantiles.cdf(edges), 1.0])
+    # KS distance: largest CDF gap over every retained item of both sketches
+    points = np.unique(np.concatenate(old.quantiles.levels + new.quantiles.levels))
+    ks = float(np.max(np.abs(old.quantiles.cdf(points) - new.quantiles.cdf(points)))) if len(points) else 0.0
+    return psi(old_fracs, new_fracs), ks
+
+
+# Drift of a categorical column from its frequent-value counters
+def _categorical_drift(old, new):
+    # Tracked values plus one "other" bucket for everything the counters dropped
+    categories = old.frequent.counts.index.union(new.frequent.counts.index)
+    old_counts = old.frequent.counts.reindex(categories, fill_value=0).to_numpy(dtype=np.float64)
+    new_counts = new.frequent.counts.reindex(categories, fill_value=0).to_numpy(dtype=np.float64)
+    old_total = max(old.rows - old.nulls, 1)
+    new_total = max(new.rows - new.nulls, 1)
+    old_fracs = np.r_[old_counts / old_total, max(0.0, 1 - old_counts.sum() / old_total)]
+    new_fracs = np.r_[new_counts / new_total, max(0.0, 1 - new_counts.sum() / new_total)]
+    return psi(old_fracs, new_fracs)
+
+
+# Severity of one drift metric: 0 stable, 1 moderate, 2 significant
+def _drift_level(value, moderate, significant):
+    if pd.isna(value):
+        return 0
+    return 2 if value >= significant else 1 if value >= moderate else 0
+
+
+# Compare two dataset profiles column by column
+def drift_table(old_profile, new_profile):
+    """Return a DataFrame of per-column drift metrics (KS only applies to numeric columns)
+
+    Status is the worst of the PSI, KS distance and null-rate delta levels; Drift_Metrics names
+    the metrics at that level.
+    """
+    rows = []
+    for col, new in new_profile.columns.items():
+        old = old_profile.columns.get(col)
+        if old is None:
+            rows.append({'Column': col, 'Status': 'NEW COLUMN'})
+            continue
+        old_null_rate = old.nulls / old.rows * 100 if old.rows else 0.0
+        new_null_rate = new.nulls / new.rows * 100 if new.rows else 0.0
+        numeric = old.numeric and new.numeric and old.count > 0 and new.count > 0
+        if numeric:
+            psi_value, ks_value = _numeric_drift(old, new)
+        else:
+            psi_value, ks_value = _categorical_drift(old, new), np.nan
+        null_delta = new_null_rate - old_null_rate
+        levels = {
+            'PSI': _drift_level(psi_value, PSI_MODERATE, PSI_SIGNIFICANT),
+            'KS': _drift_level(ks_value, KS_MODERATE, KS_SIGNIFICANT),
+            'Null rate': _drift_level(abs(null_delta), NULL_DELTA_MODERATE, NULL_DELTA_SIGNIFICANT),
+        }
+        worst = max(levels.values())
+        rows.append({
+            'Column': col,
+            'Type': 'numeric' if numeric else 'categorical',
+            'PSI': psi_value,
+            'KS_Distance': ks_value,
+            'Null_Rate_Before': old_null_rate,
+            'Null_Rate_After': new_null_rate,
+            'Null_Rate_Delta': null_delta,
+            'Status': DRIFT_STATUSES[worst],
+            'Drift_Metrics': ', '.join(name for name, level in levels.items() if level == worst) if worst else ''
+        })
+    # Columns that disappeared since the previous snapshot
+    for col in old_profile.columns:
+        if col not in new_profile.columns:
+            rows.append({'Column': col, 'Status': 'REMOVED COLUMN'})
+    return pd.DataFrame(rows)
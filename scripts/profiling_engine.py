@@ -0,0 +1,332 @@
+"""
+PROFILING ENGINE
+Single-pass column statistics used by data_profiling.py
+(serially, or across a process pool reading shared-memory columns),
+plus stratified-sample estimates with confidence intervals for quick previews
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For vectorized statistics
+import os  # For the CPU count
+import multiprocessing as mp  # For the worker pool start method
+from concurrent.futures import ProcessPoolExecutor  # For the worker pool
+from multiprocessing import shared_memory  # For sharing the numeric block without copies
+import time  # For timing sample rounds
+from outlier_detection import sorted_quantiles, iqr_bounds, iqr_mask, mad, mad_mask  # Outlier methods
+from sampling import ratio_estimate, quantile_estimate, weighted_quantile, Z_95  # Sample mode
+
+# Columns of the summary CSV (kept in the original report order)
+SUMMARY_COLUMNS = ['Column', 'DataType', 'Non_Null_Count', 'Null_Count', 'Null_Percentage',
+                   'Unique_Values', 'Min', 'Max', 'Mean', 'Median', 'Std']
+
+
+# Profile the numeric block of a DataFrame in one vectorized pass
+def profile_numeric_block(df, numeric_cols):
+    """Return a DataFrame of statistics (one row per numeric column)"""
+    # One float64 copy of the whole numeric block (column-major so each column is contiguous)
+    block = np.asfortranarray(df[numeric_cols].to_numpy(dtype=np.float64))
+    return profile_numeric_array(block, numeric_cols)
+
+
+# Profile a 2-D float64 array (rows × columns) in one vectorized pass
+def profile_numeric_array(block, numeric_cols):
+    """Return a DataFrame of statistics (one row per column of the array)"""
+    num_rows = block.shape[0]
+
+    # Null mask and counts are computed once and reused for every statistic
+    null_mask = np.isnan(block)
+    null_counts = null_mask.sum(axis=0)
+    counts = num_rows - null_counts
+
+    # Mean and sample standard deviation (same two-step algorithm as pandas)
+    filled = np.where(null_mask, 0.0, block)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = filled.sum(axis=0) / counts
+        squared = np.where(null_mask, 0.0, (block - means) ** 2)
+        stds = np.sqrt(squared.sum(axis=0) / (counts - 1))
+    stds = np.where(counts > 1, stds, np.nan)
+
+    # A single sort gives min, max, quantiles and distinct counts (NaNs sort last)
+    sorted_block = np.sort(block, axis=0)
+    if num_rows > 0:
+        cols = np.arange(block.shape[1])
+        mins = np.where(counts > 0, sorted_block[0], np.nan)
+        maxs = np.where(counts > 0, sorted_block[np.maximum(counts - 1, 0), cols], np.nan)
+        # Distinct values = number of value changes inside the valid prefix
+        changes = sorted_block[1:] != sorted_block[:-1]
+        in_prefix = np.arange(1, num_rows)[:, None] < counts[None, :]
+        uniques = (changes & in_prefix).sum(axis=0) + (counts > 0)
+        q1 = sorted_quantiles(sorted_block, counts, 0.25)
+        medians = sorted_quantiles(sorted_block, counts, 0.5)
+        q3 = sorted_quantiles(sorted_block, counts, 0.75)
+    else:
+        mins = maxs = q1 = medians = q3 = np.full(block.shape[1], np.nan)
+        uniques = np.zeros(block.shape[1], dtype=np.int64)
+
+    # IQR outlier bounds and counts for every column at once (NaN never compares True)
+    lower_bounds, upper_bounds = iqr_bounds(q1, q3)
+    outliers = iqr_mask(block, lower_bounds, upper_bounds).sum(axis=0)
+    # Robust z-score outliers (MAD around the median), same shared methods as the cleaning step
+    mads = mad(block, medians)
+    mad_outliers = mad_mask(block, medians, mads).sum(axis=0)
+
+    return pd.DataFrame({
+        'Non_Null_Count': counts,
+        'Null_Count': null_counts,
+        'Unique_Values': uniques,
+        'Min': mins,
+        'Max': maxs,
+        'Mean': means,
+        'Median': medians,
+        'Std': stds,
+        'Q1': q1,
+        'Q3': q3,
+        'Lower_Bound': lower_bounds,
+        'Upper_Bound': upper_bounds,
+        'Outliers_IQR': outliers,
+        'MAD': mads,
+        'Outliers_MAD': mad_outliers
+    }, index=numeric_cols)
+
+
+# Profile a single non-numeric column with one hashing pass
+def profile_categorical_column(series):
+    """Return (statistics dict, value counts) for one non-numeric column"""
+    # value_counts() is the only scan: it yields distinct count, non-null count and top values
+    value_counts = series.value_counts()
+    non_null = int(value_counts.sum())
+    stats = {
+        'Non_Null_Count': non_null,
+        'Null_Count': len(series) - non_null,
+        'Unique_Values': len(value_counts)
+    }
+    return stats, value_counts
+
+
+# Profile every column of a DataFrame
+def profile_columns(df):
+    """Return (profile DataFrame indexed by column, dict of value counts for non-numeric columns)"""
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    other_cols = [col for col in df.columns if col not in numeric_cols]
+
+    # Numeric columns: one vectorized pass over the whole block
+    numeric_profile = profile_numeric_block(df, numeric_cols)
+
+    # Non-numeric columns: one value_counts() pass per column
+    categorical_rows = {}
+    value_counts = {}
+    for col in other_cols:
+        categorical_rows[col], value_counts[col] = profile_categorical_column(df[col])
+    return _assemble_profile(df, numeric_profile, categorical_rows), value_counts
+
+
+# Combine numeric and non-numeric statistics back into the original column order
+def _assemble_profile(df, numeric_profile, categorical_rows):
+    categorical_profile = pd.DataFrame.from_dict(categorical_rows, orient='index',
+                                                 columns=['Non_Null_Count', 'Null_Count', 'Unique_Values'])
+    profile = pd.concat([numeric_profile, categorical_profile]).reindex(df.columns)
+    profile['DataType'] = df.dtypes.astype(str)
+    profile['Null_Percentage'] = (profile['Null_Count'] / len(df)) * 100 if len(df) > 0 else 0.0
+    for col in ['Non_Null_Count', 'Null_Count', 'Unique_Values']:
+        profile[col] = profile[col].astype(np.int64)
+    return profile
+
+
+# Build the data_quality_summary.csv table from a profile
+def summary_table(profile):
+    """Return the profile in the data_quality_summary.csv layout"""
+    summary = profile.rename_axis('Column').reset_index()
+    return summary[SUMMARY_COLUMNS]
+
+
+# ==================== PARALLEL PROFILING ====================
+
+# Worker job: profile a slice of the numeric block living in shared memory
+def _numeric_job(shm_name, shape, start, stop, names):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # Column-major view of the shared block - the slice is read in place, never copied in
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+    result = profile_numeric_array(block[:, start:stop], names)
+    del block  # Release the view before detaching
+    shm.close()
+    return result
+
+
+# Worker job: profile one text column from its integer codes in shared memory
+def _text_job(shm_name, shape, index, categories, name):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    codes = np.ndarray(shape, dtype=np.int64, buffer=shm.buf, order='F')[:, index]
+    # Missing values have code -1; counts per category in one bincount
+    null_count = int((codes < 0).sum())
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    del codes  # Release the view before detaching
+    shm.close()
+    # Same ordering as value_counts(): sorted by count, descending
+    # (categorical columns list every category, other columns only the observed values)
+    observed = np.ones(len(counts), dtype=bool) if isinstance(categories, pd.CategoricalIndex) else counts > 0
+    value_counts = pd.Series(counts[observed], index=categories[observed], name='count').rename_axis(name)
+    value_counts = value_counts.sort_values(ascending=False)
+    stats = {
+        'Non_Null_Count': int(counts.sum()),
+        'Null_Count': null_count,
+        'Unique_Values': len(value_counts)
+    }
+    return name, stats, value_counts
+
+
+# Profile every column using a pool of worker processes
+def profile_columns_parallel(df, workers=None):
+    """Return the same (profile, value counts) as profile_columns(), computed in parallel"""
+    workers = workers or os.cpu_count() or 1
+    # Workers are forked so the calling script is not re-executed; fall back to serial elsewhere
+    if workers <= 1 or 'fork' not in mp.get_all_start_methods():
+        return profile_columns(df)
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    other_cols = [col for col in df.columns if col not in numeric_cols]
+
+    # Numeric block: written once into shared memory, column-major, read in place by workers
+    shape = (len(df), len(numeric_cols))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * shape[0] * shape[1]))
+    # Text columns: integer codes (one column each) in a second shared block, categories sent per job
+    text_shape = (len(df), len(other_cols))
+    text_shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * text_shape[0] * text_shape[1]))
+    try:
+        shared_block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order='F')
+        shared_block[:] = df[numeric_cols].to_numpy(dtype=np.float64)
+        shared_codes = np.ndarray(text_shape, dtype=np.int64, buffer=text_shm.buf, order='F')
+        categories = []
+        for i, col in enumerate(other_cols):
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Categorical columns already hold their codes - no hashing at all
+                shared_codes[:, i] = df[col].cat.codes.to_numpy()
+                categories.append(pd.CategoricalIndex(df[col].cat.categories, dtype=df[col].dtype))
+            else:
+                # Other text columns are factorized once (categories in order of first appearance)
+                shared_codes[:, i], uniques = pd.factorize(df[col])
+                categories.append(pd.Index(uniques))
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+            # Split the numeric columns into one contiguous slice per worker
+            numeric_futures = []
+            for cols in np.array_split(np.arange(len(numeric_cols)), min(workers, max(len(numeric_cols), 1))):
+                if len(cols) == 0:
+                    continue
+                start, stop = int(cols[0]), int(cols[-1]) + 1
+                numeric_futures.append(pool.submit(_numeric_job, shm.name, shape, start, stop,
+                                                   numeric_cols[start:stop]))
+
+            # Text columns: one job per column, counting its codes in place
+            text_futures = [pool.submit(_text_job, text_shm.name, text_shape, i, categories[i], col)
+                            for i, col in enumerate(other_cols)]
+
+            numeric_profile = pd.concat([f.result() for f in numeric_futures]) if numeric_futures \
+                else profile_numeric_array(np.empty((len(df), 0)), [])
+            categorical_rows = {}
+            value_counts = {}
+            for future in text_futures:
+                col, categorical_rows[col], value_counts[col] = future.result()
+        del shared_block, shared_codes
+    finally:
+        for block in (shm, text_shm):
+            block.close()
+            block.unlink()
+
+    # Reassemble in the original column order (same layout as profile_columns)
+    profile = _assemble_profile(df, numeric_profile, categorical_rows)
+    return profile, {col: value_counts[col] for col in other_cols}
+
+
+# ==================== SAMPLE-BASED PROFILING ====================
+
+# Profile a stratified sample: every statistic comes with a confidence interval
+def sample_profile(sample, codes, population_sizes, sample_sizes, z=Z_95, top_n=5):
+    """Return a long table (Column, Statistic, Estimate, CI_Lower, CI_Upper, Gated)"""
+    rows = []
+    numeric_cols = sample.select_dtypes(include=[np.number]).columns.tolist()
+    design = (codes, population_sizes, sample_sizes)
+    weights = (population_sizes / np.maximum(sample_sizes, 1))[codes]
+    everything = np.ones(len(sample), dtype=bool)
+
+    # Add one estimate; Gated marks statistics that must meet the target interval width
+    def add(col, statistic, estimate, se=None, lower=None, upper=None, gated=False):
+        if se is not None:
+            lower, upper = estimate - z * se, estimate + z * se
+        rows.append({'Column': col, 'Statistic': statistic, 'Estimate': estimate,
+                     'CI_Lower': lower, 'CI_Upper': upper, 'Gated': gated})
+
+    for col in sample.columns:
+        null_mask = sample[col].isna().to_numpy()
+        valid = ~null_mask
+        estimate, se = ratio_estimate(null_mask, everything, *design)
+        add(col, 'Null_Rate', estimate, se, gated=True)
+
+        if col in numeric_cols:
+            values = sample[col].to_numpy(dtype=np.float64)
+            mean, se = ratio_estimate(values, valid, *design)
+            add(col, 'Mean', mean, se, gated=True)
+            # Variance as the mean squared deviation; the interval is mapped through sqrt
+            variance, se = ratio_estimate((values - mean) ** 2, valid, *design)
+            add(col, 'Std', np.sqrt(variance), lower=np.sqrt(max(variance - z * se, 0.0)),
+                upper=np.sqrt(max(variance + z * se, 0.0)))
+            median, lower, upper = quantile_estimate(values, valid, *design, q=0.5, z=z)
+            add(col, 'Median', median, lower=lower, upper=upper)
+            # Extremes seen in the sample only bound the population range (no interval)
+            add(col, 'Min_Observed', np.nanmin(values) if valid.any() else np.nan)
+            add(col, 'Max_Observed', np.nanmax(values) if valid.any() else np.nan)
+            # IQR outlier rate using the estimated quartiles
+            if valid.any():
+                q1 = weighted_quantile(values[valid], weights[valid], 0.25)
+                q3 = weighted_quantile(values[valid], weights[valid], 0.75)
+                outside = iqr_mask(values, *iqr_bounds(q1, q3))
+                estimate, se = ratio_estimate(outside, valid, *design)
+                add(col, 'Outlier_Rate_IQR', estimate, se, gated=True)
+        else:
+            # Distinct values seen in the sample are a lower bound for the population
+            value_counts = sample[col].value_counts()
+            add(col, 'Distinct_Observed', len(value_counts))
+            values = sample[col].to_numpy(dtype=object)
+            # Shares only make sense for repeated values (skip key-like columns)
+            top_values = value_counts.index[:top_n] if len(value_counts) and value_counts.iloc[0] > 1 else []
+            for value in top_values:
+                estimate, se = ratio_estimate(values == value, valid, *design)
+                add(col, f'Share: {value}', estimate, se, gated=True)
+
+    table = pd.DataFrame(rows)
+    # Proportions cannot leave [0, 1]
+    is_rate = table['Statistic'].str.contains('Rate|Share')
+    table.loc[is_rate, ['CI_Lower', 'CI_Upper']] = table.loc[is_rate, ['CI_Lower', 'CI_Upper']].clip(0, 1)
+    return table
+
+
+# Check whether every gated interval is narrow enough
+def intervals_within_target(table, target_width):
+    """Rates need half-width <= target; means need half-width <= target × 2 std of the column"""
+    gated = table[table['Gated']]
+    half_width = (gated['CI_Upper'] - gated['CI_Lower']) / 2
+    is_mean = gated['Statistic'] == 'Mean'
+    # Means are gated in standard deviations (a width relative to |mean| is never met near zero).
+    # A 50% rate has std 0.5, so target × std / 0.5 asks a mean for the same sample size as the worst rate
+    stds = table[table['Statistic'] == 'Std'].set_index('Column')['Estimate']
+    limit = np.where(is_mean, target_width * gated['Column'].map(stds) / 0.5, target_width)
+    return bool(np.all((half_width <= limit) | half_width.isna()))
+
+
+# Grow a nested stratified sample until every interval meets the target width
+def progressive_sample_profile(reservoir, start_size=1000, target_width=0.02, z=Z_95):
+    """Return (sample profile table, list of (sample size, seconds, target met) per round)"""
+    # Reservoir rows are ordered by random key, so every larger sample contains the smaller ones
+    largest = min(reservoir.capacity, sum(reservoir.population.values()))
+    rounds = []
+    size = start_size
+    while True:
+        started = time.time()
+        sample, codes, population_sizes, sample_sizes, _ = reservoir.sample(size)
+        table = sample_profile(sample, codes, population_sizes, sample_sizes, z=z)
+        met = intervals_within_target(table, target_width)
+        rounds.append((len(sample), time.time() - started, met))
+        # Stop when the target is met or the sample cannot grow any further
+        if met or size >= largest:
+            return table, rounds
+        size *= 2
@@ -0,0 +1,566 @@
+"""
+PROFILING SKETCHES
+Mergeable, constant-memory sketches for streaming data profiling:
+  - HyperLogLog for distinct counts
+  - KLL for quantiles (and IQR outlier bounds)
+  - Misra-Gries for the most frequent categorical values
+Partial profiles built on separate chunks/partitions merge into one result.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation and hashing
+import numpy as np  # For numerical operations
+import math  # For error-bound formulas
+from duplicate_detection import DuplicateTracker  # Exact duplicates from row fingerprints
+
+
+# ==================== HASHING ====================
+
+# Hash any array of values to uint64 (deterministic across chunks and processes)
+def hash_values(values):
+    """Return a uint64 hash for every value in the array"""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+# Count leading zero bits of uint64 values (vectorized binary search)
+def _leading_zeros(x):
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        # If the top `shift` bits are all zero, count them and shift them out
+        top_empty = (x >> np.uint64(64 - shift)) == 0
+        zeros[top_empty] += shift
+        x[top_empty] <<= np.uint64(shift)
+    # An all-zero value has 64 leading zeros
+    zeros[x == 0] = 64
+    return zeros
+
+
+# ==================== HYPERLOGLOG (DISTINCT COUNTS) ====================
+
+class HyperLogLog:
+    """Distinct-count sketch with 2^p one-byte registers"""
+
+    def __init__(self, p=12):
+        self.p = p  # Precision: 2^p registers (p=12 -> 4 KB, ~1.6% error)
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """Add pre-computed uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        # First p bits pick the register, the rest give the rank (position of the first 1-bit)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remainder = hashes << np.uint64(self.p)
+        rank = np.minimum(_leading_zeros(remainder) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values):
+        """Hash and add raw values"""
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other):
+        """Merge another sketch with the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Return the estimated number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        # Small-range correction: linear counting is more accurate for low cardinalities
+        if raw <= 2.5 * m and empty > 0:
+            return m * math.log(m / empty)
+        return raw
+
+    def relative_error(self):
+        """Standard error of the estimate (relative)"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+# ==================== KLL (QUANTILES) ====================
+
+class KLLSketch:
+    """Quantile sketch: compactor levels where an item at level h weighs 2^h"""
+
+    def __init__(self, k=200, seed=0):
+        self.k = k  # Accuracy parameter (k=200 -> ~1.3% rank error)
+        self.n = 0  # Number of items summarised
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller capacities (factor 2/3)
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # Compact the first over-full level until every level fits its capacity
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # Keep one item back when the count is odd so weights stay exact
+            keep = items[:1] if len(items) % 2 else items[:0]
+            pairs = items[len(keep):]
+            # Promote every other item (random offset keeps the sketch unbiased)
+            promoted = pairs[self.rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Capacities change when a level is added, so re-check from the bottom
+            level = 0
+
+    def update(self, values):
+        """Add an array of numeric values (NaN must already be removed)"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other):
+        """Merge another KLL sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        # All retained items sorted, with their weights
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype=np.float64)
+                                  for h, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """Return the estimated q-th quantile"""
+        if self.n == 0:
+            return np.nan
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights) / weights.sum()
+        return items[min(np.searchsorted(cumulative, q), len(items) - 1)]
+
+    def rank(self, value, inclusive=False):
+        """Return the estimated fraction of items below (or up to) a value"""
+        if self.n == 0:
+            return np.nan
+        items, weights = self._weighted_items()
+        below = items <= value if inclusive else items < value
+        return weights[below].sum() / weights.sum()
+
+    def cdf(self, values):
+        """Return the estimated fraction of items <= each of the given values"""
+        values = np.asarray(values, dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(values), np.nan)
+        items, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum()
+        return cumulative[np.searchsorted(items, values, side='right')]
+
+    def rank_error(self):
+        """Normalized rank error (same empirical formula as Apache DataSketches KLL)"""
+        return 2.296 / self.k ** 0.9723
+
+
+# ==================== MISRA-GRIES (HEAVY HITTERS) ====================
+
+class MisraGries:
+    """Frequent-items summary with at most k counters"""
+
+    def __init__(self, k=64):
+        self.k = k  # Counters kept (exact when the column has <= k distinct values)
+        self.counts = pd.Series(dtype=np.int64)
+        self.error = 0  # Max undercount of any reported frequency
+
+    def _prune(self):
+        # Subtract the (k+1)-th largest count from everything and drop non-positive counters
+        if len(self.counts) > self.k:
+            threshold = np.sort(self.counts.to_numpy())[::-1][self.k]
+            self.counts = self.counts - threshold
+            self.counts = self.counts[self.counts > 0]
+            self.error += int(threshold)
+
+    def update(self, series):
+        """Add all non-null values of a Series"""
+        self.counts = self.counts.add(series.value_counts(), fill_value=0).astype(np.int64)
+        self._prune()
+
+    def merge(self, other):
+        """Merge another summary into this one"""
+        self.counts = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        self.error += other.error
+        self._prune()
+        return self
+
+    def top(self, n):
+        """Return the n most frequent values as a Series (lower-bound counts)"""
+        return self.counts.sort_values(ascending=False, kind='stable').head(n)
+
+
+# ==================== STREAMING COLUMN / DATASET PROFILES ====================
+
+class ColumnSketch:
+    """Mergeable profile of one column"""
+
+    def __init__(self, name, hll_precision=12, kll_k=200, top_k=64):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog(hll_precision)
+        self.frequent = MisraGries(top_k)
+        # Numeric state is kept only while every non-null value parses as a number
+        self.numeric = True
+        self.integral = True
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations (Welford / Chan)
+        self.min = np.inf
+        self.max = -np.inf
+        self.quantiles = KLLSketch(kll_k)
+
+    def update(self, series):
+        """Add one chunk of raw (string) values"""
+        non_null = series.dropna()
+        self.rows += len(series)
+        self.nulls += len(series) - len(non_null)
+        self.distinct.add(non_null.to_numpy())
+        self.frequent.update(non_null)
+
+        if not self.numeric:
+            return
+        values = pd.to_numeric(non_null, errors='coerce').to_numpy(dtype=np.float64)
+        if np.isnan(values).any():
+            # A non-numeric value was seen - the column is text; free the numeric sketch
+            self.numeric = False
+            self.quantiles = None
+            return
+        self._merge_moments(len(values), values.mean() if len(values) else 0.0,
+                            ((values - values.mean()) ** 2).sum() if len(values) else 0.0,
+                            values.min(initial=np.inf), values.max(initial=-np.inf))
+        self.integral = self.integral and bool(np.all(np.mod(values, 1) == 0))
+        self.quantiles.update(values)
+
+    def _merge_moments(self, count, mean, m2, min_val, max_val):
+        # Chan et al. parallel combination of count / mean / M2
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, min_val)
+        self.max = max(self.max, max_val)
+
+    def merge(self, other):
+        """Merge the profile of the same column from another chunk/partition"""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        if self.numeric and other.numeric:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            self.integral = self.integral and other.integral
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.numeric = False
+            self.quantiles = None
+        return self
+
+    @property
+    def dtype(self):
+        """Data type the column would load as"""
+        if not self.numeric or self.count == 0:
+            return 'object'
+        return 'int64' if self.integral else 'float64'
+
+    @property
+    def std(self):
+        """Sample standard deviation"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    @property
+    def distinct_count(self):
+        """Estimated distinct values (HyperLogLog, never more than the non-null values seen)"""
+        return min(self.distinct.estimate(), self.rows - self.nulls)
+
+    def iqr_outliers(self):
+        """Return (lower bound, upper bound, estimated outlier count, count error)"""
+        q1 = self.quantiles.quantile(0.25)
+        q3 = self.quantiles.quantile(0.75)
+        lower = q1 - 1.5 * (q3 - q1)
+        upper = q3 + 1.5 * (q3 - q1)
+        # Outlier count from the ranks of the two bounds
+        fraction = self.quantiles.rank(lower) + (1 - self.quantiles.rank(upper, inclusive=True))
+        error = 2 * self.quantiles.rank_error() * self.count
+        return lower, upper, int(round(fraction * self.count)), int(math.ceil(error))
+
+
+# ==================== COVARIANCE (CORRELATION MATRIX) ====================
+
+class CovarianceSketch:
+    """Mergeable pairwise covariance / correlation of numeric columns (k × k state, any row count)"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        # Pairwise-complete statistics (same NaN handling as DataFrame.corr()):
+        # count[i, j] rows with both i and j present, mean[i, j] mean of i over those rows,
+        # m2[i, j] squared deviations of i over those rows, comoment[i, j] cross deviations of i and j
+        self.count = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    def update(self, chunk):
+        """Add one chunk (a DataFrame holding the numeric columns)"""
+        values = chunk[self.columns].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        if not present.any():
+            return self
+        # Shift by the chunk means first so the sums below do not lose precision
+        # (columns with no value in the chunk are not shifted)
+        present_count = present.sum(axis=0)
+        present_sum = np.where(present, values, 0.0).sum(axis=0)
+        shift = np.divide(present_sum, present_count, out=np.zeros(len(self.columns)), where=present_count > 0)
+        centered = np.where(present, values - shift, 0.0)
+        mask = present.astype(np.float64)
+        # Every pair at once: three k × k matrix products
+        count = mask.T @ mask
+        sums = centered.T @ mask  # sums[i, j]: sum of i over rows where j is present
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, sums / count, 0.0)
+        m2 = (centered ** 2).T @ mask - mean * sums
+        comoment = centered.T @ centered - mean * sums.T
+        self._merge_moments(count, mean + shift[:, None], m2, comoment)
+        return self
+
+    def _merge_moments(self, count, mean, m2, comoment):
+        # Chan et al. parallel combination, element by element over all pairs
+        total = self.count + count
+        share = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        weight = self.count * share  # n_a × n_b / n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + m2 + delta ** 2 * weight
+        # delta.T[i, j] is the shift of j's mean over the same (i, j) rows
+        self.comoment = self.comoment + comoment + delta * delta.T * weight
+        self.count = total
+
+    def merge(self, other):
+        """Merge the sketch of the same columns from another chunk/partition"""
+        self._merge_moments(other.count, other.mean, other.m2, other.comoment)
+        return self
+
+    def covariance(self):
+        """Return the sample covariance matrix as a DataFrame"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = np.where(self.count > 1, self.comoment / (self.count - 1), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """Return the Pearson correlation matrix as a DataFrame"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr = np.where(self.count > 1, np.clip(corr, -1, 1), np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(self.m2) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+# Column pairs whose |correlation| exceeds a threshold (upper triangle only, each pair once)
+def strong_pairs(corr, threshold=0.7):
+    """Return a DataFrame (Column_1, Column_2, r) in row-major order of the matrix"""
+    values = corr.to_numpy()
+    upper = np.triu(np.ones(values.shape, dtype=bool), k=1)
+    rows, cols = np.nonzero(upper & (np.abs(values) > threshold))
+    return pd.DataFrame({'Column_1': corr.index[rows], 'Column_2': corr.columns[cols], 'r': values[rows, cols]})
+
+
+class StreamingProfile:
+    """Mergeable profile of a whole dataset built chunk by chunk"""
+
+    def __init__(self, track_duplicates=False, **sketch_options):
+        self.sketch_options = sketch_options
+        self.rows = 0
+        self.chunks = 0
+        self.columns = {}  # Column name -> ColumnSketch (insertion keeps file order)
+        self.row_hashes = HyperLogLog(sketch_options.get('hll_precision', 12))
+        # Optional exact duplicate count (8 bytes per distinct row - not constant memory)
+        self.duplicates = DuplicateTracker() if track_duplicates else None
+
+    def update(self, chunk):
+        """Add one chunk (a DataFrame of raw string values)"""
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnSketch(col, **self.sketch_options)
+            self.columns[col].update(chunk[col])
+        # Whole-row fingerprints are computed once: HLL estimate + optional exact duplicate tracking
+        fingerprints = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        self.row_hashes.add_hashes(fingerprints)
+        if self.duplicates is not None:
+            self.duplicates.update(fingerprints)
+        self.rows += len(chunk)
+        self.chunks += 1
+        return self
+
+    def merge(self, other):
+        """Merge a partial profile of another chunk/partition"""
+        for col, sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(sketch)
+            else:
+                self.columns[col] = sketch
+        self.row_hashes.merge(other.row_hashes)
+        if self.duplicates is not None and other.duplicates is not None:
+            self.duplicates.merge(other.duplicates)
+        else:
+            self.duplicates = None
+        self.rows += other.rows
+        self.chunks += other.chunks
+        return self
+
+    @property
+    def distinct_rows(self):
+        """Estimated distinct rows (HyperLogLog, never more than the rows seen)"""
+        return min(self.row_hashes.estimate(), self.rows)
+
+
+# Profile a CSV file in chunks with constant memory
+def profile_csv_streaming(path, chunksize=50000, track_duplicates=False, **sketch_options):
+    """Return a StreamingProfile of a CSV file read chunk by chunk"""
+    profile = StreamingProfile(track_duplicates=track_duplicates, **sketch_options)
+    # Read everything as text so each chunk is typed the same way; numbers are parsed by the sketches
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        profile.update(chunk)
+    return profile
+
+
+# Build the data_quality_summary.csv table (with error columns) from a streaming profile
+def streaming_summary_table(profile):
+    """Return one summary row per column with estimates and their error bounds"""
+    rows = []
+    for col, sketch in profile.columns.items():
+        numeric = sketch.numeric and sketch.count > 0
+        rows.append({
+            'Column': col,
+            'DataType': sketch.dtype,
+            'Non_Null_Count': sketch.rows - sketch.nulls,
+            'Null_Count': sketch.nulls,
+            'Null_Percentage': (sketch.nulls / sketch.rows) * 100 if sketch.rows else 0.0,
+            'Unique_Values': int(round(sketch.distinct_count)),
+            'Unique_Values_RelError': sketch.distinct.relative_error(),
+            'Min': sketch.min if numeric else None,
+            'Max': sketch.max if numeric else None,
+            'Mean': sketch.mean if numeric else None,
+            'Median': sketch.quantiles.quantile(0.5) if numeric else None,
+            'Median_RankError': sketch.quantiles.rank_error() if numeric else None,
+            'Std': sketch.std if numeric else None
+        })
+    return pd.DataFrame(rows)
+
+
+# Build the text data quality report from a streaming profile
+def streaming_report_lines(profile, input_path):
+    """Return report lines where every estimate is followed by its error bound"""
+    lines = []
+    lines.append("=" * 80)
+    lines.append("DATA QUALITY REPORT (STREAMING MODE - SKETCH ESTIMATES)")
+    lines.append("=" * 80)
+    lines.append("")
+    lines.append(f"Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append(f"Dataset: {input_path}")
+    lines.append(f"Chunks processed: {profile.chunks}")
+    lines.append("")
+
+    # Section 1: overview (exact)
+    lines.append("-" * 80)
+    lines.append("SECTION 1: BASIC DATASET OVERVIEW")
+    lines.append("-" * 80)
+    lines.append(f"Total Rows: {profile.rows:,}")
+    lines.append(f"Total Columns: {len(profile.columns)}")
+    lines.append("")
+
+    # Section 2: duplicates (estimated from distinct counts)
+    lines.append("-" * 80)
+    lines.append("SECTION 2: DUPLICATE RECORDS CHECK (ESTIMATED)")
+    lines.append("-" * 80)
+    row_error = profile.row_hashes.relative_error()
+    distinct_rows = profile.distinct_rows
+    lines.append(f"Distinct rows: ~{distinct_rows:,.0f} (±{row_error * 100:.1f}%)")
+    lines.append(f"Duplicate rows: ~{max(profile.rows - distinct_rows, 0):,.0f} (±{distinct_rows * row_error:,.0f})")
+    if profile.duplicates is not None:
+        lines.append(f"Duplicate rows (exact, from fingerprints): {profile.duplicates.duplicates:,}")
+    if 'customerID' in profile.columns:
+        ids = profile.columns['customerID']
+        distinct_ids = ids.distinct_count
+        lines.append(f"Distinct customerIDs: ~{distinct_ids:,.0f} (±{ids.distinct.relative_error() * 100:.1f}%)")
+    lines.append("")
+
+    # Section 3: missing values (exact)
+    lines.append("-" * 80)
+    lines.append("SECTION 3: MISSING VALUES ANALYSIS")
+    lines.append("-" * 80)
+    with_missing = sorted((s for s in profile.columns.values() if s.nulls > 0), key=lambda s: -s.nulls)
+    for sketch in with_missing:
+        lines.append(f"  {sketch.name}: {sketch.nulls} missing ({sketch.nulls / sketch.rows * 100:.2f}%)")
+    if not with_missing:
+        lines.append("✅ No missing values found")
+    lines.append("")
+
+    # Section 5: numeric columns (moments exact, quantiles approximate)
+    lines.append("-" * 80)
+    lines.append("SECTION 5: NUMERIC COLUMNS PROFILING")
+    lines.append("-" * 80)
+    for sketch in profile.columns.values():
+        if not sketch.numeric or sketch.count == 0:
+            continue
+        rank_error = sketch.quantiles.rank_error() * 100
+        lower, upper, outliers, outlier_error = sketch.iqr_outliers()
+        lines.append(f"\nColumn: {sketch.name}")
+        lines.append(f"  Min: {sketch.min:.2f}, Max: {sketch.max:.2f}")
+        lines.append(f"  Mean: {sketch.mean:.2f}, Std: {sketch.std:.2f}")
+        lines.append(f"  Median: ~{sketch.quantiles.quantile(0.5):.2f} (±{rank_error:.1f}% rank)")
+        lines.append(f"  IQR bounds: ~[{lower:.2f}, {upper:.2f}] (±{rank_error:.1f}% rank)")
+        lines.append(f"  Outliers (IQR): ~{outliers} (±{outlier_error})")
+    lines.append("")
+
+    # Section 6: categorical columns (distinct counts and heavy hitters approximate)
+    lines.append("-" * 80)
+    lines.append("SECTION 6: CATEGORICAL COLUMNS PROFILING")
+    lines.append("-" * 80)
+    for sketch in profile.columns.values():
+        if sketch.numeric and sketch.count > 0:
+            continue
+        non_null = sketch.rows - sketch.nulls
+        lines.append(f"\nColumn: {sketch.name}")
+        lines.append(f"  Unique: ~{sketch.distinct_count:,.0f} (±{sketch.distinct.relative_error() * 100:.1f}%), Non-Null: {non_null}")
+        error_note = "exact" if sketch.frequent.error == 0 else f"may be under by up to {sketch.frequent.error}"
+        for value, count in sketch.frequent.top(5).items():
+            lines.append(f"    {value}: {count} ({count / non_null * 100:.2f}%) [{error_note}]")
+    lines.append("")
+
+    # Section 9: completeness (exact)
+    lines.append("-" * 80)
+    lines.append("SECTION 9: DATA QUALITY SUMMARY")
+    lines.append("-" * 80)
+    total_cells = profile.rows * len(profile.columns)
+    missing_cells = sum(s.nulls for s in profile.columns.values())
+    completeness = (total_cells - missing_cells) / total_cells * 100 if total_cells else 0.0
+    lines.append(f"Total Cells: {total_cells:,}")
+    lines.append(f"Complete: {total_cells - missing_cells:,}, Missing: {missing_cells:,}")
+    lines.append(f"Completeness: {completeness:.2f}%")
+    lines.append("")
+    return lines
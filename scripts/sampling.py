@@ -0,0 +1,124 @@
+"""
+STRATIFIED SAMPLING
+Nested stratified samples and design-based estimates with confidence intervals
+(used by the --sample preview modes)
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For numerical operations
+
+# z-value of a two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+
+# Every stratum keeps at least this many sampled rows (needed for a variance estimate)
+MIN_PER_STRATUM = 2
+
+
+# Per-stratum sample sizes for a total of about n rows
+def proportional_allocation(population_sizes, n):
+    """Return sample sizes proportional to the strata (at least MIN_PER_STRATUM, at most the stratum)"""
+    total = population_sizes.sum()
+    sizes = np.round(n * population_sizes / max(total, 1)).astype(np.int64)
+    sizes = np.maximum(sizes, MIN_PER_STRATUM)
+    return np.minimum(sizes, population_sizes)
+
+
+class StratifiedReservoir:
+    """Nested stratified samples of a stream of chunks, drawn in one pass (bottom-k reservoir per stratum)"""
+
+    def __init__(self, strata_cols, capacity, seed=42):
+        self.strata_cols = list(strata_cols)
+        # Every row gets a uniform random key; the rows with the smallest keys of a stratum are a
+        # simple random sample of it. Each stratum keeps its `capacity` smallest keys, enough for
+        # any allocation of up to `capacity` rows once the stratum sizes are known
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.reservoirs = {}  # Stratum label -> (rows, keys) sorted by key
+        self.population = {}  # Stratum label -> rows seen
+        self.categorical = []
+
+    def update(self, chunk):
+        """Add one chunk (a DataFrame with the strata columns)"""
+        if not self.categorical:
+            self.categorical = [col for col in chunk.columns if isinstance(chunk[col].dtype, pd.CategoricalDtype)]
+        keys = self.rng.random(len(chunk))
+        groups = chunk.groupby(self.strata_cols, sort=False, dropna=False, observed=True)
+        for label, positions in groups.indices.items():
+            label = label if isinstance(label, tuple) else (label,)
+            self.population[label] = self.population.get(label, 0) + len(positions)
+            rows, row_keys = chunk.iloc[positions], keys[positions]
+            if label in self.reservoirs:
+                kept_rows, kept_keys = self.reservoirs[label]
+                rows, row_keys = pd.concat([kept_rows, rows]), np.concatenate([kept_keys, row_keys])
+            # Keep the smallest keys only (memory: strata × capacity rows)
+            order = np.argsort(row_keys, kind='stable')[:self.capacity]
+            self.reservoirs[label] = (rows.iloc[order], row_keys[order])
+        return self
+
+    def sample(self, n):
+        """Return (sample DataFrame, stratum code per row, population sizes, sample sizes, labels)"""
+        labels = sorted(self.population, key=lambda label: tuple(map(str, label)))
+        population_sizes = np.array([self.population[label] for label in labels], dtype=np.int64)
+        sample_sizes = np.minimum(proportional_allocation(population_sizes, min(n, self.capacity)),
+                                  [len(self.reservoirs[label][1]) for label in labels])
+        parts = [self.reservoirs[label][0].iloc[:size] for label, size in zip(labels, sample_sizes)]
+        sample = pd.concat(parts, ignore_index=True)
+        # Chunks may carry different category sets: restore one categorical dtype per column
+        for col in self.categorical:
+            sample[col] = sample[col].astype('category')
+        codes = np.repeat(np.arange(len(labels)), sample_sizes)
+        return sample, codes, population_sizes, sample_sizes, labels
+
+
+# Stratified ratio estimate R = sum(w*y*d) / sum(w*d) with a linearized standard error
+def ratio_estimate(y, domain, codes, population_sizes, sample_sizes):
+    """Return (estimate, standard error) of the mean of y over the domain rows"""
+    y = np.where(domain, np.asarray(y, dtype=np.float64), 0.0)
+    domain = np.asarray(domain, dtype=np.float64)
+    num_strata = len(population_sizes)
+    # Design weight of a sampled row = stratum population / stratum sample size
+    stratum_weights = population_sizes / np.maximum(sample_sizes, 1)
+    weights = stratum_weights[codes]
+    domain_total = np.sum(weights * domain)
+    if domain_total == 0:
+        return np.nan, np.nan
+    estimate = np.sum(weights * y) / domain_total
+
+    # Linearized values and their within-stratum variances (all strata at once via bincount)
+    u = domain * (y - estimate) / domain_total
+    n_h = np.bincount(codes, minlength=num_strata).astype(np.float64)
+    sum_u = np.bincount(codes, weights=u, minlength=num_strata)
+    sum_u2 = np.bincount(codes, weights=u * u, minlength=num_strata)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_h = (sum_u2 - sum_u ** 2 / n_h) / (n_h - 1)
+    var_h = np.where(n_h > 1, var_h, 0.0)
+    # Finite population correction: a fully sampled stratum adds no variance
+    fpc = 1 - n_h / np.maximum(population_sizes, 1)
+    variance = np.sum(population_sizes ** 2 * fpc * var_h / np.maximum(n_h, 1))
+    return estimate, float(np.sqrt(max(variance, 0.0)))
+
+
+# Weighted quantile of the sample (inverse of the estimated population CDF)
+def weighted_quantile(values, weights, q):
+    """Return the q-th quantile of values under the given design weights"""
+    order = np.argsort(values, kind='stable')
+    values = values[order]
+    cumulative = np.cumsum(weights[order]) / np.sum(weights)
+    return values[min(np.searchsorted(cumulative, np.clip(q, 0, 1)), len(values) - 1)]
+
+
+# Quantile with a Woodruff confidence interval
+def quantile_estimate(y, domain, codes, population_sizes, sample_sizes, q, z=Z_95):
+    """Return (estimate, lower, upper) of the q-th quantile of y over the domain rows"""
+    if not np.any(domain):
+        return np.nan, np.nan, np.nan
+    weights = (population_sizes / np.maximum(sample_sizes, 1))[codes]
+    values = np.asarray(y, dtype=np.float64)[domain]
+    estimate = weighted_quantile(values, weights[domain], q)
+    # Standard error of the CDF at the estimate, mapped back through the quantile function
+    _, se = ratio_estimate(np.asarray(y, dtype=np.float64) <= estimate, domain, codes,
+                           population_sizes, sample_sizes)
+    lower = weighted_quantile(values, weights[domain], q - z * se)
+    upper = weighted_quantile(values, weights[domain], q + z * se)
+    return estimate, lower, upper
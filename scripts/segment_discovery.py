@@ -0,0 +1,149 @@
+"""
+SEGMENT DISCOVERY
+High-churn customer segments from every 2- and 3-way combination of conditions.
+Each condition (a categorical value or a quantile bin of a numeric column) is one
+bitmap of the customers it covers (64 customers per uint64 word); a segment's size
+and churned count are popcounts of ANDed bitmaps. Combinations below the minimum
+support are pruned before they are extended (apriori), and a segment is kept only
+if it has a higher churn rate than every smaller segment it extends.
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For bitmaps and popcounts
+from churn_cube import encode, encode_target  # Integer codes / 0-1 target
+
+
+# ==================== BITMAPS ====================
+
+# Pack boolean rows (conditions × customers) into uint64 words
+def pack_bitmaps(masks):
+    """Return an array (conditions × words) with one bit per customer"""
+    packed = np.packbits(np.atleast_2d(masks), axis=1, bitorder='little')
+    # Pad each bitmap to whole 64-bit words (padding bits are 0, so they never count)
+    padding = (-packed.shape[1]) % 8
+    packed = np.pad(packed, ((0, 0), (0, padding)))
+    return packed.view(np.uint64)
+
+
+# Number of customers in each bitmap
+def popcount(bitmaps):
+    return np.bitwise_count(bitmaps).sum(axis=-1, dtype=np.int64)
+
+
+# Quantile bin edges and labels of a numeric column
+def _quantile_bins(values, name, bins):
+    edges = np.unique(np.nanquantile(values, np.linspace(0, 1, bins + 1)))
+    labels = []
+    for i in range(len(edges) - 1):
+        if i == 0:
+            labels.append(f"{name} ≤ {edges[1]:g}")
+        elif i == len(edges) - 2:
+            labels.append(f"{name} > {edges[i]:g}")
+        else:
+            labels.append(f"{edges[i]:g} < {name} ≤ {edges[i + 1]:g}")
+    return edges, labels
+
+
+# One condition per categorical value and per numeric quantile bin
+def build_conditions(df, categorical_columns, numeric_columns, bins=4, max_values=20):
+    """Return (condition labels, column index of each condition, boolean masks conditions × customers)"""
+    labels, owners, masks = [], [], []
+    for col in categorical_columns:
+        codes, values = encode(df[col])
+        if len(values) > max_values:
+            continue  # Identifier-like columns give no reusable segments
+        for code, value in enumerate(values):
+            labels.append(f"{col} = {value}")
+            owners.append(col)
+            masks.append(codes == code)
+    for col in numeric_columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        if np.isnan(values).all():
+            continue
+        edges, bin_labels = _quantile_bins(values, col, bins)
+        # Right-closed bins, the first one including the minimum (missing values fall in no bin)
+        codes = np.clip(np.searchsorted(edges, values, side='left') - 1, 0, len(edges) - 2)
+        codes[np.isnan(values)] = -1
+        for code, label in enumerate(bin_labels):
+            labels.append(label)
+            owners.append(col)
+            masks.append(codes == code)
+    return labels, owners, np.array(masks, dtype=bool).reshape(len(masks), len(df))
+
+
+# ==================== DISCOVERY ====================
+
+def discover_segments(df, categorical_columns, numeric_columns, target='Churn', positive='Yes',
+                      min_support=0.02, top_k=10, bins=4, max_values=20):
+    """Return the top-k 2- and 3-condition segments by churn lift (support ≥ min_support)"""
+    churn = encode_target(df[target], positive).astype(bool)
+    labels, owners, masks = build_conditions(df, categorical_columns, numeric_columns, bins, max_values)
+    bitmaps = pack_bitmaps(masks)
+    churn_bitmap = pack_bitmaps(churn)[0]
+    n = len(df)
+    overall_rate = churn.mean()
+    min_customers = int(np.ceil(min_support * n))
+
+    # Conditions covering exactly the same customers (e.g. InternetService = No and
+    # OnlineSecurity = No internet service) are one condition: keep the first label
+    _, first = np.unique(bitmaps, axis=0, return_index=True)
+    keep = np.sort(first)
+    keep = keep[popcount(bitmaps[keep]) >= min_customers]
+    labels = [labels[i] for i in keep]
+    owner_codes = pd.factorize(pd.Series([owners[i] for i in keep]))[0]
+    bitmaps = bitmaps[keep]
+    m = len(labels)
+
+    # Single conditions (the baseline every combination has to beat)
+    size1 = popcount(bitmaps)
+    churned1 = popcount(bitmaps & churn_bitmap)
+    rate1 = churned1 / np.maximum(size1, 1)
+    segments = []
+
+    # Pairs: every condition ANDed with all later conditions of other columns, one row at a time
+    pair_size = np.zeros((m, m), dtype=np.int64)
+    pair_churned = np.zeros((m, m), dtype=np.int64)
+    for i in range(m - 1):
+        both = bitmaps[i] & bitmaps[i + 1:]
+        pair_size[i, i + 1:] = popcount(both)
+        pair_churned[i, i + 1:] = popcount(both & churn_bitmap)
+    different = owner_codes[:, None] != owner_codes[None, :]
+    frequent = np.triu(different & (pair_size >= min_customers), k=1)
+    frequent |= frequent.T
+    pair_size = np.maximum(pair_size, pair_size.T)
+    pair_churned = np.maximum(pair_churned, pair_churned.T)
+    pair_rate = np.where(frequent, pair_churned / np.maximum(pair_size, 1), np.nan)
+    # A pair is kept only if it beats both of its conditions on their own
+    rows, cols = np.nonzero(np.triu(frequent, k=1))
+    better = pair_rate[rows, cols] > np.maximum(rate1[rows], rate1[cols])
+    for i, j in zip(rows[better], cols[better]):
+        segments.append({'conditions': (i, j), 'customers': pair_size[i, j], 'churned': pair_churned[i, j]})
+
+    # Triples: only extend frequent pairs (i, j) with a later k whose pairs with i and j are frequent too
+    for i, j in zip(rows, cols):
+        candidates = np.flatnonzero(frequent[i] & frequent[j] & (np.arange(m) > j))
+        if len(candidates) == 0:
+            continue
+        both = bitmaps[i] & bitmaps[j]
+        triple = both & bitmaps[candidates]
+        size3 = popcount(triple)
+        churned3 = popcount(triple & churn_bitmap)
+        rate3 = churned3 / np.maximum(size3, 1)
+        # Best of the three pairs and three single conditions it extends
+        parents = np.fmax(pair_rate[i, j], np.fmax(pair_rate[i, candidates], pair_rate[j, candidates]))
+        parents = np.fmax(parents, np.maximum(max(rate1[i], rate1[j]), rate1[candidates]))
+        for k in np.flatnonzero((size3 >= min_customers) & (rate3 > parents)):
+            segments.append({'conditions': (i, j, candidates[k]), 'customers': size3[k], 'churned': churned3[k]})
+
+    table = pd.DataFrame({
+        'Segment': [' & '.join(labels[c] for c in s['conditions']) for s in segments],
+        'Conditions': [len(s['conditions']) for s in segments],
+        'Customers': [int(s['customers']) for s in segments],
+        'Churned': [int(s['churned']) for s in segments],
+    })
+    table['Support'] = table['Customers'] / n * 100
+    table['Churn_Rate'] = table['Churned'] / table['Customers'] * 100
+    table['Lift'] = table['Churn_Rate'] / (overall_rate * 100)
+    table = table.sort_values(['Lift', 'Customers'], ascending=[False, False], kind='stable')
+    return table.head(top_k).reset_index(drop=True)
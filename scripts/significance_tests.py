@@ -0,0 +1,110 @@
+"""
+SIGNIFICANCE TESTS
+Churn association tests computed from contingency tables instead of row-level loops.
+Categorical features: chi-square test of independence and Cramér's V, for every column at
+once from the per-value customers/churned counts (the bivariate lift table).
+Numeric features: Mann-Whitney U and two-sample Kolmogorov-Smirnov, from one
+distinct value × churn count table per column (cumulative sums, ties handled exactly).
+"""
+
+# Import required libraries
+import pandas as pd  # For data manipulation
+import numpy as np  # For vectorized statistics
+from scipy import stats  # For distribution tail probabilities (p-values)
+from churn_cube import encode_target  # 0/1 target encoding
+
+# Columns of the significance table
+RESULT_COLUMNS = ['Feature', 'Type', 'Test', 'Statistic', 'DoF', 'P_Value', 'Effect', 'Effect_Measure']
+
+
+# ==================== CATEGORICAL FEATURES ====================
+
+# Chi-square / Cramér's V of every column of a lift table (Column, Customers, Churned per value)
+def categorical_tests(table):
+    """Return one chi-square row per column: 2 × k table of churned / retained customers per value"""
+    columns, column_index = np.unique(table['Column'].to_numpy(dtype=str), return_inverse=True)
+    customers = table['Customers'].to_numpy(dtype=np.float64)
+    churned = table['Churned'].to_numpy(dtype=np.float64)
+    # Per-column totals by bincount over the column index (all columns in one go)
+    n = np.bincount(column_index, weights=customers, minlength=len(columns))
+    n_churned = np.bincount(column_index, weights=churned, minlength=len(columns))
+    rate = n_churned / n
+    # Expected churned / retained customers per value under independence
+    expected_churned = customers * rate[column_index]
+    expected_retained = customers - expected_churned
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cells = ((churned - expected_churned) ** 2 / expected_churned
+                 + ((customers - churned) - expected_retained) ** 2 / expected_retained)
+    chi2 = np.bincount(column_index, weights=np.nan_to_num(cells), minlength=len(columns))
+    dof = np.bincount(column_index, minlength=len(columns)) - 1
+    # Constant target within a column (all or no churn) carries no association
+    chi2 = np.where((rate > 0) & (rate < 1), chi2, 0.0)
+    # Cramér's V of a 2 × k table: sqrt(chi2 / (n × min(2 - 1, k - 1))) = sqrt(chi2 / n)
+    cramers_v = np.sqrt(chi2 / n)
+    return pd.DataFrame({
+        'Feature': columns, 'Type': 'categorical', 'Test': 'chi-square', 'Statistic': chi2, 'DoF': dof,
+        'P_Value': np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), 1.0),
+        'Effect': np.where(dof > 0, cramers_v, 0.0), 'Effect_Measure': "Cramér's V",
+    })
+
+
+# ==================== NUMERIC FEATURES ====================
+
+# Distinct value × churn contingency table of one numeric column (missing values dropped)
+def value_churn_table(values, churn):
+    """Return (sorted distinct values, retained count, churned count) per distinct value"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    distinct, inverse = np.unique(values[valid], return_inverse=True)
+    churned = np.bincount(inverse, weights=churn[valid], minlength=len(distinct))
+    total = np.bincount(inverse, minlength=len(distinct))
+    return distinct, total - churned, churned
+
+
+# Mann-Whitney U and Kolmogorov-Smirnov of churned vs retained customers, from the count table
+def numeric_tests(name, retained, churned):
+    """Return two result rows (Mann-Whitney U, KS) for one numeric column"""
+    n0, n1 = retained.sum(), churned.sum()
+    if n0 == 0 or n1 == 0:
+        return []
+    # U of the churned group: pairs where the churned value is above the retained one (ties count 1/2)
+    retained_below = np.cumsum(retained) - retained
+    u = float((churned * (retained_below + retained / 2)).sum())
+    # Normal approximation with tie correction and continuity correction
+    n = n0 + n1
+    ties = retained + churned
+    variance = n0 * n1 / 12 * ((n + 1) - (ties ** 3 - ties).sum() / (n * (n - 1)))
+    mean_u = n0 * n1 / 2
+    z = (abs(u - mean_u) - 0.5) / np.sqrt(variance) if variance > 0 else 0.0
+    mw_p = min(1.0, 2 * stats.norm.sf(z)) if variance > 0 else 1.0
+    # KS: largest gap between the two empirical CDFs at the distinct values
+    ks = float(np.abs(np.cumsum(churned) / n1 - np.cumsum(retained) / n0).max())
+    ks_p = float(stats.kstwo.sf(ks, np.round(n0 * n1 / n)))
+    return [
+        # Rank-biserial correlation: > 0 when churned customers tend to have higher values
+        {'Feature': name, 'Type': 'numeric', 'Test': 'Mann-Whitney U', 'Statistic': u, 'DoF': np.nan,
+         'P_Value': mw_p, 'Effect': 2 * u / (n0 * n1) - 1, 'Effect_Measure': 'rank-biserial r'},
+        {'Feature': name, 'Type': 'numeric', 'Test': 'Kolmogorov-Smirnov', 'Statistic': ks, 'DoF': np.nan,
+         'P_Value': ks_p, 'Effect': ks, 'Effect_Measure': 'KS D'},
+    ]
+
+
+# ==================== SIGNIFICANCE TABLE ====================
+
+# All tests, ranked
+def significance_table(df, lift_table, numeric_columns, target='Churn', positive='Yes', alpha=0.05):
+    """Return the ranked table of chi-square (categorical) and Mann-Whitney / KS (numeric) tests"""
+    churn = encode_target(df[target], positive).astype(np.float64)
+    rows = []
+    for col in numeric_columns:
+        _, retained, churned = value_churn_table(df[col], churn)
+        rows.extend(numeric_tests(col, retained, churned))
+    table = pd.concat([categorical_tests(lift_table), pd.DataFrame(rows, columns=RESULT_COLUMNS)],
+                      ignore_index=True)
+    # Bonferroni: the threshold is shared by every test in the table
+    table['Significant'] = table['P_Value'] < alpha / max(len(table), 1)
+    table['DoF'] = table['DoF'].astype('Int64')  # Numeric tests have no degrees of freedom
+    # Most significant first; the effect size orders tests whose p-values underflow to 0
+    table['_abs_effect'] = table['Effect'].abs()
+    table = table.sort_values(['P_Value', '_abs_effect'], ascending=[True, False], kind='stable')
+    return table.drop(columns='_abs_effect').reset_index(drop=True)
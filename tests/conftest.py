@@ -0,0 +1,48 @@
+# Pipeline modules live in scripts/ and import each other by bare module name
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from data_schema import load_stage_data  # noqa: E402
+
+
+# Small centralized-stage extract with the quirks the cleaning rules handle
+def make_raw_customers(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    tenure = rng.integers(0, 72, n)
+    monthly = rng.uniform(20, 110, n).round(2)
+    total = (tenure * monthly * rng.uniform(0.9, 1.1, n)).round(2).astype(str)
+    total[tenure == 0] = ' '  # Not billed yet
+    df = pd.DataFrame({
+        'customerID': [f'{i:04d}-CUST' for i in range(n)],
+        'gender': rng.choice(['Male', 'Female', 'male', ' Female'], n, p=[0.45, 0.45, 0.05, 0.05]),
+        'SeniorCitizen': rng.choice([0, 1], n, p=[0.85, 0.15]),
+        'tenure': tenure,
+        'InternetService': rng.choice(['DSL', 'Fiber optic', 'No'], n),
+        'Contract': rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+        'MonthlyCharges': monthly,
+        'TotalCharges': total,
+        'Churn': rng.choice(['Yes', 'No'], n, p=[0.27, 0.73]),
+        'RegistrationDate': pd.Timestamp('2024-01-01') - pd.to_timedelta(tenure * 30, unit='D'),
+        'LastContactDate': pd.Timestamp('2025-10-01') + pd.to_timedelta(rng.integers(0, 90, n), unit='D'),
+        'FailedPayments': rng.poisson(0.6, n),
+    })
+    df['RegistrationDate'] = df['RegistrationDate'].dt.strftime('%Y-%m-%d')
+    df['LastContactDate'] = df['LastContactDate'].dt.strftime('%Y-%m-%d')
+    df.loc[rng.choice(n, 8, replace=False), 'MonthlyCharges'] = np.nan
+    df.loc[rng.choice(n, 120, replace=False), 'LastContactDate'] = np.nan
+    df.loc[5, 'RegistrationDate'] = '2024-13-45'  # Unparseable
+    return df
+
+
+@pytest.fixture
+def raw_customers(tmp_path):
+    # Written and read back with the stage schema, as data_cleaning.py loads it
+    path = tmp_path / 'centralized.csv'
+    make_raw_customers().to_csv(path, index=False)
+    return load_stage_data(path, 'cleaning')
@@ -0,0 +1,42 @@
+# Binary_Flags packing: round trip, predicates, no target leakage
+import numpy as np
+import pandas as pd
+
+from binary_flags import FLAG_FIELDS, FLAG_BITS, pack_flags, unpack_flags, flag_counts, match, count_set
+
+
+def make_flag_frame(n=500, seed=3):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, true_values in FLAG_FIELDS.items():
+        if true_values == ['Yes']:
+            data[col] = pd.Categorical(rng.choice(['Yes', 'No', 'No internet service'], n))
+        else:
+            data[col] = rng.integers(0, 2, n).astype(type(true_values[0]))
+    return pd.DataFrame(data)
+
+
+def test_pack_unpack_round_trip():
+    df = make_flag_frame()
+    bits = pack_flags(df)
+    assert bits.dtype == np.uint32
+    unpacked = unpack_flags(bits)
+    for col, true_values in FLAG_FIELDS.items():
+        assert (unpacked[col].to_numpy() == df[col].isin(true_values).to_numpy()).all(), col
+    expected = pd.Series({col: int(df[col].isin(v).sum()) for col, v in FLAG_FIELDS.items()})
+    pd.testing.assert_series_equal(flag_counts(bits), expected, check_names=False)
+
+
+def test_predicates_match_boolean_columns():
+    df = make_flag_frame()
+    bits = pack_flags(df)
+    unpacked = unpack_flags(bits)
+    expected = unpacked['Partner'] & unpacked['TechSupport'] & ~unpacked['PaperlessBilling']
+    assert (match(bits, ['Partner', 'TechSupport'], ['PaperlessBilling']) == expected.to_numpy()).all()
+    assert (count_set(bits) == unpacked.sum(axis=1).to_numpy()).all()
+
+
+def test_target_and_multi_valued_columns_are_not_packed():
+    assert 'Churn' not in FLAG_FIELDS and 'InternetService' not in FLAG_FIELDS
+    assert all(len(values) == 1 for values in FLAG_FIELDS.values())
+    assert max(FLAG_BITS.values()) < 32
@@ -0,0 +1,21 @@
+# Partitioned cleaning must give exactly the serial result
+import pandas.testing as pdt
+
+from cleaning_rules import CLEANING_RULES, cleaning_report_lines, run_cleaning, run_cleaning_partitioned
+
+
+def report_without_timestamp(ctx, shape, result):
+    return [line for line in cleaning_report_lines(ctx, 'in.csv', 'out.csv', shape, result)
+            if not line.startswith('Generated:')]
+
+
+def test_partitioned_cleaning_equals_serial(raw_customers):
+    shape = raw_customers.shape
+    serial, serial_ctx = run_cleaning(raw_customers.copy(), CLEANING_RULES)
+    partitioned, partitioned_ctx = run_cleaning_partitioned(raw_customers.copy(), CLEANING_RULES,
+                                                            workers=2, partitions=3)
+    pdt.assert_frame_equal(serial, partitioned)
+    ids = serial['customerID'].to_numpy()
+    pdt.assert_frame_equal(serial_ctx.changes.to_frame(ids), partitioned_ctx.changes.to_frame(ids))
+    assert (report_without_timestamp(serial_ctx, shape, serial)
+            == report_without_timestamp(partitioned_ctx, shape, partitioned))
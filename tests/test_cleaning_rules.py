@@ -0,0 +1,51 @@
+# Cleaning rule defaults, opt-in imputation and wide bitmask flags
+import numpy as np
+import pandas as pd
+
+from cleaning_rules import CLEANING_RULES, cleaning_report_lines, run_cleaning, with_imputation
+
+
+def test_defaults_keep_the_baseline_fills(raw_customers):
+    missing = raw_customers['MonthlyCharges'].isna()
+    median = raw_customers['MonthlyCharges'].median()
+    cleaned, ctx = run_cleaning(raw_customers.copy(), CLEANING_RULES)
+    assert ctx.counters[2]['MonthlyCharges']['action'] == 'median'
+    assert (cleaned.loc[missing, 'MonthlyCharges'] == median).all()
+    # Blank TotalCharges of tenure=0 customers become 0
+    assert (cleaned.loc[cleaned['tenure'] == 0, 'TotalCharges'] == 0).all()
+
+
+def test_imputation_is_opt_in_per_column(raw_customers):
+    rules = with_imputation(CLEANING_RULES, ['MonthlyCharges'])
+    # The default rule set is not modified
+    assert all(rule.get('impute', {}) == {} for rule in CLEANING_RULES)
+    missing = raw_customers['MonthlyCharges'].isna()
+    cleaned, ctx = run_cleaning(raw_customers.copy(), rules)
+    counters = ctx.counters[2]['MonthlyCharges']
+    assert counters['action'] == 'group_median'
+    observed = raw_customers[~missing]
+    group_medians = observed.groupby(['Contract', 'InternetService'], observed=True)['MonthlyCharges'].median()
+    expected = [group_medians[(contract, service)] for contract, service
+                in raw_customers.loc[missing, ['Contract', 'InternetService']].itertuples(index=False)]
+    assert np.allclose(cleaned.loc[missing, 'MonthlyCharges'], expected)
+
+
+def test_bitmask_flags_spill_past_64_columns(raw_customers):
+    # The extract plus 60 numeric columns (72 in all), each extra column missing one cell
+    rng = np.random.default_rng(3)
+    extra = pd.DataFrame(rng.normal(size=(len(raw_customers), 60)), columns=[f'x{i:02d}' for i in range(60)])
+    for i in range(60):
+        extra.iloc[i, i] = np.nan
+    wide = pd.concat([raw_customers, extra], axis=1)
+    bits = {col: bit for bit, col in enumerate(wide.columns)}
+    cleaned, ctx = run_cleaning(wide.copy(), CLEANING_RULES)
+    assert cleaned['Imputed_Columns'].dtype == np.uint64
+    assert cleaned['Imputed_Columns_2'].dtype == np.uint8
+    assert ctx.counters[6]['Imputed_Columns']['bits'] == bits
+    # x59 (bit 71) lands in bit 7 of the second flag column, x51 (bit 63) in the top bit of the first
+    assert bits['x59'] == 71 and cleaned['Imputed_Columns_2'].iloc[59] == 1 << 7
+    assert cleaned['Imputed_Columns'].iloc[59] & np.uint64(1 << 63) == 0
+    assert cleaned['Imputed_Columns'].iloc[51] & np.uint64(1 << 63) != 0
+    assert 'Outlier_Columns' in cleaned.columns
+    report = '\n'.join(cleaning_report_lines(ctx, 'in.csv', 'out.csv', wide.shape, cleaned))
+    assert 'x59=Imputed_Columns_2 bit 7 (1)' in report
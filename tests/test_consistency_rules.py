@@ -0,0 +1,47 @@
+# Cross-column consistency rules: date anchoring and the per-row violation bitmask
+import numpy as np
+import pandas as pd
+import pytest
+
+from consistency_rules import CONSISTENCY_RULES, MAX_RULES, CompiledRuleSet, check_consistency, snapshot_date
+
+
+@pytest.fixture
+def customers():
+    # Registered 12 and 24 months before the last contact on 2024-01-31; the third row is 10 months off
+    return pd.DataFrame({
+        'customerID': ['A', 'B', 'C'],
+        'tenure': [12, 24, 14],
+        'RegistrationDate': ['2023-01-31', '2022-01-31', '2023-11-30'],
+        'LastContactDate': ['2024-01-31', '2023-06-01', None],
+    })
+
+
+def tenure_rule(summary):
+    return summary.set_index('Rule').loc['RegistrationDate consistent with tenure']
+
+
+def test_date_rules_are_anchored_to_the_extract(customers):
+    assert snapshot_date(customers) == pd.Timestamp('2024-01-31')
+    summary, samples, bitmask = check_consistency(customers)
+    rule = tenure_rule(summary)
+    # Same answer whatever day the check runs: only row C violates the rule
+    assert (rule['Applicable'], rule['Violations']) == (3, 1)
+    assert samples['RegistrationDate consistent with tenure']['customerID'].tolist() == ['C']
+    bit = np.uint64(1 << [r['name'] for r in CONSISTENCY_RULES].index('RegistrationDate consistent with tenure'))
+    assert ((bitmask & bit) > 0).tolist() == [False, False, True]
+
+
+def test_explicit_extract_date_overrides_the_snapshot(customers):
+    summary, _, _ = check_consistency(customers, as_of='2024-11-30')
+    # Ten months later rows A and B are off and row C matches
+    assert tenure_rule(summary)['Violations'] == 2
+
+
+def test_more_rules_than_bitmask_bits_is_rejected():
+    rules = [{'name': f'rule {i}', 'columns': ['tenure'], 'check': 'tenure >= 0'} for i in range(MAX_RULES + 1)]
+    with pytest.raises(ValueError, match='at most 64'):
+        CompiledRuleSet(rules)
+    # Exactly MAX_RULES rules still work, the last one using the top bit
+    _, _, bitmask = CompiledRuleSet(rules[:MAX_RULES]).evaluate(pd.DataFrame({'tenure': [-1, 1]}))
+    assert bitmask.tolist() == [2 ** 64 - 1, 0]
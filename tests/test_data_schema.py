@@ -0,0 +1,43 @@
+# Schema loader: bitmask columns survive a CSV round trip
+import numpy as np
+import pandas as pd
+
+from cleaning_rules import CLEANING_RULES, run_cleaning
+from data_schema import load_stage_data, column_type, is_bitmask_column
+
+
+def test_spill_columns_share_their_flag_type():
+    assert column_type('Imputed_Columns_2') == column_type('Imputed_Columns') == 'uint64'
+    assert is_bitmask_column('Outlier_Columns_3') and not is_bitmask_column('TotalCharges_Imputed')
+
+
+def test_masks_wider_than_32_bits_reload_exactly(tmp_path):
+    top = np.uint64(1) << np.uint64(63)
+    df = pd.DataFrame({
+        'customerID': ['a', 'b', 'c'],
+        'Imputed_Columns': np.array([1 << 41, top, 0], dtype=np.uint64),
+        'Imputed_Columns_2': np.array([0, 1 << 7, 3], dtype=np.uint8),
+        'Outlier_Columns': np.array([1 << 40, 1, 0], dtype=np.uint64),
+    })
+    path = tmp_path / 'clean.csv'
+    df.to_csv(path, index=False)
+    for stage in ['eda', 'features']:
+        loaded = load_stage_data(path, stage)
+        for col in ['Imputed_Columns', 'Imputed_Columns_2', 'Outlier_Columns']:
+            assert loaded[col].dtype == np.uint64, col
+            assert (loaded[col].to_numpy() == df[col].to_numpy().astype(np.uint64)).all(), col
+
+
+def test_cleaned_bitmasks_round_trip_through_csv(raw_customers, tmp_path):
+    # The extract plus 60 numeric columns: Imputed_Columns uses bits above 31 and spills into _2
+    rng = np.random.default_rng(4)
+    extra = pd.DataFrame(rng.normal(size=(len(raw_customers), 60)), columns=[f'x{i:02d}' for i in range(60)])
+    for i in range(60):
+        extra.iloc[i, i] = np.nan
+    cleaned, _ = run_cleaning(pd.concat([raw_customers, extra], axis=1), CLEANING_RULES)
+    assert cleaned['Imputed_Columns'].max() > np.iinfo(np.uint32).max
+    path = tmp_path / 'clean.csv'
+    cleaned.to_csv(path, index=False)
+    loaded = load_stage_data(path, 'eda')
+    for col in ['Imputed_Columns', 'Imputed_Columns_2', 'Outlier_Columns']:
+        assert (loaded[col].to_numpy() == cleaned[col].to_numpy()).all(), col
@@ -0,0 +1,41 @@
+# IQR and MAD outlier masks on columns without spread
+import numpy as np
+
+from cleaning_rules import CLEANING_RULES, run_cleaning, with_options
+from outlier_detection import block_quantiles, iqr_bounds, iqr_mask, mad, mad_mask
+
+
+def make_block():
+    # Mostly-0 flag (IQR = MAD = 0) next to a column with a real outlier
+    return np.array([[0, 1.0], [0, 2.0], [0, 3.0], [0, 2.5], [0, 2.0], [1, 50.0]])
+
+
+def test_tukey_fences_by_default():
+    block = make_block()
+    _, q1, _, q3, _ = block_quantiles(block, [0, 0.25, 0.5, 0.75, 1])
+    flags = iqr_mask(block, *iqr_bounds(q1, q3))
+    # Zero IQR: every value off the mode is outside the fences
+    assert flags[:, 0].tolist() == [False] * 5 + [True]
+    assert flags[:, 1].tolist() == [False] * 5 + [True]
+
+
+def test_zero_spread_columns_can_be_skipped():
+    block = make_block()
+    _, q1, median, q3, _ = block_quantiles(block, [0, 0.25, 0.5, 0.75, 1])
+    flags = iqr_mask(block, *iqr_bounds(q1, q3), skip_zero_spread=True)
+    assert flags[:, 0].sum() == 0
+    assert flags[:, 1].tolist() == [False] * 5 + [True]
+    assert mad_mask(block, median, mad(block, median))[:, 0].sum() == 0
+
+
+def test_binary_column_in_the_outlier_bitmask_is_opt_out(raw_customers):
+    seniors = int(raw_customers['SeniorCitizen'].sum())
+    cleaned, ctx = run_cleaning(raw_customers.copy(), CLEANING_RULES)
+    bit = ctx.counters[6]['Outlier_Columns']['bits']['SeniorCitizen']
+    assert ctx.counters[5]['SeniorCitizen']['outliers'] == seniors > 0
+    assert ((cleaned['Outlier_Columns'].to_numpy() >> bit) & 1).sum() == seniors
+
+    rules = with_options(CLEANING_RULES, 'outliers', skip_zero_spread=True)
+    assert not any(rule.get('skip_zero_spread') for rule in CLEANING_RULES)
+    cleaned, ctx = run_cleaning(raw_customers.copy(), rules)
+    assert ((cleaned['Outlier_Columns'].to_numpy() >> bit) & 1).sum() == 0
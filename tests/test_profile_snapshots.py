@@ -0,0 +1,45 @@
+# Snapshot drift status: PSI, KS distance and null-rate delta
+import numpy as np
+import pandas as pd
+
+import profile_snapshots
+from profile_snapshots import drift_table
+from profiling_sketches import StreamingProfile
+
+
+def make_snapshot_frame(n=5000, seed=8, null_share=0.0):
+    rng = np.random.default_rng(seed)
+    gender = pd.Series(rng.choice(['Male', 'Female'], n), dtype=object)
+    gender[rng.random(n) < null_share] = np.nan
+    return pd.DataFrame({'gender': gender, 'tenure': rng.integers(0, 72, n).astype(np.float64)})
+
+
+def drift_of(old, new):
+    table = drift_table(StreamingProfile().update(old), StreamingProfile().update(new))
+    return table.set_index('Column')
+
+
+def test_same_distribution_is_stable():
+    drift = drift_of(make_snapshot_frame(), make_snapshot_frame(seed=9))
+    assert (drift['Status'] == 'STABLE').all()
+
+
+def test_null_rate_jump_drifts_while_psi_stays_low():
+    drift = drift_of(make_snapshot_frame(), make_snapshot_frame(seed=9, null_share=0.07))
+    gender = drift.loc['gender']
+    assert gender['PSI'] < 0.1 and gender['Null_Rate_Delta'] > 5
+    assert gender['Status'] == 'SIGNIFICANT DRIFT'
+    assert gender['Drift_Metrics'] == 'Null rate'
+    assert drift.loc['tenure', 'Status'] == 'STABLE'
+
+
+def test_ks_distance_raises_the_status(monkeypatch):
+    # PSI switched off: the year-long shift is caught by the KS distance alone
+    monkeypatch.setattr(profile_snapshots, 'PSI_MODERATE', np.inf)
+    monkeypatch.setattr(profile_snapshots, 'PSI_SIGNIFICANT', np.inf)
+    old = make_snapshot_frame()
+    new = old.copy()
+    new['tenure'] = new['tenure'] + 12
+    tenure = drift_of(old, new).loc['tenure']
+    assert tenure['KS_Distance'] >= 0.1
+    assert tenure['Status'] != 'STABLE' and tenure['Drift_Metrics'] == 'KS'
@@ -0,0 +1,42 @@
+# Parallel column profiling must reproduce the serial profile exactly
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from profiling_engine import profile_columns, profile_columns_parallel
+
+
+@pytest.fixture
+def mixed_frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        'customerID': [f'C{i:04d}' for i in range(n)],
+        'tenure': rng.integers(0, 72, n),
+        'MonthlyCharges': rng.normal(65, 30, n).round(2),
+        'Contract': rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+        'City': rng.choice(['Austin', 'Boston', 'Chicago', 'Denver'], n),
+    })
+    df.loc[::37, 'MonthlyCharges'] = np.nan
+    df.loc[::41, 'City'] = np.nan
+    return df
+
+
+def assert_same_profile(df):
+    profile, value_counts = profile_columns(df)
+    parallel_profile, parallel_counts = profile_columns_parallel(df, workers=2)
+    pdt.assert_frame_equal(profile, parallel_profile)
+    assert list(value_counts) == list(parallel_counts)
+    for col in value_counts:
+        pdt.assert_series_equal(value_counts[col], parallel_counts[col])
+
+
+def test_parallel_matches_serial_on_text_columns(mixed_frame):
+    assert_same_profile(mixed_frame)
+
+
+def test_parallel_matches_serial_on_categorical_columns(mixed_frame):
+    # An unused category still appears (count 0), as in value_counts()
+    contract_type = pd.CategoricalDtype(['Month-to-month', 'One year', 'Two year', 'Three year'])
+    assert_same_profile(mixed_frame.astype({'Contract': contract_type, 'City': 'category'}))
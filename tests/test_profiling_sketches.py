@@ -0,0 +1,53 @@
+# Streaming sketches: merged covariance against DataFrame.cov() / corr(), clamped distinct counts
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiling_sketches import CovarianceSketch, StreamingProfile
+
+
+def make_numeric_frame(n=4000, seed=2):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        'tenure': rng.integers(0, 72, n).astype(np.float64),
+        'monthly': 1e6 + 20 * base + rng.normal(size=n),  # Large offset: needs the shift
+        'total': 50 * base + rng.normal(size=n),
+        'sparse': np.where(rng.random(n) < 0.7, np.nan, rng.normal(size=n)),
+    })
+    df.loc[rng.random(n) < 0.1, 'total'] = np.nan
+    return df
+
+
+def test_merged_partitions_match_dataframe_corr():
+    df = make_numeric_frame()
+    # Uneven partitions, one where 'sparse' is entirely missing
+    df.loc[:499, 'sparse'] = np.nan
+    merged = CovarianceSketch(df.columns)
+    for bounds in [(0, 500), (500, 1700), (1700, 1701), (1701, 4000)]:
+        part = CovarianceSketch(df.columns).update(df.iloc[slice(*bounds)])
+        merged.merge(part)
+    pd.testing.assert_frame_equal(merged.correlation(), df.corr(), rtol=1e-9)
+    pd.testing.assert_frame_equal(merged.covariance(), df.cov(), rtol=1e-9)
+
+
+def test_chunk_with_an_all_missing_column_raises_no_warning():
+    df = make_numeric_frame(200)
+    df['sparse'] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        sketch = CovarianceSketch(df.columns).update(df)
+    assert sketch.correlation().loc['sparse'].isna().all()
+
+
+def test_distinct_estimates_never_exceed_the_rows_seen():
+    # All-distinct rows: the raw HyperLogLog estimate may land above the row count
+    df = pd.DataFrame({'customerID': [f'C{i:05d}' for i in range(7043)], 'tenure': np.arange(7043) % 72})
+    df.loc[::10, 'customerID'] = np.nan
+    profile = StreamingProfile().update(df.astype(object))
+    assert profile.distinct_rows <= 7043
+    ids = profile.columns['customerID']
+    assert ids.distinct_count <= ids.rows - ids.nulls
+    assert profile.columns['tenure'].distinct_count == pytest.approx(72, rel=0.1)
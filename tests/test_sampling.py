@@ -0,0 +1,39 @@
+# Stratified reservoir samples and the preview stopping rule
+import numpy as np
+import pandas as pd
+
+from profiling_engine import intervals_within_target
+from sampling import StratifiedReservoir
+
+
+def test_reservoir_samples_are_nested_and_stratified():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'Churn': rng.choice(['Yes', 'No'], 3000, p=[0.25, 0.75]),
+                       'Contract': rng.choice(['Month-to-month', 'Two year'], 3000),
+                       'row': np.arange(3000)})
+    reservoir = StratifiedReservoir(['Churn', 'Contract'], capacity=2000)
+    for start in range(0, len(df), 700):
+        reservoir.update(df.iloc[start:start + 700])
+    small, _, population_sizes, small_sizes, labels = reservoir.sample(500)
+    large, codes, _, large_sizes, _ = reservoir.sample(1000)
+    assert population_sizes.sum() == len(df)
+    assert set(small['row']) <= set(large['row'])
+    # Proportional allocation: every stratum is sampled at about the same rate
+    assert np.allclose(large_sizes / population_sizes, 1000 / len(df), atol=0.01)
+    for code, label in enumerate(labels):
+        assert (large.loc[codes == code, ['Churn', 'Contract']] == list(label)).all().all()
+
+
+def test_mean_near_zero_can_meet_the_target_width():
+    # A 0/1 column with a low mean: a width relative to |mean| would never be met
+    table = pd.DataFrame({
+        'Column': ['SeniorCitizen', 'SeniorCitizen', 'SeniorCitizen'],
+        'Statistic': ['Null_Rate', 'Mean', 'Std'],
+        'Estimate': [0.0, 0.01, 0.0995],
+        'CI_Lower': [0.0, 0.007, np.nan],
+        'CI_Upper': [0.0, 0.013, np.nan],
+        'Gated': [True, True, False],
+    })
+    assert intervals_within_target(table, 0.02)
+    table.loc[1, ['CI_Lower', 'CI_Upper']] = [-0.01, 0.03]
+    assert not intervals_within_target(table, 0.02)
@@ -0,0 +1,42 @@
+# Table-based significance tests against scipy's row-level implementations
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from significance_tests import categorical_tests, numeric_tests, value_churn_table
+
+
+def test_chi_square_matches_scipy():
+    rng = np.random.default_rng(11)
+    values = rng.choice(['a', 'b', 'c', 'd'], 3000, p=[0.4, 0.3, 0.2, 0.1])
+    churn = rng.random(3000) < np.where(values == 'a', 0.35, 0.2)
+    crosstab = pd.crosstab(values, churn)
+    lift = pd.DataFrame({'Column': 'Feature', 'Value': crosstab.index,
+                         'Customers': crosstab.sum(axis=1).to_numpy(), 'Churned': crosstab[True].to_numpy()})
+    row = categorical_tests(lift).iloc[0]
+    chi2, p, dof, _ = stats.chi2_contingency(crosstab.to_numpy(), correction=False)
+    assert row['Statistic'] == pytest.approx(chi2)
+    assert row['P_Value'] == pytest.approx(p)
+    assert row['DoF'] == dof
+    assert row['Effect'] == pytest.approx(stats.contingency.association(crosstab.to_numpy(), method='cramer'))
+
+
+@pytest.mark.parametrize('discrete', [False, True])
+def test_mann_whitney_and_ks_match_scipy(discrete):
+    rng = np.random.default_rng(5)
+    values = rng.gamma(2.0, 30.0, 2500)
+    if discrete:
+        values = np.round(values / 10)  # Heavy ties, as in tenure months
+    churn = (rng.random(2500) < 0.3).astype(np.float64)
+    values[rng.random(2500) < 0.02] = np.nan  # Missing values are dropped
+    _, retained, churned = value_churn_table(values, churn)
+    mw, ks = numeric_tests('Feature', retained, churned)
+    valid = ~np.isnan(values)
+    x, y = values[valid & (churn == 1)], values[valid & (churn == 0)]
+    expected_mw = stats.mannwhitneyu(x, y, use_continuity=True, method='asymptotic')
+    assert mw['Statistic'] == pytest.approx(expected_mw.statistic)
+    assert mw['P_Value'] == pytest.approx(expected_mw.pvalue)
+    expected_ks = stats.ks_2samp(x, y, method='asymp')
+    assert ks['Statistic'] == pytest.approx(expected_ks.statistic)
+    assert ks['P_Value'] == pytest.approx(expected_ks.pvalue)